@@ -6,7 +6,8 @@ This script is called by the GitHub Actions workflow on every Pull Request.
 
 What it does:
   1. Uses `git diff --name-only HEAD~1` to find only the changed Python files.
-  2. Parses each file with Python's `ast` module (structural analysis, not LLM).
+  2. Parses each file with Python's `ast` module (structural analysis, not LLM),
+     through the backend's stdlib-only code_facts module (one visit per file).
   3. Checks every FunctionDef and ClassDef for a docstring.
   4. Saves a Pass/Fail audit decision to `guardian_audit.log`.
   5. Prints a human-readable report and exits with code 1 if any checks fail,
@@ -19,13 +20,16 @@ Usage (in CI via GitHub Actions):
   The guardian_check.yml workflow calls this automatically on every PR.
 """
 
-import ast
 import json
 import os
 import subprocess
 import sys
 from datetime import datetime, timezone
 
+# Same single-pass AST facts the backend Guardian uses (stdlib only, loaded by path)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "backend", "app", "core"))
+from code_facts import analyze_source  # noqa: E402
+
 
 # ── Config ─────────────────────────────────────────────────────────────────────
 
@@ -77,28 +81,26 @@ def check_file(filepath: str) -> list[dict]:
     except OSError as e:
         return [{"name": filepath, "type": "file", "lineno": 0, "issue": f"Cannot read file: {e}"}]
 
-    try:
-        tree = ast.parse(source, filename=filepath)
-    except SyntaxError as e:
-        return [{"name": filepath, "type": "syntax", "lineno": e.lineno or 0, "issue": f"SyntaxError: {e.msg}"}]
+    facts = analyze_source(source, filepath)
+    if not facts.parsed:
+        return [{"name": filepath, "type": "syntax", "lineno": facts.error["lineno"], "issue": f"SyntaxError: {facts.error['msg']}"}]
 
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+    for qualname, kind, lineno, _, documented, _ in facts.defs:
+        name = qualname.rsplit(".", 1)[-1]
+        if kind == "class":
+            node_type = "class"
+        else:
             node_type = "function"
             # Skip private helpers and test stubs if desired
-            if any(node.name.startswith(p) for p in IGNORED_FUNCTION_PREFIXES):
+            if any(name.startswith(p) for p in IGNORED_FUNCTION_PREFIXES):
                 continue
-        elif isinstance(node, ast.ClassDef):
-            node_type = "class"
-        else:
-            continue
 
-        if not ast.get_docstring(node):
+        if not documented:
             violations.append({
-                "name": node.name,
+                "name": name,
                 "type": node_type,
-                "lineno": node.lineno,
-                "issue": f"Missing docstring for {node_type} '{node.name}' (line {node.lineno})",
+                "lineno": lineno,
+                "issue": f"Missing docstring for {node_type} '{name}' (line {lineno})",
             })
 
     return violations
@@ -16,11 +16,13 @@ class ImpactRequest(BaseModel):
     target_file: str  # relative path
     proposed_change: str
     project_name: str
+    target_symbol: Optional[str] = None  # "Class.method" or "function" inside target_file
 
 class ImpactNode(BaseModel):
     file_path: str
     severity: str  # "high", "medium", "low"
     reason: str
+    symbols: List[str] = []  # touched symbols in this file (symbol-level analysis only)
 
 class ImpactResponse(BaseModel):
     impacted_files: List[ImpactNode]
@@ -18,7 +18,9 @@ async def analyze_impact(request: ImpactRequest):
     """Calculates the blast radius of a change using the project's knowledge graph."""
     print(f"\n[Architect] POST /impact -> project={request.project_name}, file={request.target_file}")
     try:
-        return architect_service.analyze_impact(request.project_name, request.target_file, request.proposed_change)
+        return architect_service.analyze_impact(
+            request.project_name, request.target_file, request.proposed_change, request.target_symbol
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -4,13 +4,53 @@ import hashlib
 import time
 import requests
 from requests.auth import HTTPBasicAuth
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from app.core.config import settings
+from app.core.graph_registry import graph_registry
+from app.core.graph_store import graph_store
 from app.core.llm import generate_json, generate_text
 from app.core.alerts import alert_system
+from app.core.tokens import token_counter
 from app.agents.librarian.service import librarian
+from app.agents.librarian.symbols import SymbolIndex, symbol_id, split_symbol
 from .models import BuildResponse, ImpactResponse, ImpactNode, JiraTicket
 
+def _dependents_map(graph_data: Dict[str, Any]) -> Dict[str, List[str]]:
+    dependents: Dict[str, List[str]] = {}
+    for edge in graph_data.get("edges", []):
+        dependents.setdefault(edge["target"], []).append(edge["source"])
+    return dependents
+
+
+# Files sent to the LLM per file-targeted impact query
+IMPACT_MAX_FILES = 5
+
+
+def _symbol_impact(symbols: SymbolIndex, target_file: str, target_symbol: Optional[str]) -> Optional[Tuple[List[Tuple[str, List[str]]], int]]:
+    """
+    Blast radius through the symbol graph: only the callers of the touched
+    symbols, grouped per file and ranked by distance. None when the symbol
+    layer has nothing for target_file (non-Python file, unknown symbol).
+    """
+    if target_file not in symbols.files:
+        return None
+    if target_symbol:
+        seeds = [symbol_id(target_file, target_symbol)]
+        if symbols.span(seeds[0]) is None:
+            return None
+    else:
+        seeds = symbols.symbols_in(target_file)
+    distances = symbols.impacted(seeds)
+    per_file: Dict[str, Tuple[int, List[str]]] = {}
+    for sym, distance in sorted(distances.items(), key=lambda item: (item[1], item[0])):
+        rel_path, qualname = split_symbol(sym)
+        _, names = per_file.setdefault(rel_path, (distance, []))
+        names.append(qualname)
+    ranked = sorted(per_file.items(), key=lambda item: (item[0] != target_file, item[1][0], item[0]))
+    depth = max(distances.values(), default=0)
+    return [(path, names) for path, (_, names) in ranked], depth
+
+
 class ArchitectService:
     def __init__(self):
         self.scaffold_prompt = """
@@ -104,23 +144,67 @@ STRICT: No conversational text. Escape all newlines as '\\n'.
             alert_system.add_alert(title="Architect Build Failed", message=str(e), severity="error")
             raise ValueError(f"Failed to build project: {e}")
 
-    def analyze_impact(self, project_name: str, target_file: str, proposed_change: str) -> ImpactResponse:
-        """Analyses the blast radius of a change using the Librarian graph."""
+    def analyze_impact(self, project_name: str, target_file: str, proposed_change: str, target_symbol: Optional[str] = None) -> ImpactResponse:
+        """Analyses the blast radius of a change using the Librarian graph (symbol graph when available)."""
         try:
-            # Locate project root (it might be a relative path or an absolute id)
-            project_path = os.path.join(settings.REPO_STORAGE_PATH, project_name)
-            graph_path = os.path.join(project_path, "_kachow_graph.json")
-            
-            if not os.path.exists(graph_path):
+            # Graph of the branch/commit last scanned for this project
+            slot = graph_store.current(project_name)
+            if slot is None:
                 raise FileNotFoundError(f"Project graph not found for {project_name}")
-            
-            with open(graph_path, "r") as f:
-                graph_data = json.load(f)
+            graph_path = slot.graph_path
+
+            graph_data = graph_registry.get(graph_path)
+            # Reverse adjacency (target -> dependents, in edge order), memoised per graph
+            dependents = graph_registry.derive(graph_path, "dependents", _dependents_map)
             
             impact_nodes = []
             depth = 0
 
-            if target_file and target_file not in ["root", "global", ""]:
+            # Symbol layer (Python): callers of the touched definitions only
+            symbol_path = slot.path("symbols.json")
+            symbols = graph_registry.derive(graph_path, "symbols", lambda _: SymbolIndex.load(symbol_path))
+            symbol_hits = None
+            if symbols is not None and target_file and target_file not in ["root", "global", ""]:
+                symbol_hits = _symbol_impact(symbols, target_file, target_symbol)
+
+            if symbol_hits is not None:
+                ranked, depth = symbol_hits
+                print(f"[Architect:Impact] {len(ranked)} files via symbol graph, analysing top {IMPACT_MAX_FILES}")
+                epicenter = f"{target_file}::{target_symbol}" if target_symbol else target_file
+                for path, names in ranked[:IMPACT_MAX_FILES]:
+                    reasoning_prompt = f"""
+                    ROLE: Senior System Architect & Security Expert.
+                    CONTEXT: Proposed change "{proposed_change}" to "{epicenter}".
+                    TARGET COMPONENT: "{path}".
+                    AFFECTED SYMBOLS IN TARGET: {", ".join(names)}
+                    
+                    TASK: Analyze the impact of this change on these symbols of the target component.
+                    
+                    REQUIREMENTS FOR REASONING:
+                    1. BE DETAILED: Explain the specific technical mechanism of the dependency (e.g., "calls the changed function", "relies on specific return type").
+                    2. ANALYZE RISKS: Identify security vulnerabilities, data integrity issues, or performance regressions that may arise.
+                    3. CONTEXTUALIZE: Explain the downstream consequences (e.g., "compromising the security of the entire system").
+                    4. DONT BE VAGUE: Avoid generic phrases like "dependency detected". Be codebase-specific.
+                    
+                    RETURN ONLY JSON:
+                    {{ 
+                        "severity": "high/medium/low", 
+                        "reason": "Detailed, logic-based technical explanation (min 30 words)." 
+                    }}
+                    """
+                    analysis = generate_json(reasoning_prompt, "You are a senior professional software architect.")
+
+                    impact_nodes.append(ImpactNode(
+                        file_path=path,
+                        severity=analysis.get("severity", "medium"),
+                        reason=analysis.get("reason", f"{', '.join(names)} in {path} depends on {epicenter}."),
+                        symbols=names
+                    ))
+
+                impact_nodes.sort(key=lambda x: x.severity == "high", reverse=True)
+                if not depth and impact_nodes:
+                    depth = 1
+            elif target_file and target_file not in ["root", "global", ""]:
                 # Transitive dependency lookup based on specific file
                 impacted = set()
                 queue = [target_file]
@@ -129,12 +213,12 @@ STRICT: No conversational text. Escape all newlines as '\\n'.
                 while queue:
                     current = queue.pop(0)
                     found_in_level = False
-                    for edge in graph_data.get("edges", []):
+                    for source in dependents.get(current, []):
                         # Find things that depend on 'current'
-                        if edge["target"] == current and edge["source"] not in visited:
-                            impacted.add(edge["source"])
-                            visited.add(edge["source"])
-                            queue.append(edge["source"])
+                        if source not in visited:
+                            impacted.add(source)
+                            visited.add(source)
+                            queue.append(source)
                             found_in_level = True
                     if found_in_level:
                         depth += 1
@@ -178,7 +262,7 @@ STRICT: No conversational text. Escape all newlines as '\\n'.
                 
                 # Sort by severity (high first) and limit to top 5 for file-targeted
                 impact_nodes.sort(key=lambda x: x.severity == "high", reverse=True)
-                impact_nodes = impact_nodes[:5]
+                impact_nodes = impact_nodes[:IMPACT_MAX_FILES]
 
                 # Final depth adjustment: if we have impacted nodes but depth was 0, set to 1
                 if not depth and impact_nodes:
@@ -186,7 +270,7 @@ STRICT: No conversational text. Escape all newlines as '\\n'.
             else:
                 # Global Scenario Analysis (target_file is 'root' or empty)
                 all_nodes = [node["id"] for node in graph_data.get("nodes", [])]
-                all_nodes_str = "\\n".join(all_nodes[:50]) # cap at 50 for token limits
+                all_nodes_str = "\\n".join(token_counter.pack(all_nodes, settings.PROMPT_TOKEN_BUDGET, sep="\\n"))
                 
                 global_prompt = f"""
                 ROLE: Senior System Architect & Infrastructure Lead.
@@ -1,9 +1,12 @@
-import os
 import json
 from typing import Dict, Any
 
+from app.core import graph_cache
+from app.core.graph_registry import graph_registry
+from app.core.graph_store import graph_store
 from app.core.config import settings
 from app.core.llm import generate_text
+from app.core.tokens import token_counter
 from app.core.alerts import alert_system
 from .models import DiagramRequest, DiagramResponse
 
@@ -18,38 +21,32 @@ class DiagramService:
         if not project_name:
             project_name = "project"
             
-        target_dir = os.path.join(settings.REPO_STORAGE_PATH, project_name)
-        graph_path = os.path.join(target_dir, "_kachow_graph.json")
+        graph_path = graph_store.graph_path(project_name)
 
-        if not os.path.exists(graph_path):
+        if not graph_path or not graph_cache.has_graph(graph_path):
             raise FileNotFoundError(f"Knowledge graph not found for repository: {request.repo_url}. Please ingest the repository via Librarian first. (Checked path: {graph_path})")
 
-        with open(graph_path, "r", encoding="utf-8") as f:
-            graph_data = json.load(f)
+        graph_data = graph_registry.get(graph_path)
+
+        # Final robustness pruning for Groq token limits: at most 30 nodes / 40 edges
+        # (the diagram must fit the completion), packed into the prompt budget
+        clean_nodes = [
+            json.dumps({"id": node.get("id"), "label": node.get("label"), "type": node.get("type")}, separators=(",", ":"))
+            for node in graph_data.get("nodes", [])[:30]
+        ]
+        clean_nodes = token_counter.pack(clean_nodes, settings.PROMPT_TOKEN_BUDGET // 2, sep=",")
+        kept = {json.loads(n)["id"] for n in clean_nodes}
+
+        # Only edges between the nodes that made it in
+        clean_edges = [
+            json.dumps({"s": edge.get("source"), "t": edge.get("target")}, separators=(",", ":"))
+            for edge in graph_data.get("edges", [])
+            if edge.get("source") in kept and edge.get("target") in kept
+        ][:40]
+        clean_edges = token_counter.pack(clean_edges, settings.PROMPT_TOKEN_BUDGET // 2, sep=",")
 
-        # Final robustness pruning for Groq 12k token limits
-        clean_nodes = []
-        for node in graph_data.get("nodes", [])[:30]:
-            clean_nodes.append({
-                "id": node.get("id"),
-                "label": node.get("label"),
-                "type": node.get("type")
-            })
-            
-        clean_edges = []
-        for edge in graph_data.get("edges", [])[:40]:
-            clean_edges.append({
-                "s": edge.get("source"),
-                "t": edge.get("target")
-            })
-        
-        truncated_graph = {
-            "n": clean_nodes,
-            "e": clean_edges
-        }
-        
         # Compact JSON to save tokens
-        graph_str = json.dumps(truncated_graph, separators=(",", ":"))
+        graph_str = '{"n":[' + ",".join(clean_nodes) + '],"e":[' + ",".join(clean_edges) + "]}"
 
         prompt = f"""
 Architect & Designer. Create a Mermaid flowchart from: {graph_str}
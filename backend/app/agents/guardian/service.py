@@ -4,11 +4,17 @@ from datetime import datetime, timezone
 from app.core.llm import generate_json, generate_text
 from app.core.alerts import alert_system
 from app.core.config import settings
+from app.core.code_facts import analyze_source
+from app.core.file_inventory import file_inventories
+from app.core.tokens import token_counter
 from .models import PRReviewResponse, AutoHealResponse
 
 # Audit log path — stored in the rebackend's storage folder
 _AUDIT_LOG = os.path.join(os.path.dirname(__file__), "..", "..", "..", "storage", "guardian_audit.log")
 
+# Completion tokens a heal reply needs beyond the rewritten file (explanation, fences)
+_HEAL_REPLY_TOKENS = 1024
+
 
 def _save_audit_log(file_name: str, passed: bool, issues: list, message: str) -> None:
     """
@@ -71,34 +77,34 @@ Return ONLY your explanation and the code block.
         """
         Task 1: Deterministic structural audit using AST.
         """
-        import ast
-        try:
-            tree = ast.parse(code_content, filename=file_name)
-            functions = [n for n in ast.walk(tree) if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
-            classes = [n for n in ast.walk(tree) if isinstance(n, ast.ClassDef)]
-            
-            issues = []
-            for func in functions:
-                if not ast.get_docstring(func):
-                    issues.append(f"Missing docstring for function '{func.name}'")
-            for cls in classes:
-                if not ast.get_docstring(cls):
-                    issues.append(f"Missing docstring for class '{cls.name}'")
-                    
-            return {
-                "counts": {"functions": len(functions), "classes": len(classes)},
-                "issues": issues,
-                "passed": len(issues) == 0
-            }
-        except SyntaxError as e:
-            return {"counts": {}, "issues": [f"Syntax Error: {e}"], "passed": False}
+        facts = analyze_source(code_content, file_name)
+        if not facts.parsed:
+            return {"counts": {}, "issues": [f"Syntax Error: {facts.error_message(file_name)}"], "passed": False}
+
+        functions, classes = facts.functions(), facts.classes()
+        issues = []
+        for qualname, _, _, _, documented, _ in functions:
+            if not documented:
+                issues.append(f"Missing docstring for function '{qualname.rsplit('.', 1)[-1]}'")
+        for qualname, _, _, _, documented, _ in classes:
+            if not documented:
+                issues.append(f"Missing docstring for class '{qualname.rsplit('.', 1)[-1]}'")
+
+        return {
+            "counts": {"functions": len(functions), "classes": len(classes), "max_complexity": facts.max_complexity},
+            "issues": issues,
+            "passed": len(issues) == 0
+        }
 
     def health_check(self, file_name: str, repo_name: str) -> dict:
         """
         Task 1: Quality check via SonarQube.
         """
         from app.core.sonar_client import sonar
-        metrics = sonar.get_file_metrics(file_name, repo_name)
+        # Analyzer results are keyed by project-relative path; accept absolute paths too
+        inventory = file_inventories.peek(os.path.join(settings.REPO_STORAGE_PATH, repo_name))
+        rel_path = inventory.relative(file_name) if inventory else None
+        metrics = sonar.get_file_metrics(rel_path or file_name, repo_name)
         
         passed = metrics.get("quality_gate") == "PASSED"
         issues = []
@@ -119,6 +125,10 @@ Return ONLY your explanation and the code block.
         health = self.health_check(file_name, repo_name)
         
         # 3. LLM Final Review (Contextual intelligence)
+        code_tokens = token_counter.count(code_content)
+        if code_tokens > settings.PROMPT_TOKEN_BUDGET:
+            shown = token_counter.truncate(code_content, settings.PROMPT_TOKEN_BUDGET)
+            code_content = f"{shown}\n... [truncated: first {settings.PROMPT_TOKEN_BUDGET} of {code_tokens} tokens]"
         user_prompt = f"File: {file_name}\n\nCode:\n```\n{code_content}\n```"
         try:
             llm_result = generate_json(user_prompt, self.review_prompt)
@@ -147,7 +157,19 @@ Return ONLY your explanation and the code block.
         user_prompt = f"File: {file_name}\n\nIssues to fix:\n{issues_text}\n\nOriginal Code:\n```\n{code_content}\n```"
         
         try:
-            result_text = generate_text(user_prompt, self.heal_prompt, temperature=0.1)
+            # The fix is a full rewrite, so the completion must hold the whole file plus
+            # the explanation: size it to the file, within the model's completion cap
+            # and what the context window leaves after the prompt
+            prompt_tokens = token_counter.count(user_prompt) + token_counter.count(self.heal_prompt)
+            code_tokens = token_counter.count(code_content)
+            room = min(settings.LLM_MAX_COMPLETION_TOKENS, settings.LLM_CONTEXT_TOKENS - prompt_tokens)
+            if code_tokens + _HEAL_REPLY_TOKENS > room:
+                raise ValueError(
+                    f"{file_name} is {code_tokens} tokens: a full rewrite does not fit {settings.LLM_MODEL}'s "
+                    f"{settings.LLM_CONTEXT_TOKENS}-token context / {settings.LLM_MAX_COMPLETION_TOKENS}-token completion"
+                )
+            result_text = generate_text(user_prompt, self.heal_prompt,
+                                        max_tokens=min(room, max(2048, code_tokens + _HEAL_REPLY_TOKENS)), temperature=0.1)
             
             # Extract the code block (more relaxed regex)
             import re
@@ -206,6 +228,7 @@ Return ONLY your explanation and the code block.
             os.makedirs(os.path.dirname(abs_path), exist_ok=True)
             with open(abs_path, 'w', encoding='utf-8') as f:
                 f.write(content)
+            file_inventories.touch(abs_path)
             
             print(f"[Guardian:Save] Successfully saved {abs_path}")
             alert_system.add_alert(
@@ -0,0 +1,197 @@
+"""
+Librarian Analysis Stage — parallel file read + AST parse.
+
+The tree walk in LibrarianService._build_graph only collects paths. Python
+sources are then handed to this module, which reads and parses them either
+in-process (small repos, workers=1) or across a process pool, and returns
+plain dicts the main process merges into the graph.
+
+Both paths run the exact same `analyze_python_file` function and results are
+returned in input order, so the serial and parallel GraphResponse are identical.
+Results carry facts, not file text: the embed pipeline re-reads files itself,
+so nothing here holds a repo's worth of source in memory. Facts for content
+seen before come from the persistent analysis cache (analysis_cache.py).
+Ref scans (LibrarianService.scan_ref) pass blob shas instead of paths and
+workers read them from the object database.
+
+Pool results carry `worker_cpu_s`, the worker's own CPU for that file, so the
+parse stage can account for CPU spent outside its thread.
+"""
+import functools
+import hashlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.code_facts import analyze_source
+from app.core.config import settings
+from app.core.git_objects import GitObjectError, GitTree, git_readers
+from .analysis_cache import analysis_cache
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+def _decode(data: bytes) -> str:
+    text = data.decode("utf-8", errors="ignore")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def read_source(full_path: str) -> Tuple[str, str]:
+    """
+    Read a file once and return (text, sha1 of the raw bytes).
+    Text matches open(..., "r", errors="ignore"), universal newlines included.
+    """
+    try:
+        with open(full_path, "rb") as fh:
+            data = fh.read()
+    except Exception:
+        return "", ""
+    return _decode(data), hashlib.sha1(data).hexdigest()
+
+
+def read_tree_source(tree: GitTree, rel_path: str) -> Tuple[str, str]:
+    """read_source for a file of a GitTree (blob from the object database)."""
+    try:
+        data = tree.read_bytes(rel_path)
+    except GitObjectError:
+        data = None
+    if data is None:
+        return "", ""
+    return _decode(data), hashlib.sha1(data).hexdigest()
+
+
+def _analyze_data(data: Optional[bytes], rel_path: str) -> Dict[str, Any]:
+    digest = hashlib.sha1(data).hexdigest() if data is not None else ""
+    result: Dict[str, Any] = {
+        "rel_path": rel_path,
+        "sha1": digest,
+        "cached": False,
+        "parsed": False,
+        "imports": [],
+        "total_functions": 0,
+        "documented_functions": 0,
+        "symbols": None,
+    }
+    cached = analysis_cache.get(digest)
+    if cached is not None:
+        result.update(cached)
+        result["cached"] = True
+        return result
+
+    facts = analyze_source(_decode(data or b""), rel_path)
+    if not facts.parsed:
+        return result
+
+    result["parsed"] = True
+    result["imports"] = list(facts.imports)
+    result["total_functions"] = facts.total_functions
+    result["documented_functions"] = facts.documented_functions
+    result["symbols"] = facts.symbols()
+    return result
+
+
+def analyze_python_file(full_path: str, rel_path: str) -> Dict[str, Any]:
+    """
+    Read one Python file and extract everything the graph needs from it.
+    Runs inside pool workers, so it must stay a picklable top-level function.
+    Content already in the analysis cache is not decoded or parsed again.
+    """
+    try:
+        with open(full_path, "rb") as fh:
+            data = fh.read()
+    except Exception:
+        data = None
+    return _analyze_data(data, rel_path)
+
+
+def analyze_python_blob(repo_path: str, blob_sha: str, rel_path: str) -> Dict[str, Any]:
+    """
+    analyze_python_file for a blob of a ref scan. Each worker process reads
+    through its own persistent cat-file process, so no source crosses IPC.
+    """
+    try:
+        data = git_readers.get(repo_path).read(blob_sha)
+    except (GitObjectError, OSError):
+        data = None
+    return _analyze_data(data, rel_path)
+
+
+def _analyze_item(item: Tuple[str, str]) -> Dict[str, Any]:
+    return analyze_python_file(*item)
+
+
+def _analyze_blob_item(item: Tuple[str, str, str]) -> Dict[str, Any]:
+    return analyze_python_blob(*item)
+
+
+def _timed_item(fn: Callable[[tuple], Dict[str, Any]], item: tuple) -> Dict[str, Any]:
+    """Pool-side wrapper: the worker's CPU for this item travels back with the result."""
+    cpu0 = time.process_time()
+    result = fn(item)
+    result["worker_cpu_s"] = time.process_time() - cpu0
+    return result
+
+
+# ── Stage entry point ─────────────────────────────────────────────────────────
+
+def _pool_context():
+    # forkserver avoids forking a process that already runs uvicorn/chroma threads
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def analyze_python_files(
+    items: List[Tuple[str, str]],
+    workers: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Analyze (full_path, rel_path) pairs and yield results in the same order.
+
+    `workers` defaults to settings.LIBRARIAN_PARSE_WORKERS. The pool is only
+    started when there are enough files to amortise worker start-up.
+    New results are written to the analysis cache once the batch is done.
+    """
+    return _run(_analyze_item, items, workers)
+
+
+def analyze_python_blobs(
+    repo_path: str,
+    items: List[Tuple[str, str]],
+    workers: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """analyze_python_files for (blob sha, rel_path) pairs of a ref scan."""
+    return _run(_analyze_blob_item, [(repo_path, sha, rel_path) for sha, rel_path in items], workers)
+
+
+def _run(fn: Callable[[tuple], Dict[str, Any]], items: List[tuple], workers: Optional[int]) -> Iterator[Dict[str, Any]]:
+    workers = settings.LIBRARIAN_PARSE_WORKERS if workers is None else workers
+    use_cache = analysis_cache.open()
+    fresh: List[Tuple[str, Dict[str, Any]]] = []
+    hits: List[str] = []
+
+    def _collect(results: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for result in results:
+            if use_cache:
+                if result["cached"]:
+                    hits.append(result["sha1"])
+                else:
+                    fresh.append((result["sha1"], dict(result)))
+            if not settings.LIBRARIAN_SYMBOLS:
+                result["symbols"] = None
+            yield result
+
+    if workers <= 1 or len(items) < settings.LIBRARIAN_PARALLEL_MIN_FILES:
+        yield from _collect(fn(item) for item in items)
+    else:
+        # Large chunks keep IPC overhead low; ~4 chunks per worker still balances load.
+        chunksize = max(1, len(items) // (workers * 4))
+        print(f"[Librarian:Parse] analysing {len(items)} Python files on {workers} workers")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+            yield from _collect(pool.map(functools.partial(_timed_item, fn), items, chunksize=chunksize))
+
+    if use_cache:
+        analysis_cache.record(fresh, hits)
+        print(f"[Librarian:Parse] analysis cache: {len(hits)} hits, {len(fresh)} parsed")
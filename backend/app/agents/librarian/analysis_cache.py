@@ -0,0 +1,153 @@
+"""
+Analysis Cache — parse results persisted by file content hash.
+
+A forced rescan of an unchanged repo used to re-parse every Python file.
+This SQLite store (storage/analysis_cache.sqlite3) maps the sha1 of a file's
+raw bytes to what `analyze_python_file` extracted from it: imports, doc
+stats and symbol facts. A hit costs one read + hash + point lookup.
+
+  - shared across projects and branches (same blob, same facts)
+  - pool workers open it read-only; the main process batches every write
+    (new results, LRU touches, eviction) after the parse stage
+  - LRU by last use, capped at ANALYSIS_CACHE_MAX_MB of payload
+  - SCHEMA_VERSION / FACTS_VERSION mismatch drops the table on open
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.code_facts import FACTS_VERSION
+from app.core.config import settings
+
+SCHEMA_VERSION = 1
+
+# Result fields that depend only on file content
+PAYLOAD_FIELDS = ("parsed", "imports", "total_functions", "documented_functions", "symbols")
+
+
+class AnalysisCache:
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._version = f"{SCHEMA_VERSION}:{FACTS_VERSION}"
+        self._writer: Optional[sqlite3.Connection] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._reader_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    # ── Connections ───────────────────────────────────────────────────────────
+
+    def open(self) -> bool:
+        """Main process: create / validate the store before workers read it."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            if self._writer is not None:
+                return True
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+                row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+                if row is None or row[0] != self._version:
+                    conn.execute("DROP TABLE IF EXISTS results")
+                    conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (self._version,))
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    " digest TEXT PRIMARY KEY, payload BLOB NOT NULL,"
+                    " nbytes INTEGER NOT NULL, used INTEGER NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"[Librarian:Cache] analysis cache unavailable ({e})")
+                return False
+            self._writer = conn
+            return True
+
+    def _read_conn(self) -> Optional[sqlite3.Connection]:
+        # One read-only connection per process (pool workers inherit nothing)
+        if self._reader is None or self._reader_pid != os.getpid():
+            try:
+                self._reader = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=30, check_same_thread=False)
+            except sqlite3.Error:
+                return None
+            self._reader_pid = os.getpid()
+        return self._reader
+
+    # ── Reads (any process) ───────────────────────────────────────────────────
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled or not digest:
+            return None
+        with self._lock:
+            conn = self._read_conn()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute("SELECT payload FROM results WHERE digest = ?", (digest,)).fetchone()
+            except sqlite3.Error:
+                return None
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    # ── Writes (main process) ─────────────────────────────────────────────────
+
+    def record(self, fresh: Iterable[Tuple[str, Dict[str, Any]]], hits: Iterable[str]):
+        """Store new (digest, result) pairs, bump the hits' LRU stamp, evict."""
+        if self._writer is None:
+            return
+        now = time.time_ns()
+        rows = []
+        for digest, result in fresh:
+            if digest:
+                blob = zlib.compress(json.dumps({k: result[k] for k in PAYLOAD_FIELDS}, separators=(",", ":")).encode("utf-8"))
+                rows.append((digest, blob, len(blob), now))
+        with self._lock:
+            try:
+                with self._writer:
+                    self._writer.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", rows)
+                    self._writer.executemany("UPDATE results SET used = ? WHERE digest = ?", ((now, d) for d in hits))
+                    self._evict()
+            except sqlite3.Error as e:
+                print(f"[Librarian:Cache] analysis cache write failed ({e})")
+
+    def _evict(self):
+        total = self._writer.execute("SELECT COALESCE(SUM(nbytes), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # drop least recently used down to 90% of the cap
+        excess = total - int(self.max_bytes * 0.9)
+        victims: List[Tuple[str]] = []
+        for digest, nbytes in self._writer.execute("SELECT digest, nbytes FROM results ORDER BY used"):
+            victims.append((digest,))
+            excess -= nbytes
+            if excess <= 0:
+                break
+        self._writer.executemany("DELETE FROM results WHERE digest = ?", victims)
+        print(f"[Librarian:Cache] evicted {len(victims)} analysis results")
+
+    def stats(self) -> Dict[str, int]:
+        if not self.open():
+            return {"entries": 0, "bytes": 0, "max_bytes": self.max_bytes}
+        with self._lock:
+            entries, nbytes = self._writer.execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM results").fetchone()
+        return {"entries": entries, "bytes": nbytes, "max_bytes": self.max_bytes}
+
+    def clear(self):
+        if self.open():
+            with self._lock, self._writer:
+                self._writer.execute("DELETE FROM results")
+
+
+# Singleton — opened lazily; pool workers only ever read through it
+analysis_cache = AnalysisCache(settings.ANALYSIS_CACHE_PATH, settings.ANALYSIS_CACHE_MAX_MB * 1024 * 1024)
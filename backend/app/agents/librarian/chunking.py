@@ -0,0 +1,383 @@
+"""
+Librarian Chunking — syntax-aware chunks with content-defined fallback.
+
+Two layers, applied per file by `syntax_chunks(text, language)`:
+
+1. Syntax segments. Python files are cut at top-level function and class
+   definitions (AST spans, decorators and the comment block above included);
+   C-like languages at top-level brace blocks, found by a scanner that skips
+   strings and comments. A definition that fits CHUNK_TOKEN_LIMIT is one
+   chunk; an oversized class is split into its members. Chunks record the
+   symbol they belong to ("Class.method") and their line span, so retrieval
+   can point at a precise, small context.
+
+2. Content-defined boundaries, for everything else: code between
+   definitions, definitions still too large, other languages and files that
+   do not parse. Cutting wherever a running word budget runs out ties every
+   boundary to all the text before it, so one inserted line would shift
+   every later chunk and, with content-addressed IDs (vs.make_chunk_id),
+   re-embed the whole file. Here a boundary is a property of nearby lines:
+
+     - each line is hashed with surrounding whitespace stripped
+       (re-indenting does not move boundaries)
+     - a Rabin-Karp hash rolls over the last CDC_WINDOW line hashes, and a
+       chunk may end after a line whose window hash is 0 mod avg_lines
+     - chunks are at least min_tokens, and are cut before max_tokens
+       regardless of the hash; a single line over max_tokens (minified
+       bundles, data blobs) is split inside the line
+     - `overlap_lines` repeats the tail of the previous piece at the start
+       of the next one, as far as max_tokens allows; it never influences
+       where boundaries fall
+
+Sizes are token counts from app.core.tokens, taken per line (cached: most
+lines repeat) and summed over the lines of a chunk.
+"""
+import ast
+import io
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.tokens import count_tokens_many, token_counter
+
+CDC_WINDOW = 3                   # lines in the rolling hash window
+_BASE = 1_000_003
+_MOD = (1 << 61) - 1
+_BASE_OUT = pow(_BASE, CDC_WINDOW, _MOD)   # weight of the line leaving the window
+
+BRACE_LANGUAGES = {"javascript", "typescript", "java", "go", "c", "cpp"}
+
+# (start, end, symbol, is_def): 0-based line range, end exclusive; gaps have is_def False
+Segment = Tuple[int, int, Optional[str], bool]
+
+
+class Chunk:
+    """One chunk of a file: its text, 1-based inclusive line span and enclosing symbol."""
+
+    __slots__ = ("text", "start_line", "end_line", "symbol")
+
+    def __init__(self, text: str, start_line: int, end_line: int, symbol: Optional[str] = None):
+        self.text = text
+        self.start_line = start_line
+        self.end_line = end_line
+        self.symbol = symbol
+
+    def metadata(self) -> Dict[str, Any]:
+        """Vector-store metadata fields (chromadb rejects None, so no symbol = no key)."""
+        meta: Dict[str, Any] = {"start_line": self.start_line, "end_line": self.end_line}
+        if self.symbol:
+            meta["symbol"] = self.symbol
+        return meta
+
+
+# ── Content-defined boundaries ────────────────────────────────────────────────
+
+def _cdc_spans(lines: List[str], counts: List[int], max_tokens: int, min_tokens: int,
+               avg_lines: int) -> List[Tuple[int, int]]:
+    spans = []
+    start, size, h = 0, 0, 0
+    window: List[int] = []
+    for i, (line, n) in enumerate(zip(lines, counts)):
+        if size + n > max_tokens and i > start:
+            spans.append((start, i))           # hard cut: the next line would overflow
+            start, size = i, 0
+        line_hash = zlib.crc32(line.strip().encode("utf-8", "surrogatepass"))
+        window.append(line_hash)
+        h = (h * _BASE + line_hash) % _MOD
+        if len(window) > CDC_WINDOW:
+            h = (h - window.pop(0) * _BASE_OUT) % _MOD
+        size += n
+        if size >= min_tokens and h % avg_lines == 0:
+            spans.append((start, i + 1))
+            start, size = i + 1, 0
+    if start < len(lines):
+        spans.append((start, len(lines)))
+    return spans
+
+
+def content_defined_chunks(
+    text: str,
+    max_tokens: int = settings.CHUNK_TOKEN_LIMIT,
+    min_tokens: Optional[int] = None,
+    avg_lines: int = settings.CHUNK_AVG_LINES,
+    overlap_lines: int = settings.CHUNK_OVERLAP_LINES,
+) -> List[str]:
+    """Split text at content-defined line boundaries (see module docstring)."""
+    lines = _Lines(text)
+    spans = _cdc_spans(lines, lines.counts, max_tokens, _min_tokens(max_tokens, min_tokens), avg_lines)
+    chunks = []
+    for start, end in spans:
+        if end - start == 1 and lines.counts[start] > max_tokens:
+            chunks.extend(token_counter.split(lines[start], max_tokens))
+            continue
+        head = _overlap_head(lines, start, end, overlap_lines if chunks else 0, max_tokens)
+        chunks.append("".join(lines[head:end]))
+    return chunks or [text]
+
+
+def _overlap_head(lines: "_Lines", start: int, end: int, overlap_lines: int, max_tokens: int) -> int:
+    """First line of a chunk with up to overlap_lines of context, still within max_tokens."""
+    head = max(0, start - overlap_lines)
+    while head < start and _tokens(lines, head, end) > max_tokens:
+        head += 1
+    return head
+
+
+def _min_tokens(max_tokens: int, min_tokens: Optional[int]) -> int:
+    return min_tokens if min_tokens is not None else max_tokens // 4
+
+
+# ── Python segments ───────────────────────────────────────────────────────────
+
+_DEFS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+def _python_segments(text: str, lines: List[str], max_tokens: int) -> Optional[List[Segment]]:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    return _py_body(tree.body, 0, len(lines), None, lines, max_tokens)
+
+
+def _py_body(nodes, lo: int, hi: int, owner: Optional[str], lines: List[str], max_tokens: int) -> List[Segment]:
+    segments: List[Segment] = []
+    cursor = lo
+    for node in nodes:
+        if not isinstance(node, _DEFS):
+            continue
+        start = min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1
+        while start > cursor and lines[start - 1].lstrip().startswith("#"):
+            start -= 1                         # the comment block right above belongs to the def
+        end = node.end_lineno
+        if start > cursor:
+            segments.append((cursor, start, owner, False))
+        name = f"{owner}.{node.name}" if owner else node.name
+        if isinstance(node, ast.ClassDef) and _tokens(lines, start, end) > max_tokens:
+            segments.extend(_py_body(node.body, start, end, name, lines, max_tokens))
+        else:
+            segments.append((start, end, name, True))
+        cursor = end
+    if cursor < hi:
+        segments.append((cursor, hi, owner, False))
+    return segments
+
+
+# ── Brace-language segments ───────────────────────────────────────────────────
+
+_CONTAINER = re.compile(r"\b(?:class|interface|enum|struct|union|namespace|trait|record)\s+([A-Za-z_$][\w$]*)")
+_SYMBOL_PATTERNS = (
+    _CONTAINER,
+    re.compile(r"\bfunction\s*\*?\s*([A-Za-z_$][\w$]*)"),
+    re.compile(r"\bfunc\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)"),
+    re.compile(r"\btype\s+([A-Za-z_]\w*)"),
+    re.compile(r"\b(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*[:=]"),
+    re.compile(r"([A-Za-z_$~][\w$:~]*)\s*\([^;{]*\)[^;{]*$"),
+)
+_NOT_SYMBOLS = {"if", "for", "while", "switch", "catch", "return", "with", "else", "do", "try"}
+# only the characters that change scanner state; escapes are consumed whole
+_BRACE_TOKENS = re.compile(r"//|/\*|\*/|\\.|[\"'`{}]")
+_QUOTES = ("\"", "'", "`")
+
+
+def _brace_blocks(lines: List[str], lo: int, hi: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Multi-line top-level `{...}` blocks of lines[lo:hi] as (open_line, end),
+    end being the line after the closing brace. Blocks that close on the line
+    they open (`import { a } from "b"`) are plain statements. None when the
+    braces do not balance.
+    """
+    blocks = []
+    depth = 0
+    open_line = 0
+    in_block_comment = False
+    quote = ""
+    for i in range(lo, hi):
+        for m in _BRACE_TOKENS.finditer(lines[i]):
+            tok = m.group()
+            if in_block_comment:
+                in_block_comment = tok != "*/"
+            elif quote:
+                if tok == quote:
+                    quote = ""
+            elif tok == "//":
+                break
+            elif tok == "/*":
+                in_block_comment = True
+            elif tok in _QUOTES:
+                quote = tok
+            elif tok == "{":
+                if depth == 0:
+                    open_line = i
+                depth += 1
+            elif tok == "}":
+                depth -= 1
+                if depth < 0:
+                    return None
+                if depth == 0 and i > open_line:
+                    blocks.append((open_line, i + 1))
+        if quote and quote != "`":
+            quote = ""                          # unterminated '/" literal: don't leak past the line
+    return blocks if depth == 0 and not quote else None
+
+
+_CONTINUES = (",", "(", "=", "=>", "&&", "||", "+", ":", "?", "extends", "implements")
+_COMMENT_LINE = ("//", "/*", "*")
+
+
+def _header_start(lines: List[str], open_line: int, floor: int) -> int:
+    """First line of the declaration whose body opens on open_line (signature, annotations, doc comment)."""
+    start = open_line
+    while start > floor:
+        here, above = lines[start].strip(), lines[start - 1].strip()
+        if not above:
+            break
+        if here.startswith(("{", ")", ".", ":", "?", "&&", "||", "->")) or above.endswith(_CONTINUES) \
+                or above.startswith("@"):
+            start -= 1
+        else:
+            break
+    while start > floor and lines[start - 1].strip().startswith(_COMMENT_LINE):
+        start -= 1                              # the comment block right above belongs to the def
+    return start
+
+
+def _brace_symbol(header: str) -> Optional[str]:
+    for pattern in _SYMBOL_PATTERNS:
+        for name in pattern.findall(header):
+            if name not in _NOT_SYMBOLS:
+                return name
+    return None
+
+
+def _brace_segments(lines: List[str], lo: int, hi: int, owner: Optional[str], max_tokens: int) -> Optional[List[Segment]]:
+    blocks = _brace_blocks(lines, lo, hi)
+    if blocks is None:
+        return None
+    segments: List[Segment] = []
+    cursor = lo
+    for open_line, end in blocks:
+        if open_line < cursor:
+            # opens on the line the previous block closed on (`} else {`, `}, {`): same unit
+            segments.append((cursor, end, segments[-1][2], True))
+            cursor = end
+            continue
+        start = _header_start(lines, open_line, cursor)
+        header = "".join(lines[start:open_line + 1])
+        header = header[:header.rfind("{")] if "{" in header else header
+        name = _brace_symbol(header)
+        qualified = f"{owner}.{name}" if owner and name else name or owner
+        if start > cursor:
+            segments.append((cursor, start, owner, False))
+        inner = None
+        if _CONTAINER.search(header) and end - open_line > 2 and _tokens(lines, start, end) > max_tokens:
+            inner = _brace_segments(lines, open_line + 1, end - 1, qualified, max_tokens)
+        if inner is not None:
+            segments.append((start, open_line + 1, qualified, False))
+            segments.extend(inner)
+            segments.append((end - 1, end, qualified, False))
+        else:
+            segments.append((start, end, qualified, True))
+        cursor = end
+    if cursor < hi:
+        segments.append((cursor, hi, owner, False))
+    return segments
+
+
+# ── Syntax-aware chunking ─────────────────────────────────────────────────────
+
+class _Lines(list):
+    """
+    A file's lines with per-line token counts and their prefix sums, so
+    segment sizes are O(1). Lines end at \n, \r\n or \r only, as `ast`
+    numbers them (str.splitlines also breaks at \f, \x1c-\x1e, \x85, \u2028...).
+    """
+
+    def __init__(self, text: str):
+        super().__init__(io.StringIO(text, newline="").readlines())
+        self.counts = count_tokens_many(self)
+        self.prefix = [0]
+        for n in self.counts:
+            self.prefix.append(self.prefix[-1] + n)
+
+
+def _tokens(lines: _Lines, start: int, end: int) -> int:
+    return lines.prefix[end] - lines.prefix[start]
+
+
+def _blank(lines: List[str], start: int, end: int) -> bool:
+    return not any(line.strip() for line in lines[start:end])
+
+
+def _merge_small(segments: List[Segment], lines: List[str], min_tokens: int, max_tokens: int) -> List[Segment]:
+    """
+    Fold blank-line segments into their neighbour, and small gaps (a section
+    comment, a constant) into the definition that follows when it still fits.
+    """
+    merged: List[Segment] = []
+    carry: Optional[Tuple[int, Optional[str]]] = None    # a gap waiting to join the next segment
+    for start, end, symbol, is_def in segments:
+        if start >= end:
+            continue
+        if carry is not None:
+            if _tokens(lines, carry[0], end) <= max_tokens:
+                start = carry[0]
+            else:
+                merged.append((carry[0], start, carry[1], False))
+            carry = None
+        if _blank(lines, start, end) and merged:
+            prev = merged[-1]
+            merged[-1] = (prev[0], end, prev[2], prev[3])
+        elif not is_def and _tokens(lines, start, end) < min_tokens:
+            carry = (start, symbol)
+        else:
+            merged.append((start, end, symbol, is_def))
+    if carry is not None:
+        if merged:
+            prev = merged[-1]
+            merged[-1] = (prev[0], len(lines), prev[2], prev[3])
+        else:
+            merged.append((carry[0], len(lines), carry[1], False))
+    return merged
+
+
+def syntax_chunks(
+    text: str,
+    language: str,
+    max_tokens: int = settings.CHUNK_TOKEN_LIMIT,
+    overlap_lines: int = settings.CHUNK_OVERLAP_LINES,
+) -> List[Chunk]:
+    """Chunk a file along definitions where the language allows it (see module docstring)."""
+    lines = _Lines(text)
+    if not lines:
+        return [Chunk(text, 1, 1)]
+    min_tokens = _min_tokens(max_tokens, None)
+
+    segments: Optional[List[Segment]] = None
+    if language == "python":
+        segments = _python_segments(text, lines, max_tokens)
+    elif language in BRACE_LANGUAGES:
+        segments = _brace_segments(lines, 0, len(lines), None, max_tokens)
+    if segments is None:
+        segments = [(0, len(lines), None, False)]
+
+    chunks: List[Chunk] = []
+    for start, end, symbol, is_def in _merge_small(segments, lines, min_tokens, max_tokens):
+        if is_def and _tokens(lines, start, end) <= max_tokens:
+            chunks.append(Chunk("".join(lines[start:end]), start + 1, end, symbol))
+            continue
+        spans = _cdc_spans(lines[start:end], lines.counts[start:end], max_tokens, min_tokens, settings.CHUNK_AVG_LINES)
+        for k, (a, b) in enumerate(spans):
+            a, b = start + a, start + b
+            if b - a == 1 and lines.counts[a] > max_tokens:
+                # one line over the limit (minified code): split inside the line
+                chunks.extend(Chunk(piece, b, b, symbol) for piece in token_counter.split(lines[a], max_tokens))
+                continue
+            if k and _blank(lines, a, b) and _tokens(lines, chunks[-1].start_line - 1, b) <= max_tokens:
+                prev = chunks[-1]               # whitespace-only tail: extend the previous piece
+                chunks[-1] = Chunk(prev.text + "".join(lines[a:b]), prev.start_line, b, symbol)
+                continue
+            head = _overlap_head(lines, a, b, overlap_lines if k else 0, max_tokens)
+            chunks.append(Chunk("".join(lines[head:b]), head + 1, b, symbol))
+    return chunks
@@ -0,0 +1,133 @@
+"""
+Librarian Clone — how remote sources become (and stay) local clones.
+
+Strategies (settings.LIBRARIAN_CLONE_STRATEGY, overridable per request):
+  - shallow   depth=1 of the requested branch (default)
+  - blobless  --filter=blob:none: every commit and tree, file contents only
+              when something reads them. Checkout downloads just the blobs
+              of checked-out paths, history needs no unshallow, and ref
+              scans hydrate only the files they keep (GitTree.hydrate).
+  - full      plain clone
+
+Sparse checkout: `sparse_paths` (cone-mode directories) limits the worktree
+to part of a monorepo; combined with blobless it also limits the download.
+git keeps the pattern set in the clone, so later pulls and ref scans honour
+it; pass [] to return to a full worktree.
+
+Any git URL is a remote source, file:// included (e.g. a local bare repo).
+Callers hold the repo's write lock (app.core.repo_locks).
+"""
+import os
+import posixpath
+from typing import Callable, List, Optional
+
+from git import Repo
+
+from app.core.config import settings
+
+REMOTE_PREFIXES = ("http", "file://", "ssh://", "git@")
+STRATEGIES = ("shallow", "blobless", "full")
+
+
+def is_remote(source: str) -> bool:
+    return source.startswith(REMOTE_PREFIXES)
+
+
+def clone_name(url: str) -> str:
+    return url.rstrip("/").split("/")[-1].replace(".git", "")
+
+
+def clone_dir(url: str) -> str:
+    return os.path.join(settings.REPO_STORAGE_PATH, clone_name(url))
+
+
+def resolve_strategy(strategy: Optional[str]) -> str:
+    strategy = strategy or settings.LIBRARIAN_CLONE_STRATEGY
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown clone strategy '{strategy}' (expected one of {', '.join(STRATEGIES)})")
+    return strategy
+
+
+def is_shallow(repo_path: str) -> bool:
+    return os.path.exists(os.path.join(repo_path, ".git", "shallow"))
+
+
+# ── Clone / update ────────────────────────────────────────────────────────────
+
+def clone_or_update(
+    url: str,
+    target: str,
+    branch: str,
+    strategy: Optional[str] = None,
+    sparse_paths: Optional[List[str]] = None,
+):
+    """
+    Clone `url` into target (or fetch into an existing clone) and check out
+    `branch`. `strategy` only applies to new clones: an existing clone keeps
+    the one it was made with.
+    """
+    strategy = resolve_strategy(strategy)
+    if os.path.isdir(target):
+        repo = Repo(target)
+        # shallow clones track a single branch: fetch the requested one explicitly
+        depth = {"depth": 1} if is_shallow(target) else {}
+        repo.remotes.origin.fetch(f"+refs/heads/{branch}:refs/remotes/origin/{branch}", **depth)
+    else:
+        options = {"depth": 1} if strategy == "shallow" else {"filter": "blob:none"} if strategy == "blobless" else {}
+        print(f"[Librarian:Clone] Cloning {clone_name(url)}@{branch} ({strategy})...")
+        repo = Repo.clone_from(url, target, branch=branch, no_checkout=True, **options)
+
+    if sparse_paths is not None:
+        set_sparse(repo, sparse_paths)
+    repo.git.checkout("-B", branch, f"origin/{branch}")
+
+
+def set_sparse(repo: Repo, sparse_paths: List[str]):
+    """Cone-mode sparse checkout of these directories ([] = full worktree)."""
+    dirs = [p.strip("/") for p in sparse_paths if p.strip("/")]
+    if dirs:
+        repo.git.sparse_checkout("set", "--cone", *dirs)
+        print(f"[Librarian:Clone] sparse checkout: {', '.join(dirs)}")
+    else:
+        repo.git.sparse_checkout("disable")
+
+
+def sparse_dirs(repo_path: str) -> Optional[List[str]]:
+    """Cone directories of the clone's sparse checkout, None when it is off."""
+    try:
+        repo = Repo(repo_path)
+        if repo.git.config("--bool", "--default", "false", "core.sparseCheckout") != "true":
+            return None
+        return [line.strip("/") for line in repo.git.sparse_checkout("list").splitlines() if line.strip()]
+    except Exception:
+        return None
+
+
+def sparse_matcher(repo_path: str) -> Optional[Callable[[str], bool]]:
+    """Predicate on rel_path mirroring what a cone checkout of the clone contains."""
+    dirs = sparse_dirs(repo_path)
+    if dirs is None:
+        return None
+    prefixes = tuple(f"{d}/" for d in dirs)
+    # cone mode also keeps the files directly inside every ancestor of a cone dir
+    ancestors = {posixpath.dirname(d) for d in dirs}
+    for d in list(ancestors):
+        while d:
+            d = posixpath.dirname(d)
+            ancestors.add(d)
+
+    def included(rel_path: str) -> bool:
+        return rel_path.startswith(prefixes) or posixpath.dirname(rel_path) in ancestors
+    return included
+
+
+def deepen_history(repo: Repo):
+    """
+    Unshallow without downloading old file contents: the clone becomes a
+    blobless partial clone, so only commits and trees come over the wire.
+    Servers without filter support just send everything.
+    """
+    with repo.config_writer() as config:
+        config.set_value('remote "origin"', "promisor", "true")
+        config.set_value('remote "origin"', "partialclonefilter", "blob:none")
+    repo.git.fetch("--unshallow", "--filter=blob:none", "origin")
@@ -0,0 +1,153 @@
+"""
+Dependency Index — persisted import adjacency for incremental graph updates.
+
+Stored next to the graph cache as `deps.json` (graph_store slot):
+  - specs     : raw import specifiers per file (what the source says)
+  - imports   : forward adjacency (file -> resolved in-repo targets)
+  - importers : reverse adjacency (target -> files importing it)
+  - doc_stats : [functions, documented] per Python file
+
+On a delta only the changed files are re-parsed. Their outgoing edges are
+rebuilt, and only the importers that can see an added or removed module are
+re-resolved from their stored specs.
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Set
+
+from .extractors import IndexSet
+
+DEPS_VERSION = 3
+
+
+def _dotted_suffixes(name: str) -> Iterable[str]:
+    """'a.b.c' -> 'a.b.c', 'b.c', 'c'."""
+    yield name
+    pos = name.find(".")
+    while pos != -1:
+        yield name[pos + 1:]
+        pos = name.find(".", pos + 1)
+
+
+class DependencyIndex:
+    """Forward + reverse import adjacency with the raw specs behind each edge."""
+
+    def __init__(
+        self,
+        specs: Optional[Dict[str, List[str]]] = None,
+        imports: Optional[Dict[str, List[str]]] = None,
+        doc_stats: Optional[Dict[str, List[int]]] = None,
+    ):
+        self.specs: Dict[str, List[str]] = specs or {}
+        self.imports: Dict[str, List[str]] = imports or {}
+        self.doc_stats: Dict[str, List[int]] = doc_stats or {}
+        self.importers: Dict[str, List[str]] = {}
+        for src, targets in self.imports.items():
+            for target in targets:
+                self.importers.setdefault(target, []).append(src)
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    @classmethod
+    def load(cls, path: str) -> Optional["DependencyIndex"]:
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if data.get("version") != DEPS_VERSION:
+            return None
+        index = cls(data.get("specs"), data.get("imports"), data.get("doc_stats"))
+        index.importers = data.get("importers", index.importers)
+        return index
+
+    def save(self, path: str):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": DEPS_VERSION,
+                "specs": self.specs,
+                "imports": self.imports,
+                "importers": self.importers,
+                "doc_stats": self.doc_stats,
+            }, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    # ── Mutation ──────────────────────────────────────────────────────────────
+
+    def set_targets(self, src: str, targets: List[str]):
+        """Replace src's outgoing edges, keeping the reverse index in step."""
+        for old in self.imports.get(src, []):
+            importers = self.importers.get(old)
+            if importers and src in importers:
+                importers.remove(src)
+                if not importers:
+                    del self.importers[old]
+        if targets:
+            self.imports[src] = targets
+            for target in targets:
+                self.importers.setdefault(target, []).append(src)
+        else:
+            self.imports.pop(src, None)
+
+    def remove_file(self, rel_path: str):
+        self.set_targets(rel_path, [])
+        self.specs.pop(rel_path, None)
+        self.doc_stats.pop(rel_path, None)
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    def importers_of(self, rel_path: str) -> Set[str]:
+        return set(self.importers.get(rel_path, []))
+
+    def affected_by_python_modules(self, module_keys: Iterable[str]) -> Set[str]:
+        """
+        Python files holding a spec that could resolve to any of `module_keys`
+        (exact / `.__init__` / either side a dotted suffix of the other).
+        """
+        exact: Dict[str, Set[str]] = {}
+        by_suffix: Dict[str, Set[str]] = {}
+        for src, specs in self.specs.items():
+            if not src.endswith(".py"):
+                continue
+            for spec in specs:
+                exact.setdefault(spec, set()).add(src)
+                for suffix in _dotted_suffixes(spec):
+                    by_suffix.setdefault(suffix, set()).add(src)
+
+        affected: Set[str] = set()
+        for key in module_keys:
+            affected |= by_suffix.get(key, set())          # spec ends with .key
+            base = key[:-len(".__init__")] if key.endswith(".__init__") else key
+            for suffix in _dotted_suffixes(base):
+                affected |= exact.get(suffix, set())       # key ends with .spec
+            for suffix in _dotted_suffixes(key):
+                affected |= exact.get(suffix, set())
+        return affected
+
+    def affected_by_paths(self, added: Iterable[str], indexes: IndexSet) -> Set[str]:
+        """Non-Python files holding a spec whose candidate paths an added file now satisfies."""
+        added = list(added)
+        if not added:
+            return set()
+        keys: Dict[int, Set[str]] = {}
+        affected: Set[str] = set()
+        for src, specs in self.specs.items():
+            if src.endswith(".py"):
+                continue
+            index = indexes.for_file(src)
+            if index is None:
+                continue
+            if id(index) not in keys:
+                keys[id(index)] = {k for p in added for k in index.probe_keys(p)}
+            index_keys = keys[id(index)]
+            if any(not index_keys.isdisjoint(index.candidate_bases(src, s)) for s in specs):
+                affected.add(src)
+        return affected
+
+    def documented_ratio(self) -> float:
+        total = sum(t for t, _ in self.doc_stats.values())
+        documented = sum(d for _, d in self.doc_stats.values())
+        return (documented / total) if total > 0 else 0.0
@@ -0,0 +1,185 @@
+"""
+Librarian Extractors — per-language import extraction, keyed by language.
+
+Each extractor makes ONE regex pass over a file. The alternation matches
+comments (and, where they could hide import-like text, strings) so they are
+skipped rather than stripped first, and scanning stops at the first top-level
+declaration in languages whose imports must come before it (Go, Java).
+Raw specs are stored in the DependencyIndex; resolution goes through the
+extractor's path index (see resolvers.py), built once per scan.
+
+Python is not registered here: its imports come from the AST pass in
+analysis.py, which also collects docstring stats, and resolve through
+PythonModuleIndex.
+"""
+import posixpath
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Type
+
+from app.core.file_inventory import language_for
+from .resolvers import (
+    CIncludeIndex, GoPackageIndex, JavaClassIndex, JsModuleIndex, RubyLoadIndex, TreeRoot, js_import_specs,
+)
+
+
+class Extractor:
+    """Language plugin: `extract(text) -> specs` plus the index class that resolves them."""
+
+    languages: tuple = ()
+    index_cls: Type = None
+
+    def extract(self, content: str) -> List[str]:
+        raise NotImplementedError
+
+    def build_index(self, root: TreeRoot, rel_paths: Iterable[str]):
+        return self.index_cls.from_tree(root, rel_paths)
+
+
+class JsImports(Extractor):
+    languages = ("javascript", "typescript")
+    index_cls = JsModuleIndex
+
+    def extract(self, content: str) -> List[str]:
+        return js_import_specs(content)
+
+
+# Go: `import "x"`, `import alias "x"`, `import ( ... )`; stop at the first decl
+_GO_TOKENS = re.compile(
+    r'//[^\n]*|/\*.*?\*/|\bimport\s*\((?P<block>[^)]*)\)|\bimport\s+(?:[\w.]+\s+)?"(?P<one>[^"]+)"'
+    r'|^(?P<stop>func|type|var|const)\b',
+    re.S | re.M,
+)
+_GO_BLOCK_SPEC = re.compile(r'//[^\n]*|"([^"]+)"')
+
+
+class GoImports(Extractor):
+    languages = ("go",)
+    index_cls = GoPackageIndex
+
+    def extract(self, content: str) -> List[str]:
+        specs: List[str] = []
+        for m in _GO_TOKENS.finditer(content):
+            if m.group("stop"):
+                break
+            if m.group("one"):
+                specs.append(m.group("one"))
+            elif m.group("block") is not None:
+                specs.extend(s for s in _GO_BLOCK_SPEC.findall(m.group("block")) if s)
+        return specs
+
+
+# Java: `import [static] a.b.C;` / `import a.b.*;` after `package`; stop at the first type
+_JAVA_TOKENS = re.compile(
+    r'//[^\n]*|/\*.*?\*/|\bimport\s+(?:static\s+)?(?P<spec>[\w.]+(?:\.\*)?)\s*;'
+    r'|\b(?P<stop>class|interface|enum|record)\s+\w',
+    re.S,
+)
+
+
+class JavaImports(Extractor):
+    languages = ("java",)
+    index_cls = JavaClassIndex
+
+    def extract(self, content: str) -> List[str]:
+        specs: List[str] = []
+        for m in _JAVA_TOKENS.finditer(content):
+            if m.group("stop"):
+                break
+            if m.group("spec"):
+                specs.append(m.group("spec"))
+        return specs
+
+
+# Ruby: `require "x"`, `require_relative "x"` (emitted as "./x"), `load "x.rb"`
+_RUBY_TOKENS = re.compile(
+    r'^=begin\b.*?^=end\b|#[^\n]*'
+    r'|\b(?P<kind>require_relative|require|load)\b\s*\(?\s*[\'"](?P<spec>[^\'"\n]+)[\'"]',
+    re.S | re.M,
+)
+
+
+class RubyImports(Extractor):
+    languages = ("ruby",)
+    index_cls = RubyLoadIndex
+
+    def extract(self, content: str) -> List[str]:
+        specs: List[str] = []
+        for m in _RUBY_TOKENS.finditer(content):
+            spec = m.group("spec")
+            if not spec:
+                continue
+            if m.group("kind") == "require_relative" and not spec.startswith("."):
+                spec = "./" + spec
+            specs.append(spec)
+        return specs
+
+
+# C / C++: `#include "x.h"` and `#include <x.h>`, kept with their delimiters
+_C_TOKENS = re.compile(
+    r'/\*.*?\*/|//[^\n]*|^[ \t]*#[ \t]*include[ \t]*(?P<spec>"[^"\n]+"|<[^>\n]+>)',
+    re.S | re.M,
+)
+
+
+class CIncludes(Extractor):
+    languages = ("c", "cpp")
+    index_cls = CIncludeIndex
+
+    def extract(self, content: str) -> List[str]:
+        return [m.group("spec") for m in _C_TOKENS.finditer(content) if m.group("spec")]
+
+
+# ── Registry ──────────────────────────────────────────────────────────────────
+
+EXTRACTORS: Dict[str, Extractor] = {}
+
+
+def register(extractor: Extractor):
+    for language in extractor.languages:
+        EXTRACTORS[language] = extractor
+
+
+for _extractor in (JsImports(), GoImports(), JavaImports(), RubyImports(), CIncludes()):
+    register(_extractor)
+
+
+def extractor_for(rel_path: str) -> Optional[Extractor]:
+    return EXTRACTORS.get(language_for(posixpath.splitext(rel_path)[1]))
+
+
+class IndexSet:
+    """Per-scan path indexes, one per extractor, built on first use."""
+
+    def __init__(self, root: TreeRoot, rel_paths: Iterable[str]):
+        self.root = root
+        self.rel_paths = list(rel_paths)
+        self._indexes: Dict[int, object] = {}
+
+    def for_file(self, rel_path: str):
+        extractor = extractor_for(rel_path)
+        if extractor is None:
+            return None
+        key = id(extractor)
+        if key not in self._indexes:
+            self._indexes[key] = extractor.build_index(self.root, self.rel_paths)
+        return self._indexes[key]
+
+    def resolve(self, src: str, spec: str) -> Optional[str]:
+        index = self.for_file(src)
+        return index.resolve(src, spec) if index is not None else None
+
+    def config_changed(self, paths: Iterable[str]) -> Callable[[str], bool]:
+        """Predicate: does src's language have a config (tsconfig, go.mod) among `paths`?"""
+        paths = list(paths)
+        changed: Dict[int, bool] = {}
+
+        def affected(src: str) -> bool:
+            extractor = extractor_for(src)
+            if extractor is None:
+                return False
+            key = id(extractor)
+            if key not in changed:
+                index = self.for_file(src)
+                changed[key] = any(index.is_config(p) for p in paths)
+            return changed[key]
+        return affected
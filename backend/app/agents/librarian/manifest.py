@@ -0,0 +1,105 @@
+"""
+Scan Manifest — per-file (size, mtime, content hash, last-indexed commit).
+
+Written next to the graph cache after every scan. A rescan stats the tree,
+re-hashes only files whose size or mtime moved, and gets back the exact
+added / modified / deleted set. That covers multi-commit pulls, uncommitted
+edits and deletions, which a `git diff HEAD~1` cannot see.
+"""
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from app.core.file_inventory import file_digest
+
+MANIFEST_VERSION = 1
+
+# rel_path -> (full_path, size, mtime_ns)
+TreeStat = Dict[str, Tuple[str, int, int]]
+
+
+class ManifestDelta:
+    """Result of comparing the live tree against a manifest."""
+
+    def __init__(self):
+        self.added: List[str] = []
+        self.modified: List[str] = []
+        self.deleted: List[str] = []
+        self.touched: List[str] = []      # stat moved but content hash did not
+        self.unchanged: int = 0
+        self.hashes: Dict[str, str] = {}  # digests computed during the diff
+
+    @property
+    def changed(self) -> List[str]:
+        return self.added + self.modified
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.modified or self.deleted)
+
+
+class ScanManifest:
+    """Per-project file state, keyed by path relative to the project root."""
+
+    def __init__(self, commit: Optional[str] = None, files: Optional[Dict[str, dict]] = None):
+        self.commit = commit
+        self.files: Dict[str, dict] = files or {}
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ScanManifest"]:
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        return cls(commit=data.get("commit"), files=data.get("files", {}))
+
+    def save(self, path: str):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "commit": self.commit, "files": self.files},
+                      f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    # ── State ─────────────────────────────────────────────────────────────────
+
+    def record(self, rel_path: str, size: int, mtime_ns: int, sha1: str, commit: Optional[str] = None):
+        self.files[rel_path] = {"size": size, "mtime_ns": mtime_ns, "sha1": sha1, "commit": commit}
+
+    def diff(self, tree: TreeStat) -> ManifestDelta:
+        """Stat-first comparison; only files whose size/mtime moved get hashed."""
+        delta = ManifestDelta()
+        for rel_path, (full_path, size, mtime_ns) in tree.items():
+            entry = self.files.get(rel_path)
+            if entry and entry["size"] == size and entry["mtime_ns"] == mtime_ns:
+                delta.unchanged += 1
+                continue
+            digest = file_digest(full_path)
+            delta.hashes[rel_path] = digest
+            if entry is None:
+                delta.added.append(rel_path)
+            elif entry["sha1"] != digest:
+                delta.modified.append(rel_path)
+            else:
+                delta.touched.append(rel_path)
+        delta.deleted = [p for p in self.files if p not in tree]
+        return delta
+
+    def apply(self, delta: ManifestDelta, tree: TreeStat, commit: Optional[str] = None):
+        """Fold a processed delta back in; `commit` is stamped on re-indexed files."""
+        for rel_path in delta.changed:
+            _, size, mtime_ns = tree[rel_path]
+            self.record(rel_path, size, mtime_ns, delta.hashes[rel_path], commit)
+        for rel_path in delta.touched:
+            _, size, mtime_ns = tree[rel_path]
+            self.files[rel_path].update(size=size, mtime_ns=mtime_ns)
+        for rel_path in delta.deleted:
+            self.files.pop(rel_path, None)
+        if commit:
+            self.commit = commit
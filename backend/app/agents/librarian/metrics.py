@@ -0,0 +1,224 @@
+"""
+Scan Metrics — progress and per-stage timing for every Librarian scan.
+
+A ScanRecord follows one scan from the foreground graph build through its
+background jobs. Each stage gets its wall time, its CPU time and the number of
+files it handled. CPU time is thread CPU of the stage's thread, plus whatever
+its helper threads and pool workers report through add_cpu (a worker measures
+its own CPU per item). Finished records are appended
+to storage/scan_metrics.jsonl so scan performance can be compared across runs.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+
+# Share of a full scan's progress bar per stage
+FULL_SCAN_STAGES = OrderedDict([
+    ("walk", 5), ("parse", 15), ("embed", 60), ("cache_save", 5), ("arch_map", 5), ("doc_gen", 10),
+])
+INCREMENTAL_STAGES = OrderedDict([
+    ("diff", 10), ("reindex", 60), ("resolve", 20), ("cache_save", 10),
+])
+REF_SCAN_STAGES = OrderedDict([
+    ("walk", 20), ("parse", 70), ("cache_save", 10),
+])
+_STAGES = {"full": FULL_SCAN_STAGES, "incremental": INCREMENTAL_STAGES, "ref": REF_SCAN_STAGES}
+
+_TERMINAL = ("done", "failed", "cancelled", "coalesced")
+_RECENT_LIMIT = 200
+
+
+class ScanRecord:
+    def __init__(self, project: str, branch: str, kind: str, parts: Iterable[str] = ()):
+        self.id = uuid.uuid4().hex[:12]
+        self.project = project
+        self.branch = branch
+        self.kind = kind                  # "full" | "incremental" | "ref"
+        self.state = "scanning"           # scanning | queued | running | done | failed | cancelled | coalesced
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.files_total = 0
+        self.jobs: Dict[str, str] = {}    # background part -> scheduler job id
+        self.stages: Dict[str, Dict[str, Any]] = OrderedDict()
+        self._weights = _STAGES.get(kind, INCREMENTAL_STAGES)
+        self._parts: Dict[str, Optional[str]] = {p: None for p in parts}
+        self._lock = threading.Lock()
+        self._on_finish = None
+
+    # ── Stage timing ──────────────────────────────────────────────────────────
+
+    @contextmanager
+    def stage(self, name: str, files: int = 0):
+        """Time a stage on the calling thread; `files` may be updated via progress()."""
+        entry = {"state": "running", "wall_s": 0.0, "cpu_s": 0.0, "files": files, "files_done": 0}
+        with self._lock:
+            self.stages[name] = entry
+        wall0, cpu0 = time.perf_counter(), time.thread_time()
+        try:
+            yield entry
+            entry["state"] = "done"
+        except BaseException:
+            entry["state"] = "failed"
+            raise
+        finally:
+            entry["wall_s"] = round(time.perf_counter() - wall0, 4)
+            entry["cpu_s"] = round(entry["cpu_s"] + time.thread_time() - cpu0, 4)
+            if entry["state"] == "done" and not entry["files_done"]:
+                entry["files_done"] = entry["files"]
+
+    def progress(self, name: str, files_done: int):
+        entry = self.stages.get(name)
+        if entry is not None:
+            entry["files_done"] = files_done
+
+    def add_cpu(self, name: str, seconds: float):
+        """CPU burned outside the stage's thread (pipeline reader/chunker, parse pool workers)."""
+        entry = self.stages.get(name)
+        if entry is not None:
+            entry["cpu_s"] += seconds
+
+    # ── Derived views ─────────────────────────────────────────────────────────
+
+    @property
+    def percent_complete(self) -> float:
+        if self.state in _TERMINAL:
+            return 100.0 if self.state == "done" else self._partial()
+        return self._partial()
+
+    def _partial(self) -> float:
+        total = sum(self._weights.values())
+        done = 0.0
+        for name, weight in self._weights.items():
+            entry = self.stages.get(name)
+            if entry is None:
+                continue
+            if entry["state"] == "done":
+                done += weight
+            elif entry["files"]:
+                done += weight * min(1.0, entry["files_done"] / entry["files"])
+        return round(100.0 * done / total, 1)
+
+    @property
+    def files_per_sec(self) -> Dict[str, float]:
+        out = {}
+        for name, entry in self.stages.items():
+            elapsed = entry["wall_s"] if entry["state"] != "running" else None
+            if elapsed and entry["files_done"]:
+                out[name] = round(entry["files_done"] / elapsed, 1)
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "project": self.project,
+            "branch": self.branch,
+            "kind": self.kind,
+            "state": self.state,
+            "percent_complete": self.percent_complete,
+            "files_total": self.files_total,
+            "files_per_sec": self.files_per_sec,
+            "elapsed_seconds": round(end - self.started_at, 3),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "stages": {k: dict(v) for k, v in self.stages.items()},
+            "jobs": dict(self.jobs),
+            "error": self.error,
+        }
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def part_done(self, part: str, state: str, error: Optional[str] = None):
+        """A background part finished (or was dropped); finishes the scan after the last one."""
+        with self._lock:
+            self._parts[part] = state
+            if error and not self.error:
+                self.error = error
+            if any(s is None for s in self._parts.values()):
+                return
+            states = set(self._parts.values())
+        for final in ("failed", "cancelled", "coalesced"):
+            if final in states:
+                break
+        else:
+            final = "done"
+        self.finish(final)
+
+    def finish(self, state: str = "done", error: Optional[str] = None):
+        with self._lock:
+            if self.finished_at is not None:
+                return
+            self.state = state
+            self.error = error or self.error
+            self.finished_at = time.time()
+        if self._on_finish:
+            self._on_finish(self)
+
+
+class ScanMetricsStore:
+    """In-memory index of recent scans + an append-only JSONL history on disk."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._recent: "OrderedDict[str, ScanRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, project: str, branch: str, kind: str, parts: Iterable[str] = ()) -> ScanRecord:
+        record = ScanRecord(project, branch, kind, parts)
+        record._on_finish = self._persist
+        with self._lock:
+            self._recent[record.id] = record
+            while len(self._recent) > _RECENT_LIMIT:
+                self._recent.popitem(last=False)
+        return record
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._recent.get(job_id)
+        if record is not None:
+            return record.to_dict()
+        for row in self.history():
+            if row.get("job_id") == job_id:
+                return row
+        return None
+
+    def recent(self, project: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            records = list(self._recent.values())
+        return [r.to_dict() for r in reversed(records) if project is None or r.project == project]
+
+    def history(self, project: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Persisted finished scans, oldest first."""
+        if not os.path.isfile(self.path):
+            return []
+        rows = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if project is None or row.get("project") == project:
+                    rows.append(row)
+        return rows[-limit:] if limit else rows
+
+    def _persist(self, record: ScanRecord):
+        line = json.dumps(record.to_dict(), separators=(",", ":"), default=str)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"[Librarian:Metrics] could not persist scan {record.id}: {e}")
+
+
+# Singleton — shared by LibrarianService and the /jobs endpoints
+scan_metrics = ScanMetricsStore(settings.SCAN_METRICS_PATH)
@@ -5,6 +5,14 @@ class ProcessRequest(BaseModel):
     input_source: str
     branch: str = "main"
     force: bool = False
+    clone_strategy: Optional[str] = None       # "shallow" | "blobless" | "full" (new clones only)
+    sparse_paths: Optional[List[str]] = None   # cone-mode dirs to check out; [] = whole repo
+
+class RefScanRequest(BaseModel):
+    """Graph of one branch / tag / commit, read from the git object database."""
+    input_source: str              # local path or remote URL (already cloned)
+    ref: str                       # branch, tag, remote ref or commit sha
+    force: bool = False
 
 class FileNode(BaseModel):
     id: str            # relative path
@@ -27,6 +35,8 @@ class GraphResponse(BaseModel):
     processed_at: Optional[str] = None
     total_files: int
     total_chunks_embedded: Optional[int] = None
+    peak_inflight_bytes: Optional[int] = None   # embed pipeline memory high-water
+    job_id: Optional[str] = None                # poll GET /librarian/jobs/{job_id}
     documented_ratio: float
     from_cache: bool = False
 
@@ -57,13 +67,15 @@ class IncrementalUpdateRequest(BaseModel):
 
 class IncrementalUpdateResult(BaseModel):
     """Result returned after a delta re-index run."""
-    changed_files: List[str]       # files re-processed
+    changed_files: List[str]       # files re-processed (added + modified)
+    deleted_files: List[str] = []  # files dropped from the graph and vector store
     skipped_files: int             # unchanged files that were skipped
     total_files: int               # total file count in the project
     update_time_seconds: float     # benchmark — how long this took
     full_scan_baseline_seconds: float  # estimated baseline for comparison
     graph_updated: bool            # whether the graph cache was refreshed
     message: str                   # human-readable summary
+    job_id: Optional[str] = None   # scan metrics record (GET /librarian/jobs/{job_id})
 
 class DocumentationRequest(BaseModel):
     project_name: str
@@ -79,4 +91,29 @@ class SonarScanRequest(BaseModel):
 class SonarScanResponse(BaseModel):
     status: str
     project_metrics: Optional[dict] = None
-    message: str
\ No newline at end of file
+    message: str
+
+class StageTiming(BaseModel):
+    """Wall/CPU time of one scan stage (walk, parse, embed, cache_save, …)."""
+    state: str                     # running | done | failed
+    wall_s: float
+    cpu_s: float                   # thread CPU (+ helper threads / pool workers)
+    files: int = 0
+    files_done: int = 0
+
+class ScanJobStatus(BaseModel):
+    """Progress + timing of one full or incremental scan."""
+    job_id: str
+    project: str
+    branch: str
+    kind: str                      # "full" | "incremental"
+    state: str                     # scanning | queued | running | done | failed | cancelled | coalesced
+    percent_complete: float
+    files_total: int
+    files_per_sec: Dict[str, float] = {}
+    elapsed_seconds: float
+    started_at: float
+    finished_at: Optional[float] = None
+    stages: Dict[str, StageTiming] = {}
+    jobs: Dict[str, str] = {}      # background part -> scheduler job id
+    error: Optional[str] = None
\ No newline at end of file
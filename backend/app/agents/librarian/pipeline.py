@@ -0,0 +1,212 @@
+"""
+Librarian Embed Pipeline — bounded-memory streaming read → chunk → embed.
+
+The graph build only keeps paths. Background embedding re-reads each file and
+streams it through three stages joined by bounded queues:
+
+    reader thread  ──(read queue)──▶  chunker thread  ──(batch queue)──▶  sink
+
+Each queue holds at most LIBRARIAN_PIPELINE_DEPTH items and the chunker emits
+batches of LIBRARIAN_EMBED_BATCH chunks, so peak memory is set by those two
+knobs and the largest file, not by repo size. An InFlightMeter tracks the text
+bytes held between stages and reports the per-scan high-water mark.
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from .analysis import read_source
+from .chunking import Chunk
+
+_DONE = object()
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+
+class InFlightMeter:
+    """Thread-safe counter of text bytes currently held by the pipeline."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def add(self, n: int):
+        with self._lock:
+            self.current += n
+            if self.current > self.peak:
+                self.peak = self.current
+
+    def sub(self, n: int):
+        with self._lock:
+            self.current -= n
+
+
+class PipelineStats:
+    """What one streaming run did; `peak_inflight_bytes` is the memory high-water."""
+
+    def __init__(self):
+        self.files = 0
+        self.files_done = 0               # files fully chunked and handed on
+        self.chunks = 0
+        self.batches = 0
+        self.embedded = 0
+        self.peak_inflight_bytes = 0
+        self.seconds = 0.0
+        self.helper_cpu_seconds = 0.0     # thread CPU of the reader + chunker
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+# ── Stage plumbing ────────────────────────────────────────────────────────────
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Blocking put that gives up once the run is aborted."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def stream_embed(
+    project: str,
+    files: Iterable[Tuple[str, str]],
+    chunker: Callable[[str, str], List[Chunk]],
+    sink: Callable[[List[Dict[str, Any]]], int],
+    make_ids: Callable[[str, List[str]], List[str]],
+    language_of: Callable[[str], str],
+    batch_size: Optional[int] = None,
+    depth: Optional[int] = None,
+    on_progress: Optional[Callable[[PipelineStats], None]] = None,
+    read: Callable[[str], Tuple[str, str]] = read_source,
+) -> PipelineStats:
+    """
+    Read, chunk and hand (full_path, rel_path) files to `sink` in batches.
+
+    `chunker(text, language)` returns Chunks; their symbol and line span go
+    into the metadata. `make_ids(rel_path, texts)` names one file's chunks
+    (vs.make_chunk_ids).
+    `sink` receives a list of chunk dicts (the vs.upsert_chunks shape) and
+    returns how many it stored. It runs on the calling thread, so a slow
+    embedder back-pressures the reader instead of letting files pile up.
+    `on_progress` is called from the chunker thread after every file.
+    `read(full_path)` loads one file on the reader thread (analysis.read_source
+    shape); callers wrap it to take a per-file lock.
+    """
+    batch_size = batch_size or settings.LIBRARIAN_EMBED_BATCH
+    depth = depth or settings.LIBRARIAN_PIPELINE_DEPTH
+    read_q: queue.Queue = queue.Queue(maxsize=depth)
+    batch_q: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    helper_cpu: List[float] = []
+    meter = InFlightMeter()
+    stats = PipelineStats()
+    t_start = time.time()
+
+    def _reader():
+        cpu0 = time.thread_time()
+        try:
+            for full_path, rel_path in files:
+                text, _ = read(full_path)
+                meter.add(len(text))
+                if not _put(read_q, (rel_path, text), stop):
+                    return
+                stats.files += 1
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(read_q, _DONE, stop)
+            helper_cpu.append(time.thread_time() - cpu0)
+
+    def _chunker():
+        cpu0 = time.thread_time()
+        batch: List[Dict[str, Any]] = []
+        batch_bytes = 0
+        try:
+            while True:
+                item = _get(read_q, stop)
+                if item is _DONE:
+                    break
+                rel_path, text = item
+                language = language_of(rel_path)
+                chunks = chunker(text, language)
+                ids = make_ids(rel_path, [c.text for c in chunks])
+                for idx, (chunk_id, chunk) in enumerate(zip(ids, chunks)):
+                    batch.append({
+                        "id": chunk_id,
+                        "document": chunk.text,
+                        "metadata": {
+                            "file_path": rel_path,
+                            "language": language,
+                            "chunk_index": idx,
+                            "project": project,
+                            **chunk.metadata(),
+                        },
+                    })
+                    batch_bytes += len(chunk.text)
+                    meter.add(len(chunk.text))
+                    if len(batch) >= batch_size:
+                        if not _put(batch_q, (batch, batch_bytes), stop):
+                            return
+                        batch, batch_bytes = [], 0
+                meter.sub(len(text))
+                del text
+                stats.files_done += 1
+                if on_progress:
+                    on_progress(stats)
+            if batch:
+                _put(batch_q, (batch, batch_bytes), stop)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(batch_q, _DONE, stop)
+            helper_cpu.append(time.thread_time() - cpu0)
+
+    workers = [
+        threading.Thread(target=_reader, daemon=True, name=f"librarian-read-{project}"),
+        threading.Thread(target=_chunker, daemon=True, name=f"librarian-chunk-{project}"),
+    ]
+    for t in workers:
+        t.start()
+
+    try:
+        while True:
+            item = _get(batch_q, stop)
+            if item is _DONE:
+                break
+            batch, batch_bytes = item
+            stats.batches += 1
+            stats.chunks += len(batch)
+            stats.embedded += sink(batch)
+            meter.sub(batch_bytes)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for t in workers:
+            t.join()
+
+    stats.peak_inflight_bytes = meter.peak
+    stats.helper_cpu_seconds = sum(helper_cpu)
+    stats.seconds = round(time.time() - t_start, 2)
+    if errors:
+        raise errors[0]
+    return stats
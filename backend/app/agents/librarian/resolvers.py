@@ -0,0 +1,542 @@
+"""
+Librarian Resolvers — map raw import specifiers onto files in the scanned tree.
+
+Indexes are built once per scan so that each lookup costs O(depth of the
+import path) instead of a scan over every module in the project.
+"""
+import json
+import os
+import posixpath
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from app.core.git_objects import GitTree
+
+# A worktree directory, or one commit read straight from the object database
+TreeRoot = Union[str, GitTree]
+
+
+def read_tree_text(root: TreeRoot, rel_path: str) -> Optional[str]:
+    """Text of rel_path under `root`, or None if it is missing / unreadable."""
+    if isinstance(root, GitTree):
+        return root.read_text(rel_path)
+    try:
+        with open(os.path.join(root, rel_path), "r", encoding="utf-8", errors="ignore") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+# ── Python ────────────────────────────────────────────────────────────────────
+
+class PythonModuleIndex:
+    """
+    Reverse dotted-suffix index over a `module_map` ({dotted module: rel_path}).
+
+    Resolution matches the original linear scan exactly:
+      1. exact module hit, then `<target>.__init__`
+      2. otherwise every module where `mod.endswith("." + target)` or
+         `target.endswith("." + mod)` is a candidate, and the shortest path
+         wins (ties go to the module inserted first into module_map).
+
+    Rule 2a is answered by `_suffixes` (every proper dotted suffix of every
+    module, pre-reduced to its best candidate); rule 2b by probing the
+    target's own proper suffixes against module_map.
+    """
+
+    def __init__(self, module_map: Dict[str, str]):
+        self.module_map = module_map
+        self._order: Dict[str, int] = {}
+        self._suffixes: Dict[str, Tuple[int, int, str]] = {}
+
+        for order, (mod, path) in enumerate(module_map.items()):
+            self._order[mod] = order
+            rank = (len(path), order, path)
+            pos = mod.find(".")
+            while pos != -1:
+                suffix = mod[pos + 1:]
+                best = self._suffixes.get(suffix)
+                if best is None or rank < best:
+                    self._suffixes[suffix] = rank
+                pos = mod.find(".", pos + 1)
+
+    def resolve(self, target: str) -> Optional[str]:
+        module_map = self.module_map
+        if target in module_map:
+            return module_map[target]
+        init_key = f"{target}.__init__"
+        if init_key in module_map:
+            return module_map[init_key]
+
+        best = self._suffixes.get(target)
+        pos = target.find(".")
+        while pos != -1:
+            mod = target[pos + 1:]
+            if mod in module_map:
+                path = module_map[mod]
+                rank = (len(path), self._order[mod], path)
+                if best is None or rank < best:
+                    best = rank
+            pos = target.find(".", pos + 1)
+        return best[2] if best else None
+
+
+# ── JavaScript / TypeScript ───────────────────────────────────────────────────
+
+# `... from "x"`, `import "x"`, `import("x")`, `require("x")`; comments and
+# string / template literals are matched too (group 1 empty) so their text is skipped
+_JS_SPEC_RE = re.compile(
+    r"""//[^\n]*|/\*.*?\*/"""
+    r"""|(?:\bfrom\s*|\bimport\s*\(?\s*|\brequire\s*\(\s*)['"]([^'"\n]+)['"]"""
+    r"""|'(?:\\.|[^'\\\n])*'|"(?:\\.|[^"\\\n])*"|`(?:\\.|[^`\\])*`""",
+    re.S,
+)
+_TSCONFIG_NAMES = ("tsconfig.json", "jsconfig.json")
+_JSONC_RE = re.compile(r'"(?:\\.|[^"\\])*"|//[^\n]*|/\*.*?\*/', re.S)
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+
+# Probe order for an extensionless specifier (TypeScript's node resolution)
+JS_PROBE_EXTS = (".ts", ".tsx", ".d.ts", ".js", ".jsx", ".mjs", ".cjs")
+_JS_RUNTIME_EXTS = {".js": (".ts", ".tsx"), ".jsx": (".tsx",), ".mjs": (".mts",), ".cjs": (".cts",)}
+
+
+def js_import_specs(content: str) -> List[str]:
+    """Raw specifiers from static imports/exports, require() and dynamic import()."""
+    return [m.group(1) for m in _JS_SPEC_RE.finditer(content) if m.group(1)]
+
+
+def _load_jsonc(root: TreeRoot, rel_path: str) -> Optional[dict]:
+    """tsconfig.json allows comments and trailing commas."""
+    text = read_tree_text(root, rel_path)
+    if text is None:
+        return None
+    text = _JSONC_RE.sub(lambda m: m.group(0) if m.group(0).startswith('"') else "", text)
+    text = _TRAILING_COMMA_RE.sub(r"\1", text)
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _split_ext(rel_path: str) -> Tuple[str, str]:
+    if rel_path.endswith(".d.ts"):
+        return rel_path[:-5], ".d.ts"
+    return posixpath.splitext(rel_path)
+
+
+class _TsPaths:
+    """compilerOptions.baseUrl / paths of one tsconfig, with directories relative to the repo root."""
+
+    def __init__(self, config_dir: str, options: dict):
+        base_url = options.get("baseUrl")
+        self.base_url: Optional[str] = _join(config_dir, base_url) if isinstance(base_url, str) else None
+        paths_root = self.base_url if self.base_url is not None else config_dir
+        self.exact: Dict[str, List[str]] = {}
+        self.wildcards: List[Tuple[str, str, List[str]]] = []      # (prefix, suffix, targets)
+        for pattern, targets in (options.get("paths") or {}).items():
+            if not isinstance(targets, list):
+                continue
+            targets = [_join(paths_root, t) for t in targets if isinstance(t, str)]
+            if "*" in pattern:
+                prefix, _, suffix = pattern.partition("*")
+                self.wildcards.append((prefix, suffix, targets))
+            else:
+                self.exact[pattern] = targets
+        # TypeScript picks the matching pattern with the longest prefix
+        self.wildcards.sort(key=lambda w: len(w[0]), reverse=True)
+
+    def candidates(self, spec: str) -> List[str]:
+        if spec in self.exact:
+            return list(self.exact[spec])
+        for prefix, suffix, targets in self.wildcards:
+            if spec.startswith(prefix) and spec.endswith(suffix) and len(spec) >= len(prefix) + len(suffix):
+                star = spec[len(prefix):len(spec) - len(suffix)]
+                return [t.replace("*", star, 1) for t in targets]
+        return []
+
+
+def _join(base: str, rel: str) -> str:
+    joined = posixpath.normpath(posixpath.join(base, rel)) if base else posixpath.normpath(rel)
+    return "" if joined == "." else joined
+
+
+class JsModuleIndex:
+    """
+    Resolves JS/TS specifiers against the scanned tree with dictionary lookups.
+
+    Built once per scan from every rel_path:
+      - `_by_base`  : extensionless path -> file, best extension per JS_PROBE_EXTS
+      - `_index_of` : directory -> its index.* file, same preference
+      - tsconfig/jsconfig `baseUrl` + `paths`, from the nearest ancestor config
+
+    resolve(src, spec) tries, for each candidate base path: the exact file,
+    `.js`→`.ts` rewrites, extension probing, then `<dir>/index.*`. Bare package
+    names with no matching alias resolve to None (third-party).
+    """
+
+    def __init__(self, rel_paths: Iterable[str], tsconfigs: Optional[Dict[str, dict]] = None):
+        self.files: Set[str] = set()
+        self._by_base: Dict[str, Tuple[int, str]] = {}
+        self._index_of: Dict[str, Tuple[int, str]] = {}
+        rank = {ext: i for i, ext in enumerate(JS_PROBE_EXTS)}
+        for rel_path in rel_paths:
+            self.files.add(rel_path)
+            base, ext = _split_ext(rel_path)
+            if ext not in rank:
+                continue
+            entry = (rank[ext], rel_path)
+            if base not in self._by_base or entry < self._by_base[base]:
+                self._by_base[base] = entry
+            parent, name = posixpath.split(base)
+            if name == "index" and (parent not in self._index_of or entry < self._index_of[parent]):
+                self._index_of[parent] = entry
+        # config dir ("" = repo root) -> compilerOptions
+        self._configs: Dict[str, _TsPaths] = {
+            d: _TsPaths(d, opts) for d, opts in (tsconfigs or {}).items()
+        }
+        self._config_for_dir: Dict[str, Optional[_TsPaths]] = {}
+
+    @classmethod
+    def from_tree(cls, root: TreeRoot, rel_paths: Iterable[str]) -> "JsModuleIndex":
+        """Index rel_paths, reading any tsconfig/jsconfig found among them from `root`."""
+        rel_paths = list(rel_paths)
+        tsconfigs: Dict[str, dict] = {}
+        for rel_path in rel_paths:
+            parent, name = posixpath.split(rel_path)
+            if name in _TSCONFIG_NAMES and parent not in tsconfigs:
+                options = cls._compiler_options(root, rel_path)
+                if options is not None:
+                    tsconfigs[parent] = options
+        return cls(rel_paths, tsconfigs)
+
+    @staticmethod
+    def _compiler_options(root: TreeRoot, rel_path: str, depth: int = 0) -> Optional[dict]:
+        """compilerOptions merged over a relative `extends` chain, with paths rebased to rel_path's dir."""
+        data = _load_jsonc(root, rel_path)
+        if data is None:
+            return None
+        options = dict(data.get("compilerOptions") or {})
+        parent_ref = data.get("extends")
+        if isinstance(parent_ref, str) and parent_ref.startswith(".") and depth < 5:
+            parent_rel = _join(posixpath.dirname(rel_path), parent_ref)
+            if not parent_rel.endswith(".json"):
+                parent_rel += ".json"
+            inherited = JsModuleIndex._compiler_options(root, parent_rel, depth + 1) or {}
+            # inherited baseUrl is relative to the parent config's directory
+            rebase = posixpath.relpath(posixpath.dirname(parent_rel) or ".", posixpath.dirname(rel_path) or ".")
+            if "baseUrl" in inherited and "baseUrl" not in options:
+                options["baseUrl"] = _join(rebase, inherited["baseUrl"]) or "."
+            if "paths" in inherited and "paths" not in options:
+                options["paths"] = inherited["paths"]
+                options.setdefault("baseUrl", _join(rebase, inherited.get("baseUrl", ".")) or ".")
+        return options
+
+    # ── Lookup ────────────────────────────────────────────────────────────────
+
+    def is_config(self, rel_path: str) -> bool:
+        return posixpath.basename(rel_path) in _TSCONFIG_NAMES
+
+    def _config(self, src_dir: str) -> Optional[_TsPaths]:
+        if src_dir in self._config_for_dir:
+            return self._config_for_dir[src_dir]
+        if src_dir in self._configs:
+            found = self._configs[src_dir]
+        elif src_dir:
+            found = self._config(posixpath.dirname(src_dir))
+        else:
+            found = None
+        self._config_for_dir[src_dir] = found
+        return found
+
+    def candidate_bases(self, src: str, spec: str) -> List[str]:
+        """Repo-relative paths `spec` may name, before extension/index probing."""
+        if spec.startswith("./") or spec.startswith("../") or spec in (".", ".."):
+            base = _join(posixpath.dirname(src), spec)
+            return [] if base.startswith("..") else [base]
+        if spec.startswith("/"):
+            return [_join("", spec.lstrip("/"))]
+        config = self._config(posixpath.dirname(src)) if self._configs else None
+        if config is None:
+            return []
+        bases = config.candidates(spec)
+        if config.base_url is not None:
+            bases.append(_join(config.base_url, spec))
+        return [b for b in bases if not b.startswith("..")]
+
+    def _probe(self, base: str, dir_only: bool = False) -> Optional[str]:
+        if dir_only:
+            hit = self._index_of.get(base)
+            return hit[1] if hit else None
+        if base in self.files:
+            return base
+        stem, ext = posixpath.splitext(base)
+        for alt in _JS_RUNTIME_EXTS.get(ext, ()):
+            if stem + alt in self.files:
+                return stem + alt
+        hit = self._by_base.get(base) or self._index_of.get(base)
+        return hit[1] if hit else None
+
+    def resolve(self, src: str, spec: str) -> Optional[str]:
+        dir_only = spec.endswith("/")
+        for base in self.candidate_bases(src, spec):
+            target = self._probe(base, dir_only)
+            if target is not None:
+                return target
+        return None
+
+    @staticmethod
+    def probe_keys(rel_path: str) -> List[str]:
+        """Bases under which `rel_path` can be found — what an added file may newly satisfy."""
+        base, ext = _split_ext(rel_path)
+        keys = [rel_path, base]
+        if posixpath.basename(base) == "index":
+            keys.append(posixpath.dirname(base))
+        return keys
+
+
+# ── Suffix indexes (Java, C/C++, Ruby) ────────────────────────────────────────
+
+def _suffix_keys(parts: List[str], sep: str) -> List[str]:
+    """['a', 'b', 'c'] -> ['a<sep>b<sep>c', 'b<sep>c', 'c']."""
+    return [sep.join(parts[i:]) for i in range(len(parts))]
+
+
+class _SuffixIndex:
+    """key -> shortest rel_path registered under it (ties: first registered)."""
+
+    def __init__(self):
+        self._best: Dict[str, Tuple[int, int, str]] = {}
+        self._n = 0
+
+    def add(self, key: str, rel_path: str):
+        rank = (len(rel_path), self._n, rel_path)
+        self._n += 1
+        best = self._best.get(key)
+        if best is None or rank < best:
+            self._best[key] = rank
+
+    def get(self, key: str) -> Optional[str]:
+        hit = self._best.get(key)
+        return hit[2] if hit else None
+
+
+class JavaClassIndex:
+    """
+    Fully qualified names -> .java files via dotted path suffixes, so
+    `com.acme.billing.Invoice` finds `src/main/java/com/acme/billing/Invoice.java`
+    whatever the source root. Wildcard imports (`com.acme.billing.*`) link to
+    one file of the package directory.
+    """
+
+    def __init__(self, rel_paths: Iterable[str]):
+        self._classes = _SuffixIndex()
+        self._packages = _SuffixIndex()
+        for rel_path in sorted(p for p in rel_paths if p.endswith(".java")):
+            parts = rel_path[:-5].split("/")
+            for key in _suffix_keys(parts, "."):
+                self._classes.add(key, rel_path)
+            for key in _suffix_keys(parts[:-1], "."):
+                self._packages.add(key, rel_path)
+
+    @classmethod
+    def from_tree(cls, root: TreeRoot, rel_paths: Iterable[str]) -> "JavaClassIndex":
+        return cls(rel_paths)
+
+    def candidate_bases(self, src: str, spec: str) -> List[str]:
+        if spec.endswith(".*"):
+            return ["pkg:" + spec[:-2]]
+        # `import static a.b.C.member` names a member of class a.b.C
+        return [spec, spec.rsplit(".", 1)[0]] if "." in spec else [spec]
+
+    def resolve(self, src: str, spec: str) -> Optional[str]:
+        for key in self.candidate_bases(src, spec):
+            hit = self._packages.get(key[4:]) if key.startswith("pkg:") else self._classes.get(key)
+            if hit:
+                return hit
+        return None
+
+    @staticmethod
+    def probe_keys(rel_path: str) -> List[str]:
+        parts = posixpath.splitext(rel_path)[0].split("/")
+        return _suffix_keys(parts, ".") + ["pkg:" + k for k in _suffix_keys(parts[:-1], ".")]
+
+    @staticmethod
+    def is_config(rel_path: str) -> bool:
+        return False
+
+
+class CIncludeIndex:
+    """
+    `#include "x.h"` looks next to the including file first, then (like `<x.h>`)
+    in a path-suffix index: `net/socket.h` finds `include/net/socket.h`.
+    Angle includes with no in-repo match are system headers and stay unresolved.
+    Specs arrive as the extractor emits them: `"x.h"` or `<x.h>`.
+    """
+
+    def __init__(self, rel_paths: Iterable[str]):
+        self.files: Set[str] = set()
+        self._suffixes = _SuffixIndex()
+        for rel_path in rel_paths:
+            self.files.add(rel_path)
+            for key in _suffix_keys(rel_path.split("/"), "/"):
+                self._suffixes.add(key, rel_path)
+
+    @classmethod
+    def from_tree(cls, root: TreeRoot, rel_paths: Iterable[str]) -> "CIncludeIndex":
+        return cls(rel_paths)
+
+    def candidate_bases(self, src: str, spec: str) -> List[str]:
+        target = spec[1:-1]
+        bases = [] if spec.startswith("<") else [_join(posixpath.dirname(src), target)]
+        norm = posixpath.normpath(target)
+        if not norm.startswith(".."):
+            bases.append("suffix:" + norm)
+        return [b for b in bases if not b.startswith("..")]
+
+    def resolve(self, src: str, spec: str) -> Optional[str]:
+        for key in self.candidate_bases(src, spec):
+            hit = self._suffixes.get(key[7:]) if key.startswith("suffix:") else (key if key in self.files else None)
+            if hit:
+                return hit
+        return None
+
+    @staticmethod
+    def probe_keys(rel_path: str) -> List[str]:
+        return [rel_path] + ["suffix:" + k for k in _suffix_keys(rel_path.split("/"), "/")]
+
+    @staticmethod
+    def is_config(rel_path: str) -> bool:
+        return False
+
+
+class RubyLoadIndex:
+    """
+    `require "foo/bar"` against the implicit load path — the repo root and
+    every `lib/` directory — and `require_relative` (emitted as "./foo") against
+    the requiring file's directory. `.rb` is optional in both.
+    """
+
+    def __init__(self, rel_paths: Iterable[str]):
+        self.files: Set[str] = set()
+        self._load_path = _SuffixIndex()
+        for rel_path in rel_paths:
+            if not rel_path.endswith(".rb"):
+                continue
+            self.files.add(rel_path)
+            for key in self._load_keys(rel_path):
+                self._load_path.add(key, rel_path)
+
+    @staticmethod
+    def _load_keys(rel_path: str) -> List[str]:
+        base = rel_path[:-3]
+        keys = [base]
+        parts = base.split("/")
+        for i, part in enumerate(parts[:-1]):
+            if part == "lib":
+                keys.append("/".join(parts[i + 1:]))
+        return keys
+
+    @classmethod
+    def from_tree(cls, root: TreeRoot, rel_paths: Iterable[str]) -> "RubyLoadIndex":
+        return cls(rel_paths)
+
+    def candidate_bases(self, src: str, spec: str) -> List[str]:
+        spec = spec[:-3] if spec.endswith(".rb") else spec
+        if spec.startswith("./") or spec.startswith("../"):
+            base = _join(posixpath.dirname(src), spec)
+            return [] if base.startswith("..") else ["file:" + base]
+        return [spec]
+
+    def resolve(self, src: str, spec: str) -> Optional[str]:
+        for key in self.candidate_bases(src, spec):
+            if key.startswith("file:"):
+                path = key[5:] + ".rb"
+                hit = path if path in self.files else None
+            else:
+                hit = self._load_path.get(key)
+            if hit:
+                return hit
+        return None
+
+    @classmethod
+    def probe_keys(cls, rel_path: str) -> List[str]:
+        if not rel_path.endswith(".rb"):
+            return []
+        return ["file:" + rel_path[:-3]] + cls._load_keys(rel_path)
+
+    @staticmethod
+    def is_config(rel_path: str) -> bool:
+        return False
+
+
+# ── Go ────────────────────────────────────────────────────────────────────────
+
+class GoPackageIndex:
+    """
+    Import paths -> package directories via every go.mod `module` line (longest
+    module prefix wins). A Go import names a package, so the edge goes to one
+    representative file: `<dir>/<dirname>.go`, then `doc.go`, then the first
+    non-test file.
+    """
+
+    def __init__(self, rel_paths: Iterable[str], modules: Optional[Dict[str, str]] = None):
+        by_dir: Dict[str, List[str]] = {}
+        for rel_path in rel_paths:
+            if rel_path.endswith(".go") and not rel_path.endswith("_test.go"):
+                by_dir.setdefault(posixpath.dirname(rel_path), []).append(rel_path)
+        self._package: Dict[str, str] = {d: self._representative(d, files) for d, files in by_dir.items()}
+        # module path -> module dir ("" = repo root), longest first
+        self._modules = sorted((modules or {}).items(), key=lambda m: len(m[0]), reverse=True)
+
+    @staticmethod
+    def _representative(rel_dir: str, files: List[str]) -> str:
+        names = {posixpath.basename(f): f for f in files}
+        dirname = posixpath.basename(rel_dir) if rel_dir else ""
+        for preferred in (f"{dirname}.go", "doc.go", "main.go"):
+            if preferred in names:
+                return names[preferred]
+        return min(files)
+
+    @classmethod
+    def from_tree(cls, root: TreeRoot, rel_paths: Iterable[str]) -> "GoPackageIndex":
+        rel_paths = list(rel_paths)
+        modules: Dict[str, str] = {}
+        for rel_path in rel_paths:
+            if posixpath.basename(rel_path) != "go.mod":
+                continue
+            for line in (read_tree_text(root, rel_path) or "").splitlines():
+                if line.startswith("module "):
+                    try:
+                        modules[line.split()[1].strip('"')] = posixpath.dirname(rel_path)
+                    except IndexError:
+                        pass
+                    break
+        return cls(rel_paths, modules)
+
+    def candidate_bases(self, src: str, spec: str) -> List[str]:
+        if spec.startswith("./") or spec.startswith("../"):
+            base = _join(posixpath.dirname(src), spec)
+            return [] if base.startswith("..") else [base]
+        for module, mod_dir in self._modules:
+            if spec == module:
+                return [mod_dir]
+            if spec.startswith(module + "/"):
+                return [_join(mod_dir, spec[len(module) + 1:])]
+        return []
+
+    def resolve(self, src: str, spec: str) -> Optional[str]:
+        for base in self.candidate_bases(src, spec):
+            hit = self._package.get(base)
+            if hit:
+                return hit
+        return None
+
+    @staticmethod
+    def probe_keys(rel_path: str) -> List[str]:
+        # any new file can change its directory's representative
+        return [posixpath.dirname(rel_path)]
+
+    @staticmethod
+    def is_config(rel_path: str) -> bool:
+        return posixpath.basename(rel_path) == "go.mod"
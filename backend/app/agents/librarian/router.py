@@ -7,13 +7,15 @@ from typing import Optional, List
 from fastapi import APIRouter, HTTPException, Query
 
 from .models import (
-    ProcessRequest, GraphResponse, CommitInfo, 
+    ProcessRequest, RefScanRequest, GraphResponse, CommitInfo, 
     IncrementalUpdateRequest, GithubSyncResult,
     DocumentationRequest, DocumentationResponse,
-    SonarScanRequest, SonarScanResponse
+    SonarScanRequest, SonarScanResponse, ScanJobStatus
 )
 from .service import librarian
+from .metrics import scan_metrics
 from app.core.config import settings
+from app.core.graph_store import graph_store
 
 router = APIRouter()
 
@@ -21,23 +23,20 @@ router = APIRouter()
 @router.get("/indexed-repos", summary="List repos that are fully indexed on the backend")
 async def get_indexed_repos():
     """
-    Returns the names of repositories that are cloned AND have a processed
-    knowledge graph (_kachow_graph.json) in storage/repos/.
+    Returns the names of repositories that are cloned in storage/repos/ AND
+    have a processed knowledge graph in the graph store (storage/graphs/).
     The frontend uses this to prune stale localStorage entries.
     """
     indexed: list[str] = []
-    storage = settings.REPO_STORAGE_PATH
-    if os.path.isdir(storage):
-        for name in os.listdir(storage):
-            repo_dir = os.path.join(storage, name)
-            graph_cache = os.path.join(repo_dir, "_kachow_graph.json")
-            if os.path.isdir(repo_dir) and os.path.isfile(graph_cache):
-                indexed.append(name)
+    for name in graph_store.projects():
+        repo_dir = os.path.join(settings.REPO_STORAGE_PATH, name)
+        if os.path.isdir(repo_dir) and graph_store.current(name) is not None:
+            indexed.append(name)
     return {"repos": indexed}
 
 #added this to api route to connect delete button -- Aditi
 @router.delete("/repo", summary="Delete a repository from backend storage")
-async def delete_repository(repo_name: str = Query(..., description="Name of the repository to delete")):
+def delete_repository(repo_name: str = Query(..., description="Name of the repository to delete")):
     """
     Deletes the cloned repository and its graph cache from disk.
     """
@@ -53,7 +52,7 @@ async def delete_repository(repo_name: str = Query(..., description="Name of the
 
 
 @router.post("/generate-docs", response_model=DocumentationResponse, summary="Generates industry-standard PROJECT_GUIDE.md")
-async def generate_documentation(request: DocumentationRequest):
+def generate_documentation(request: DocumentationRequest):
     print(f"\n[Router] POST /librarian/generate-docs -> project={request.project_name}")
     try:
         markdown = librarian.generate_comprehensive_docs(request.project_name, request.repo_url)
@@ -67,13 +66,14 @@ async def generate_documentation(request: DocumentationRequest):
 
 
 @router.post("/process", response_model=GraphResponse, summary="Load & process a repository")
-async def process_repository(request: ProcessRequest):
+def process_repository(request: ProcessRequest):
     print(f"\n[Router] POST /librarian/process -> source={request.input_source}")
     """
     **Stage 1 of every workflow.**
 
     Runs the full file-processing pipeline:
-    - Clones / pulls the repo (or validates a local path)
+    - Clones / pulls the repo (or validates a local path); `clone_strategy`
+      "blobless" + `sparse_paths` keep huge monorepos cheap to fetch
     - Walks the file tree and builds a dependency graph via AST analysis
     - Chunks each file and embeds into ChromaDB for RAG
     - Persists graph.json for instant cache hits on subsequent calls
@@ -85,6 +85,8 @@ async def process_repository(request: ProcessRequest):
             input_source=request.input_source,
             branch=request.branch,
             force=request.force,
+            clone_strategy=request.clone_strategy,
+            sparse_paths=request.sparse_paths,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -93,8 +95,57 @@ async def process_repository(request: ProcessRequest):
         raise HTTPException(status_code=500, detail=f"Pipeline failed: {e}")
 
 
+@router.post("/scan-ref", response_model=GraphResponse, summary="Graph of any branch, tag or commit (no checkout)")
+def scan_ref(request: RefScanRequest):
+    """
+    Builds the dependency graph of `ref` straight from the git object
+    database: nothing is checked out, so branches and historical commits
+    can be scanned side by side while the worktree serves normal scans.
+
+    Graph only — no embedding or docs. Results are cached per
+    (project, ref, commit) and do not replace the project's current graph.
+    """
+    try:
+        return librarian.scan_ref(request.input_source, request.ref, force=request.force)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Ref scan failed: {e}")
+
+
+@router.get("/jobs", response_model=List[ScanJobStatus], summary="Recent scans (live, this process)")
+async def list_scan_jobs(project: Optional[str] = Query(None, description="Filter by project name")):
+    """Newest first. Full scans stay here while their background embedding/docs run."""
+    return scan_metrics.recent(project)
+
+
+@router.get("/jobs/history", response_model=List[ScanJobStatus], summary="Persisted scan metrics")
+async def get_scan_history(
+    project: Optional[str] = Query(None, description="Filter by project name"),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """
+    Finished scans from storage/scan_metrics.jsonl (oldest first), for
+    tracking per-stage wall/CPU time across runs.
+    """
+    return scan_metrics.history(project, limit=limit)
+
+
+@router.get("/jobs/{job_id}", response_model=ScanJobStatus, summary="Scan progress and per-stage timing")
+async def get_scan_job(job_id: str):
+    """
+    State, percent complete, files/sec and per-stage wall + CPU time for one
+    scan. `job_id` comes from the /process or /incremental-update response.
+    """
+    status = scan_metrics.get(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown scan job: {job_id}")
+    return status
+
+
 @router.get("/branches", summary="List remote branches without cloning")
-async def get_branches(repo_url: str = Query(..., description="GitHub repository URL")):
+def get_branches(repo_url: str = Query(..., description="GitHub repository URL")):
     print(f"\n[Router] GET /librarian/branches -> url={repo_url}")
     """Quickly lists all remote branches using git ls-remote."""
     try:
@@ -105,7 +156,7 @@ async def get_branches(repo_url: str = Query(..., description="GitHub repository
 
 
 @router.get("/file", summary="Read raw content of a file")
-async def get_file_content(full_path: str = Query(..., description="Absolute path to the file on disk")):
+def get_file_content(full_path: str = Query(..., description="Absolute path to the file on disk")):
     """Returns the raw text content of any file that was loaded into the system."""
     content = librarian.get_file_content(full_path)
     if content.startswith("# Error:"):
@@ -114,7 +165,7 @@ async def get_file_content(full_path: str = Query(..., description="Absolute pat
 
 
 @router.get("/sync-github", response_model=GithubSyncResult, summary="Sync commits and Pull Requests")
-async def sync_github_data(
+def sync_github_data(
     input_source: str = Query(..., description="Repo URL or local path"),
     max_count: int = Query(15, ge=1, le=50),
 ):
@@ -132,7 +183,7 @@ async def sync_github_data(
 
 
 @router.get("/history", response_model=List[CommitInfo], summary="Recent git commits")
-async def get_commit_history(
+def get_commit_history(
     input_source: str = Query(..., description="Repo URL or local path"),
     max_count: int = Query(15, ge=1, le=50),
 ):
@@ -145,14 +196,15 @@ async def get_commit_history(
 
 
 @router.post("/incremental-update", summary="⚡ Incremental Brain — delta re-index only changed files")
-async def incremental_update(request: IncrementalUpdateRequest):
+def incremental_update(request: IncrementalUpdateRequest):
     """
     **The Incremental Brain (Task 3).**
 
     Instead of rescanning the entire project (which is slow), this endpoint:
-    - Runs `git diff --name-only HEAD~1` to find only changed files
+    - Diffs the tree against the scan manifest (stat first, hash only what moved)
+      to find added, modified and deleted files — committed or not
     - Re-chunks and re-embeds only those files into ChromaDB
-    - Hot-swaps the dependency graph edges for the changed nodes
+    - Hot-swaps the graph nodes and import edges for the changed files
     - Returns a benchmark comparing update time vs a full-scan estimate
 
     Use this after committing a small change to keep the AI brain
@@ -170,7 +222,7 @@ async def incremental_update(request: IncrementalUpdateRequest):
         raise HTTPException(status_code=500, detail=f"Incremental update failed: {e}")
 
 @router.post("/sonar-scan", response_model=SonarScanResponse, summary="🔍 Run real-time SonarQube scan")
-async def run_sonar_scan(request: SonarScanRequest):
+def run_sonar_scan(request: SonarScanRequest):
     """
     Triggers a full SonarQube quality audit.
     Requires the repository to be processed first via /librarian/process.
@@ -0,0 +1,243 @@
+"""
+Scan Scheduler — bounded worker pool for Librarian background jobs.
+
+Replaces one-daemon-thread-per-scan. Jobs are queued by priority (indexing
+before doc generation) and run on LIBRARIAN_SCAN_WORKERS threads:
+
+  - duplicates coalesce: a second job for the same (project, branch, kind)
+    while one is queued or running returns the existing job
+  - force=true supersedes: queued jobs for the (project, branch) are dropped,
+    running ones are asked to cancel, then the new job is queued;
+    `cancel(project)` does the same for all of a project's jobs
+  - never two jobs for one project at once (all branches share a collection),
+    so embeds cannot race on the collection diff
+
+Cancellation is cooperative: job functions call `job.raise_if_cancelled()`
+between steps (and from the embed sink), which raises ScanCancelled.
+
+Every submitted payload either runs (`fn`) or is handed back through its
+`discard(reason)` callback — when coalesced away or cancelled before starting —
+so callers can always close out their own bookkeeping.
+"""
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+PRIORITY_INDEX = 0     # embed + cache/manifest persistence (user is waiting on RAG)
+PRIORITY_DOCS = 10     # architecture map + LLM README/PRD
+
+_HISTORY_LIMIT = 200
+
+
+class ScanCancelled(BaseException):
+    """Raised inside a job once it has been superseded (BaseException, like asyncio.CancelledError)."""
+
+
+class ScanJob:
+    def __init__(
+        self,
+        project: str,
+        branch: str,
+        kind: str,
+        priority: int,
+        fn: Callable[["ScanJob"], None],
+        discard: Optional[Callable[[str], None]] = None,
+    ):
+        self.id = uuid.uuid4().hex[:12]
+        self.project = project
+        self.branch = branch
+        self.kind = kind
+        self.priority = priority
+        self.fn = fn
+        self.discard = discard
+        self.state = "queued"          # queued | running | done | failed | cancelled
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return self.project, self.branch, self.kind
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def raise_if_cancelled(self):
+        if self._cancel.is_set():
+            raise ScanCancelled(f"{self.kind} job {self.id} for {self.project}@{self.branch} superseded")
+
+
+class ScanScheduler:
+    """Fixed pool of worker threads draining a priority queue of ScanJobs."""
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[int, int, ScanJob]] = []
+        self._seq = itertools.count()
+        self._active: Dict[Tuple[str, str, str], ScanJob] = {}   # queued or running, by key
+        self._running_projects: Dict[str, ScanJob] = {}
+        self._jobs: "OrderedDict[str, ScanJob]" = OrderedDict()
+        self._threads: List[threading.Thread] = []
+
+    # ── Submission ────────────────────────────────────────────────────────────
+
+    def submit(
+        self,
+        project: str,
+        branch: str,
+        kind: str,
+        fn: Callable[[ScanJob], None],
+        priority: int = PRIORITY_INDEX,
+        force: bool = False,
+        discard: Optional[Callable[[str], None]] = None,
+    ) -> ScanJob:
+        dropped: List[Tuple[Callable[[str], None], str]] = []
+        with self._cond:
+            self._ensure_workers()
+            existing = self._active.get((project, branch, kind))
+            if existing is not None and not force and not existing.cancelled:
+                if existing.state == "queued":
+                    # newest payload wins; position in queue kept
+                    if existing.discard:
+                        dropped.append((existing.discard, "coalesced"))
+                    existing.fn, existing.discard = fn, discard
+                elif discard:
+                    dropped.append((discard, "coalesced"))
+                print(f"[Librarian:Scheduler] coalesced {kind} for {project}@{branch} into job {existing.id}")
+                job = existing
+            else:
+                if force:
+                    dropped.extend(self._supersede(project, branch))
+                job = ScanJob(project, branch, kind, priority, fn, discard)
+                self._active[job.key] = job
+                self._remember(job)
+                heapq.heappush(self._heap, (priority, next(self._seq), job))
+                self._cond.notify()
+                print(f"[Librarian:Scheduler] queued {kind} job {job.id} for {project}@{branch} (priority {priority})")
+        for callback, reason in dropped:
+            callback(reason)
+        return job
+
+    def cancel(self, project: str) -> int:
+        """
+        Supersede every queued and running job of `project` (all branches)
+        without queuing a replacement; returns how many were cancelled.
+        For callers about to rewrite the worktree the jobs read, e.g. a forced pull.
+        """
+        with self._cond:
+            active = sum(1 for key in self._active if key[0] == project)
+            dropped = self._supersede(project)
+        for callback, reason in dropped:
+            callback(reason)
+        return active
+
+    def _supersede(self, project: str, branch: Optional[str] = None) -> List[Tuple[Callable[[str], None], str]]:
+        dropped = []
+        for key, job in list(self._active.items()):
+            if key[0] != project or (branch is not None and key[1] != branch):
+                continue
+            job.cancel()
+            del self._active[key]
+            if job.state == "queued":
+                job.state = "cancelled"   # left in the heap; skipped when popped
+                job.finished_at = time.time()
+                if job.discard:
+                    dropped.append((job.discard, "cancelled"))
+                job.fn = job.discard = None
+            print(f"[Librarian:Scheduler] superseded {job.kind} job {job.id} ({job.state})")
+        return dropped
+
+    def _remember(self, job: ScanJob):
+        self._jobs[job.id] = job
+        while len(self._jobs) > _HISTORY_LIMIT:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.state in ("queued", "running"):
+                break
+            del self._jobs[oldest_id]
+
+    # ── Introspection ─────────────────────────────────────────────────────────
+
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[ScanJob]:
+        with self._cond:
+            return list(self._jobs.values())
+
+    # ── Workers ───────────────────────────────────────────────────────────────
+
+    def _ensure_workers(self):
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._loop, daemon=True, name=f"librarian-scan-{len(self._threads)}")
+            self._threads.append(t)
+            t.start()
+
+    def _next_job(self) -> ScanJob:
+        """Highest-priority queued job whose project is idle (caller holds the lock)."""
+        while True:
+            deferred = []
+            picked = None
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                job = entry[2]
+                if job.state != "queued":
+                    continue
+                if job.project in self._running_projects:
+                    deferred.append(entry)
+                    continue
+                picked = job
+                break
+            for entry in deferred:
+                heapq.heappush(self._heap, entry)
+            if picked is not None:
+                return picked
+            self._cond.wait()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                job.state = "running"
+                job.started_at = time.time()
+                self._running_projects[job.project] = job
+
+            try:
+                if job.cancelled:
+                    if job.discard:
+                        job.discard("cancelled")
+                    job.raise_if_cancelled()
+                job.fn(job)
+                job.state = "done"
+            except ScanCancelled as e:
+                job.state = "cancelled"
+                print(f"[Librarian:Scheduler] {e}")
+            except Exception as e:
+                job.state = "failed"
+                job.error = str(e)
+                print(f"[Librarian:Scheduler] {job.kind} job {job.id} failed: {e}")
+            finally:
+                with self._cond:
+                    job.finished_at = time.time()
+                    job.fn = job.discard = None
+                    self._running_projects.pop(job.project, None)
+                    if self._active.get(job.key) is job:
+                        del self._active[job.key]
+                    self._cond.notify_all()
+
+
+# Singleton — shared by every LibrarianService entry point
+scan_scheduler = ScanScheduler(settings.LIBRARIAN_SCAN_WORKERS)
@@ -11,16 +11,14 @@ Background (non-blocking, runs after response sent):
   5. Chunk files and upsert into ChromaDB
   6. Generate AI docs (README + PRD) via Groq
   7. Write architecture map to disk
-  8. Persist graph cache to disk
+  8. Persist graph cache to storage/graphs (one slot per branch + commit)
 """
 import os
-import ast
 import json
 import re
 import time
 import hashlib
 import subprocess
-import threading
 import traceback
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
@@ -32,8 +30,26 @@ from git import Repo, InvalidGitRepositoryError
 from app.core.config import settings
 from app.core.alerts import alert_system
 from app.core import vector_store as vs
+from app.core import graph_cache
+from app.core.graph_registry import graph_registry
+from app.core.graph_store import graph_store, GraphSlot
+from app.core.file_inventory import file_inventories, head_commit, language_for, FileInventory
+from app.core.git_objects import git_readers, GitTree
+from app.core.repo_locks import repo_locks
 from app.core.llm import client as groq_client
+from app.core.tokens import token_counter
 from .models import GraphResponse, FileNode, CommitInfo, PullRequestInfo, GithubSyncResult
+from .analysis import analyze_python_blobs, analyze_python_files, read_source, read_tree_source
+from .resolvers import PythonModuleIndex
+from .extractors import IndexSet, extractor_for
+from .manifest import ScanManifest, TreeStat
+from .deps import DependencyIndex
+from .symbols import SymbolIndex
+from .pipeline import stream_embed
+from .chunking import Chunk, syntax_chunks
+from .clone import clone_dir, clone_name, clone_or_update, deepen_history, is_remote, is_shallow, resolve_strategy, sparse_matcher
+from .scheduler import scan_scheduler, ScanJob, ScanCancelled, PRIORITY_INDEX, PRIORITY_DOCS
+from .metrics import scan_metrics, ScanRecord
 import urllib.request
 import urllib.error
 
@@ -48,36 +64,18 @@ def _classify_commit(msg: str) -> str:
     return m.group(1).lower() if m else "other"
 
 
-#  Language detector 
-_EXT_LANG: Dict[str, str] = {
-    ".py": "python", ".js": "javascript", ".ts": "typescript",
-    ".tsx": "typescript", ".jsx": "javascript", ".java": "java",
-    ".go": "go", ".rb": "ruby", ".cpp": "cpp", ".c": "c",
-    ".html": "html", ".css": "css", ".json": "json",
-    ".md": "markdown", ".yaml": "yaml", ".yml": "yaml", ".toml": "toml",
-}
+#  Tree artifacts (arch map) live next to the scanned tree; scan caches in graph_store 
+_ARTIFACT_PREFIX = "_kachow_"
 
 
-def _lang(ext: str) -> str:
-    return _EXT_LANG.get(ext.lower(), "text")
+def _artifact_path(project_root: str, name: str) -> str:
+    return os.path.join(project_root, f"{_ARTIFACT_PREFIX}{name}")
 
 
 #  Token-aware chunker 
-def _chunk_text(text: str, max_tokens: int = settings.CHUNK_TOKEN_LIMIT) -> List[str]:
-    """Split text into chunks of roughly max_tokens (word-count proxy)."""
-    max_words = int(max_tokens * 0.75)
-    lines = text.splitlines(keepends=True)
-    chunks, current, word_count = [], [], 0
-    for line in lines:
-        words_in_line = len(line.split())
-        if word_count + words_in_line > max_words and current:
-            chunks.append("".join(current))
-            current, word_count = [], 0
-        current.append(line)
-        word_count += words_in_line
-    if current:
-        chunks.append("".join(current))
-    return chunks or [text]
+def _chunk_text(text: str, language: str = "text", max_tokens: int = settings.CHUNK_TOKEN_LIMIT) -> List[Chunk]:
+    """Split text along definitions, else at content-defined boundaries (see chunking.py)."""
+    return syntax_chunks(text, language, max_tokens=max_tokens)
 
 
 class LibrarianService:
@@ -99,21 +97,40 @@ class LibrarianService:
         print(f"\n[Librarian:Delete] Deleting repo: {repo_name}")
         storage = settings.REPO_STORAGE_PATH
         repo_dir = os.path.join(storage, repo_name)
-        if os.path.exists(repo_dir):
-            import shutil
-            shutil.rmtree(repo_dir, ignore_errors=True)
-            return True
-        return False
-
-    def process_request(self, input_source: str, branch: str = "main", force: bool = False) -> GraphResponse:
+        with repo_locks.write(repo_dir):
+            cached = graph_store.delete(repo_name)
+            git_readers.invalidate(repo_dir)
+            if os.path.exists(repo_dir):
+                import shutil
+                shutil.rmtree(repo_dir, ignore_errors=True)
+                return True
+        return cached
+
+    def process_request(
+        self,
+        input_source: str,
+        branch: str = "main",
+        force: bool = False,
+        clone_strategy: Optional[str] = None,
+        sparse_paths: Optional[List[str]] = None,
+    ) -> GraphResponse:
         """
         Main entry point. Returns the graph fast; kicks off background work.
+        Remote sources are cloned / updated first (see clone.py for
+        `clone_strategy` and `sparse_paths`).
         """
         print(f"\n[Librarian:Process] Processing repo: {input_source} (branch: {branch}, force: {force})")
         # 1. Resolve source
-        if input_source.startswith("http"):
-            project_root = self._clone_or_pull(input_source, branch)
-            project_name = input_source.rstrip("/").split("/")[-1].replace(".git", "")
+        remote = is_remote(input_source)
+        if remote:
+            project_name = clone_name(input_source)
+            if force:
+                # the pull rewrites the worktree the old jobs read and waits on their
+                # read locks; supersede them first instead of queuing behind them
+                cancelled = scan_scheduler.cancel(project_name)
+                if cancelled:
+                    print(f"[Librarian:Process] Superseded {cancelled} background job(s) for {project_name}")
+            project_root = self._clone_or_pull(input_source, branch, clone_strategy, sparse_paths)
         else:
             project_root = input_source
             project_name = os.path.basename(project_root.rstrip("/\\"))
@@ -125,11 +142,23 @@ class LibrarianService:
             print(f"[Librarian:Process] Error: Path not found {project_root}")
             raise ValueError(f"Path does not exist or is not a directory: {project_root}")
 
-        # 2. Check cache (instant return — no background work needed)
-        cache_file = os.path.join(project_root, "_kachow_graph.json")
-        if not force and os.path.exists(cache_file):
-            print(f"[Librarian:Process] Cache HIT for {project_name}. Returning instantly.")
-            return self._load_from_cache(cache_file)
+        # Walk + parse under the repo's read lock: no pull / checkout lands mid-scan
+        with repo_locks.read(project_root):
+            if remote:
+                checked_out = self._checked_out_branch(project_root)
+                if checked_out and checked_out != branch:
+                    print(f"[Librarian:Process] '{branch}' not checked out, scanning '{checked_out}'")
+                    branch = checked_out
+            return self._scan_worktree(project_root, project_name, branch, force)
+
+    def _scan_worktree(self, project_root: str, project_name: str, branch: str, force: bool) -> GraphResponse:
+        """Cache lookup, graph build and background hand-off (caller holds the read lock)."""
+        # 2. Check cache (instant return — no background work needed); only this exact HEAD hits
+        slot = graph_store.lookup(project_name, branch, head_commit(project_root))
+        if not force and slot is not None:
+            print(f"[Librarian:Process] Cache HIT for {project_name}@{branch} ({slot.commit[:8]}). Returning instantly.")
+            graph_store.set_current(slot)
+            return self._load_from_cache(slot.graph_path)
 
         print(f"[Librarian:Process] Cache MISS or force=true. Starting full scan.")
 
@@ -140,9 +169,17 @@ class LibrarianService:
         )
 
         # 3. FAST: walk + AST (graph only — no embedding, no LLM)
-        graph_response, G, file_contents, nodes_data, edges_data = self._build_graph(
-            project_root, project_name, branch
-        )
+        record = scan_metrics.start(project_name, branch, "full", parts=("index", "docs"))
+        try:
+            graph_response, G, file_paths, nodes_data, edges_data, manifest, deps, symbols = self._build_graph(
+                project_root, project_name, branch, record=record
+            )
+        except Exception as e:
+            record.finish("failed", str(e))
+            raise
+        graph_response.job_id = record.id
+        record.state = "queued"
+        slot = graph_store.slot(project_name, branch, manifest.commit)
 
         alert_system.add_alert(
             title="✅ Graph Ready",
@@ -151,10 +188,82 @@ class LibrarianService:
         )
 
         # 4. BACKGROUND: embed + docs + cache (non-blocking)
-        self._run_background(project_root, project_name, cache_file, graph_response, G, file_contents, nodes_data, edges_data)
+        self._run_background(
+            project_root, project_name, branch, slot, graph_response, G,
+            file_paths, nodes_data, edges_data, manifest, deps, symbols, record, force=force,
+        )
+
+        return graph_response
 
+    def scan_ref(self, input_source: str, ref: str, force: bool = False) -> GraphResponse:
+        """
+        Graph of any branch, tag or commit, read straight from the object database.
+
+        Nothing is checked out and the worktree is never read, so refs can be
+        scanned concurrently with each other and with a normal scan of the
+        same clone. Graph only (no embedding, no docs); the result lands in
+        the project's `ref:<ref>` graph_store slot for that commit, apart from
+        the branch slots process_request serves, without moving `current`.
+        """
+        print(f"\n[Librarian:Ref] Scanning {input_source} @ {ref}")
+        if is_remote(input_source):
+            project_name = clone_name(input_source)
+            project_root = clone_dir(input_source)
+            if not os.path.isdir(project_root):
+                raise ValueError(f"Repository not cloned yet: process {input_source} first")
+        else:
+            project_root = input_source
+            project_name = os.path.basename(project_root.rstrip("/\\"))
+            if not os.path.isdir(project_root):
+                raise ValueError(f"Path does not exist or is not a directory: {project_root}")
+
+        reader = git_readers.get(project_root)
+        commit = reader.rev_parse(ref) or reader.rev_parse(f"origin/{ref}")
+        if commit is None and is_remote(input_source):
+            self._fetch_ref(project_root, ref)
+            commit = reader.rev_parse(ref) or reader.rev_parse(f"origin/{ref}")
+        if commit is None:
+            raise ValueError(f"Unknown ref '{ref}' in {project_name}")
+
+        slot = graph_store.ref_slot(project_name, ref, commit)
+        if not force and slot.exists():
+            print(f"[Librarian:Ref] Cache HIT for {project_name}@{ref} ({commit[:8]})")
+            return self._load_from_cache(slot.graph_path)
+
+        record = scan_metrics.start(project_name, ref, "ref")
+        try:
+            tree = GitTree.from_ref(reader, commit)
+            in_cone = sparse_matcher(project_root)
+            if in_cone is not None:
+                tree.restrict(in_cone)      # same part of a monorepo the worktree scans cover
+            graph_response, _, _, _, _, manifest, deps, symbols = self._build_graph(
+                project_root, project_name, ref, record=record, tree=tree
+            )
+            graph_response.job_id = record.id
+            with record.stage("cache_save"):
+                slot = graph_store.ref_slot(project_name, ref, commit)
+                self._save_slot(slot, graph_response.model_dump(), manifest, deps, symbols)
+                graph_store.prune(project_name)
+        except Exception as e:
+            record.finish("failed", str(e))
+            raise
+        record.finish("done")
+        print(f"[Librarian:Ref] {project_name}@{ref} ({commit[:8]}): {graph_response.total_files} files")
         return graph_response
 
+    @staticmethod
+    def _fetch_ref(project_root: str, ref: str):
+        """Bring one remote branch / tag / sha into the object database (worktree untouched)."""
+        with repo_locks.write(project_root):
+            repo = Repo(project_root)
+            for refspec in (f"+refs/heads/{ref}:refs/remotes/origin/{ref}", f"+refs/tags/{ref}:refs/tags/{ref}", ref):
+                try:
+                    repo.remotes.origin.fetch(refspec, depth=1)
+                    return
+                except Exception:
+                    continue
+        print(f"[Librarian:Ref] could not fetch '{ref}' from origin")
+
     def get_branches(self, url: str) -> List[str]:
         """Fetch remote branch names without cloning."""
         try:
@@ -188,9 +297,8 @@ class LibrarianService:
 
     def get_commit_history(self, input_source: str, max_count: int = 15) -> List[CommitInfo]:
         """Fetch recent commits from the local clone, unshallowing first if needed."""
-        if input_source.startswith("http"):
-            repo_name = input_source.rstrip("/").split("/")[-1].replace(".git", "")
-            repo_path = os.path.join(settings.REPO_STORAGE_PATH, repo_name)
+        if is_remote(input_source):
+            repo_path = clone_dir(input_source)
         else:
             repo_path = input_source
 
@@ -202,33 +310,34 @@ class LibrarianService:
             repo = Repo(repo_path, search_parent_directories=True)
 
             # If the clone was done with depth=1 (shallow), unshallow it so we
-            # can see the full commit history.
-            shallow_file = os.path.join(repo_path, ".git", "shallow")
-            if os.path.exists(shallow_file):
-                print("[Librarian:History] Shallow clone detected — unshallowing for full history...")
-                try:
-                    repo.git.fetch("--unshallow")
-                    print("[Librarian:History] Unshallow complete.")
-                except Exception as ue:
-                    print(f"[Librarian:History] Unshallow failed (may already be full): {ue}")
-            else:
-                # Pull latest commits even if not shallow
-                try:
-                    repo.remotes.origin.pull()
-                    print("[Librarian:History] Pulled latest commits.")
-                except Exception as pe:
-                    print(f"[Librarian:History] Pull failed (using existing): {pe}")
+            # can see the full commit history (commits + trees only, no old blobs).
+            with repo_locks.write(repo_path):
+                if is_shallow(repo_path):
+                    print("[Librarian:History] Shallow clone detected — unshallowing for full history...")
+                    try:
+                        deepen_history(repo)
+                        print("[Librarian:History] Unshallow complete.")
+                    except Exception as ue:
+                        print(f"[Librarian:History] Unshallow failed (may already be full): {ue}")
+                else:
+                    # Pull latest commits even if not shallow
+                    try:
+                        repo.remotes.origin.pull()
+                        print("[Librarian:History] Pulled latest commits.")
+                    except Exception as pe:
+                        print(f"[Librarian:History] Pull failed (using existing): {pe}")
 
             result = []
-            for c in repo.iter_commits(max_count=max_count):
-                msg = c.message.strip().split("\n")[0]
-                result.append(CommitInfo(
-                    hash=c.hexsha[:7],
-                    message=msg,
-                    author=c.author.name,
-                    date=c.committed_datetime.strftime("%b %d, %Y · %H:%M"),
-                    commit_type=_classify_commit(msg),
-                ))
+            with repo_locks.read(repo_path):
+                for c in repo.iter_commits(max_count=max_count):
+                    msg = c.message.strip().split("\n")[0]
+                    result.append(CommitInfo(
+                        hash=c.hexsha[:7],
+                        message=msg,
+                        author=c.author.name,
+                        date=c.committed_datetime.strftime("%b %d, %Y · %H:%M"),
+                        commit_type=_classify_commit(msg),
+                    ))
             print(f"[Librarian:History] Found {len(result)} commits")
             return result
         except (InvalidGitRepositoryError, Exception) as e:
@@ -242,10 +351,11 @@ class LibrarianService:
         commits = self.get_commit_history(input_source, max_count=max_count)
         
         repo_url = input_source
-        if not repo_url.startswith("http"):
+        if not is_remote(repo_url):
             try:
-                repo = Repo(input_source, search_parent_directories=True)
-                repo_url = list(repo.remotes.origin.urls)[0]
+                with repo_locks.read(input_source):
+                    repo = Repo(input_source, search_parent_directories=True)
+                    repo_url = list(repo.remotes.origin.urls)[0]
                 print(f"[Librarian:Sync] Resolved local path to URL: {repo_url}")
             except Exception as e:
                 print(f"[Librarian:Sync] Could not resolve remote URL from local path: {e}")
@@ -301,13 +411,41 @@ class LibrarianService:
     def incremental_update(self, input_source: str) -> dict:
         """
         Incremental Brain  Task 3 Implementation.
+
+        Diffs the live tree against the scan manifest (stat first, hash only
+        what moved) and reprocesses exactly the added / modified / deleted set:
+        graph nodes, their import edges and their vector chunks. Multi-commit
+        pulls, uncommitted edits and deletions are all picked up.
+
+        Import edges come from the persisted dependency index: changed files
+        are re-parsed, and only importers that can see an added or removed
+        module are re-resolved (from stored specs, no I/O). The resulting
+        graph matches what a full scan would produce.
         """
+        record = scan_metrics.start(
+            os.path.basename(input_source.rstrip("/\\")).replace(".git", ""), "local", "incremental"
+        )
+        repo_path = input_source
+        if is_remote(input_source):
+            repo_path = clone_dir(input_source)
+        try:
+            # reads the worktree and `git log`: a concurrent pull / checkout waits
+            with repo_locks.read(repo_path):
+                result = self._incremental_update(input_source, record)
+        except Exception as e:
+            record.finish("failed", str(e))
+            raise
+        record.finish("done")
+        result["job_id"] = record.id
+        return result
+
+    def _incremental_update(self, input_source: str, record: ScanRecord) -> dict:
         t_start = time.time()
 
         #  1. Resolve project root 
-        if input_source.startswith("http"):
-            repo_name = input_source.rstrip("/").split("/")[-1].replace(".git", "")
-            project_root = os.path.join(settings.REPO_STORAGE_PATH, repo_name)
+        if is_remote(input_source):
+            repo_name = clone_name(input_source)
+            project_root = clone_dir(input_source)
         else:
             project_root = input_source
             repo_name = os.path.basename(project_root.rstrip("/\\"))
@@ -315,105 +453,223 @@ class LibrarianService:
         if not os.path.isdir(project_root):
             raise ValueError(f"Project path not found: {project_root}")
 
-        #  2. Load cached graph 
-        cache_file = os.path.join(project_root, "_kachow_graph.json")
-        if not os.path.exists(cache_file):
+        #  2. Load cached graph + manifest + dependency index 
+        # Base: this branch's slot for HEAD, else its newest scan; results go to the HEAD slot
+        branch = "local"
+        if is_remote(input_source):
+            current = graph_store.current(repo_name)
+            branch = self._checked_out_branch(project_root) or (current.branch if current else "main")
+        head = head_commit(project_root)
+        base = graph_store.lookup(repo_name, branch, head) or graph_store.latest(repo_name, branch)
+        if base is None:
             raise FileNotFoundError("No cached graph found. Run full scan first.")
-        
-        with open(cache_file, "r", encoding="utf-8") as f:
-            graph_data = json.load(f)
+        head_slot = graph_store.slot(repo_name, branch, head).ensure()
+        manifest = ScanManifest.load(base.path("manifest.json"))
+        deps = DependencyIndex.load(base.path("deps.json"))
+        if manifest is None or deps is None:
+            raise FileNotFoundError("No scan manifest found. Run a full scan (force=true) first.")
+        symbols = SymbolIndex.load(base.path("symbols.json")) if settings.LIBRARIAN_SYMBOLS else None
 
-        old_nodes_count = len(graph_data.get("nodes", []))
-        repo = Repo(project_root, search_parent_directories=True)
+        graph_data = graph_cache.load_graph(base.graph_path)
+        record.branch = graph_data.get("branch", record.branch)
 
-        #  3. Delta Identification (Task 3: Git Diff) 
-        changed_files: List[str] = []
-        try:
-            # We compare HEAD with HEAD~1 to find the "delta"
-            diff = repo.git.diff("HEAD~1", "HEAD", "--name-only").splitlines()
-            changed_files = [f for f in diff if os.path.isfile(os.path.join(project_root, f)) 
-                            and any(f.endswith(ext) for ext in settings.SUPPORTED_EXTENSIONS)]
-        except Exception:
-            changed_files = []
+        old_nodes_count = len(graph_data.get("nodes", []))
 
-        if not changed_files:
+        #  3. Delta Identification (manifest diff) 
+        with record.stage("diff") as diff_stage:
+            commit = head_commit(project_root)
+            order, tree, inventory = self._stat_tree(project_root, manifest, commit)
+            delta = manifest.diff(tree)
+            for rel_path, digest in delta.hashes.items():
+                inventory.set_hash(rel_path, digest)
+            diff_stage["files"] = len(tree)
+        record.files_total = len(tree)
+
+        if not delta.has_changes:
+            if head_slot.dir != base.dir:
+                # same files at a new commit: materialise the slot so process_request hits
+                manifest.apply(delta, tree, commit)
+                self._save_slot(head_slot, graph_data, manifest, deps, symbols)
+            elif delta.touched:
+                manifest.apply(delta, tree)
+                manifest.save(head_slot.path("manifest.json"))
+            graph_store.set_current(head_slot)
             return {
                 "changed_files": [],
+                "deleted_files": [],
+                "skipped_files": delta.unchanged + len(delta.touched),
+                "total_files": len(tree),
                 "update_time_seconds": round(time.time() - t_start, 2),
                 "graph_updated": False,
                 "message": "Brain is up to date."
             }
 
         #  4. Partial Re-Ingestion & Metadata Layer (Task 2) 
-        from app.core.sonar_client import sonar # Import health database client
-        
-        # Helper to get file owner (GIT GPS)
-        def get_owner(path):
+        with record.stage("reindex", files=len(delta.changed)):
+            from app.core.sonar_client import sonar # Import health database client
+
             try:
-                return repo.git.log("-1", "--format=%an", "--", path)
-            except: return "Unknown"
-
-        updated_nodes = []
-        nodes_map = {n["id"]: n for n in graph_data["nodes"]}
-
-        for rel_path in changed_files:
-            # 1. "Un-learn" (Remove metadata and old embedding logic)
-            # 2. "Learn" (Re-process)
-            ext = os.path.splitext(rel_path)[1]
-            language = _lang(ext)
-            full_path = os.path.join(project_root, rel_path)
-            
-            with open(full_path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
+                repo = Repo(project_root, search_parent_directories=True)
+            except Exception:
+                repo = None
 
-            # Metadata Enrichment (Task 2 GPS Context)
-            health = sonar.get_file_metrics(rel_path, repo_name)
-            owner = get_owner(rel_path)
-            
-            new_node = FileNode(
-                id=rel_path,
-                label=os.path.basename(rel_path),
-                type=self._infer_node_type(rel_path, os.path.basename(rel_path)),
-                layer=self._infer_layer(rel_path),
-                language=language,
-                size_bytes=os.path.getsize(full_path),
-                owner=owner,
-                sonar_health=health,
-                jira_tickets=[] # Integration placeholder
-            ).model_dump()
-
-            # Hot-Swap Node (Task 3)
-            nodes_map[rel_path] = new_node
-            
-            # Re-process vector store (Task 3 memory sync)
-            vs.delete_chunks_by_file(repo_name, rel_path)
-            chunks = []
-            for i, chunk in enumerate(_chunk_text(content)):
-                chunks.append({
-                    "id": vs.make_chunk_id(rel_path, i),
-                    "document": chunk,
-                    "metadata": {"file_path": rel_path, "project": repo_name}
-                })
-            vs.upsert_chunks(repo_name, chunks)
-
-        #  5. Data Integrity Check (Task 3) 
-        graph_data["nodes"] = list(nodes_map.values())
+            # Helper to get file owner (GIT GPS)
+            def get_owner(path):
+                try:
+                    return repo.git.log("-1", "--format=%an", "--", path)
+                except: return "Unknown"
+
+            nodes_map = {n["id"]: n for n in graph_data["nodes"]}
+            live = set(order)
+            added_nodes = [i for i in order if i not in nodes_map]
+
+            # "Un-learn": deleted files (and folders that no longer exist)
+            reresolve = set(delta.changed)
+            for rel_path in delta.deleted:
+                vs.delete_chunks_by_file(repo_name, rel_path)
+                reresolve |= deps.importers_of(rel_path)
+                deps.remove_file(rel_path)
+                if symbols is not None:
+                    symbols.remove_file(rel_path)
+            for node_id in [i for i in nodes_map if i not in live]:
+                del nodes_map[node_id]
+
+            for rel_dir in added_nodes:
+                if rel_dir not in tree:
+                    nodes_map[rel_dir] = FileNode(
+                        id=rel_dir,
+                        label=os.path.basename(rel_dir) if rel_dir != "root" else "root",
+                        type="folder",
+                        layer="system",
+                    ).model_dump()
+
+            # "Learn": (re)build nodes, specs and chunks for added and modified files
+            for rel_path in delta.changed:
+                full_path, size, _ = tree[rel_path]
+                language = language_for(os.path.splitext(rel_path)[1])
+                content, _ = read_source(full_path)
+
+                # Metadata Enrichment (Task 2 GPS Context)
+                health = sonar.get_file_metrics(rel_path, repo_name)
+                owner = get_owner(rel_path)
+
+                # Hot-Swap Node (Task 3)
+                nodes_map[rel_path] = FileNode(
+                    id=rel_path,
+                    label=os.path.basename(rel_path),
+                    type=self._infer_node_type(rel_path, os.path.basename(rel_path)),
+                    layer=self._infer_layer(rel_path),
+                    language=language,
+                    size_bytes=size,
+                    owner=owner,
+                    sonar_health=health,
+                    jira_tickets=[] # Integration placeholder
+                ).model_dump()
+
+                extractor = extractor_for(rel_path)
+                if extractor is not None:
+                    deps.specs[rel_path] = extractor.extract(content)
+
+                # Re-process vector store (Task 3 memory sync): only chunks with new text are embedded
+                pieces = _chunk_text(content, language)
+                chunk_ids = vs.make_chunk_ids(rel_path, [c.text for c in pieces])
+                chunks = [
+                    {
+                        "id": chunk_id,
+                        "document": piece.text,
+                        "metadata": {
+                            "file_path": rel_path, "language": language, "chunk_index": i, "project": repo_name,
+                            **piece.metadata(),
+                        }
+                    }
+                    for i, (chunk_id, piece) in enumerate(zip(chunk_ids, pieces))
+                ]
+                vs.sync_chunks(repo_name, chunks, where={"file_path": rel_path})
+
+            py_items = [(tree[p][0], p) for p in delta.changed if p.endswith(".py")]
+            for result in analyze_python_files(py_items):
+                record.add_cpu("reindex", result.get("worker_cpu_s", 0.0))
+                src = result["rel_path"]
+                if result["parsed"]:
+                    deps.specs[src] = result["imports"]
+                    deps.doc_stats[src] = [result["total_functions"], result["documented_functions"]]
+                else:
+                    deps.specs.pop(src, None)
+                    deps.doc_stats.pop(src, None)
+                if symbols is not None:
+                    symbols.set_file(src, result["symbols"])
+
+        #  5. Re-resolve only the importers an added module can affect 
+        with record.stage("resolve"):
+            added_keys: List[str] = []
+            for rel_path in delta.added:
+                if rel_path.endswith(".py"):
+                    added_keys.append(rel_path.replace("/", ".").replace(".py", ""))
+                    added_keys.append(os.path.basename(rel_path).replace(".py", ""))
+            reresolve |= deps.affected_by_python_modules(added_keys)
+            indexes = IndexSet(project_root, tree)
+            # a tsconfig / go.mod moved: every file of that language may resolve differently
+            config_hit = indexes.config_changed(delta.changed + delta.deleted)
+            reresolve |= {p for p in deps.specs if not p.endswith(".py") and config_hit(p)}
+            reresolve |= deps.affected_by_paths(delta.added, indexes)
+
+            module_map: Dict[str, str] = {}
+            for rel_path in tree:
+                if rel_path.endswith(".py"):
+                    module_map[rel_path.replace("/", ".").replace(".py", "")] = rel_path
+                    module_map[os.path.basename(rel_path).replace(".py", "")] = rel_path
+            module_index = PythonModuleIndex(module_map)
+
+            for src in reresolve & live:
+                src_specs = deps.specs.get(src, [])
+                if src.endswith(".py"):
+                    deps.set_targets(src, self._resolve_python_targets(src, src_specs, module_index))
+                else:
+                    deps.set_targets(src, self._resolve_spec_targets(src, src_specs, indexes))
+            if symbols is not None:
+                symbols.resolve(module_index)
+
+            #  6. Rebuild nodes + edges in full-scan order 
+            edges = [
+                {"source": os.path.dirname(p) or "root", "target": p, "relation": "contains"}
+                for p in tree
+            ]
+            for rel_path in [p for p in tree if p.endswith(".py")] + [p for p in tree if not p.endswith(".py")]:
+                for target in deps.imports.get(rel_path, []):
+                    edges.append({"source": rel_path, "target": target, "relation": "imports"})
+
+            graph_data["nodes"] = [nodes_map[i] for i in order]
+            graph_data["edges"] = edges
+            graph_data["total_files"] = len(tree)
+            graph_data["documented_ratio"] = round(deps.documented_ratio(), 2)
+
+        #  7. Data Integrity Check (Task 3) 
         new_nodes_count = len(graph_data["nodes"])
         if new_nodes_count < old_nodes_count:
-             print("[Brain:Integrity] WARNING: Node count dropped. Verifying deletions...")
-        
-        #  6. Speed Benchmarking (Task 3: < 10s target) 
+             print(f"[Brain:Integrity] Node count dropped by {old_nodes_count - new_nodes_count} ({len(delta.deleted)} files deleted).")
+
+        #  8. Speed Benchmarking (Task 3: < 10s target) 
         elapsed = round(time.time() - t_start, 2)
         baseline_estimate = old_nodes_count * 0.5 # 0.5s per file avg for full scan
-        
-        with open(cache_file, "w", encoding="utf-8") as f:
-            json.dump(graph_data, f, default=str)
 
-        msg = f"¡ Brain updated {len(changed_files)} files in {elapsed}s (Target < 10s). Baseline scan: ~{baseline_estimate}s."
+        with record.stage("cache_save"):
+            manifest.apply(delta, tree, commit)
+            self._save_slot(head_slot, graph_data, manifest, deps, symbols)
+            graph_store.set_current(head_slot)
+            graph_store.prune(repo_name)
+
+        msg = (
+            f"¡ Brain updated {len(delta.changed)} files and removed {len(delta.deleted)} in {elapsed}s "
+            f"(hashed {len(delta.hashes)} of {len(tree)}, re-resolved {len(reresolve & live)} importers). "
+            f"Baseline scan: ~{baseline_estimate}s."
+        )
         alert_system.add_alert(title="Incremental Brain Ready", message=msg, severity="success")
-        
+
         return {
-            "changed_files": changed_files,
+            "changed_files": delta.changed,
+            "deleted_files": delta.deleted,
+            "skipped_files": delta.unchanged + len(delta.touched),
+            "total_files": len(tree),
             "update_time_seconds": elapsed,
             "full_scan_baseline_seconds": baseline_estimate,
             "graph_updated": True,
@@ -421,112 +677,143 @@ class LibrarianService:
         }
 
 
-
     # 
     # FAST PATH  graph walk + AST only (no I/O to ChromaDB, no LLM)
     # 
 
-    def _build_graph(self, root: str, name: str, branch: str):
+    def _build_graph(
+        self,
+        root: str,
+        name: str,
+        branch: str,
+        workers: Optional[int] = None,
+        record: Optional[ScanRecord] = None,
+        tree: Optional[GitTree] = None,
+    ):
         """
         Walk the file tree and run AST analysis synchronously.
         Returns the GraphResponse AND the raw data needed for background work.
         Target: <3 seconds for a typical repo.
+
+        Python files are read and parsed by the analysis stage, across
+        `workers` processes (default: settings.LIBRARIAN_PARSE_WORKERS).
+        No file text outlives its own parse: the background embed pipeline
+        gets (full_path, rel_path) pairs and streams the files again.
+        Stage timings go to `record` (walk, parse) when one is given.
+
+        With `tree`, the commit is read from the object database instead of
+        the worktree (see scan_ref): same passes, nothing on disk touched.
         """
+        record = record or ScanRecord(name, branch, "full")
         G = nx.DiGraph()
         module_map: Dict[str, str] = {}
         nodes_data: List[FileNode] = []
         edges_data: List[Dict[str, str]] = []
-        file_contents: Dict[str, str] = {}
+        file_paths: List[tuple] = []
+        specs: Dict[str, List[str]] = {}
+        py_items: List[tuple] = []
+        commit = tree.commit if tree is not None else head_commit(root)
+        manifest = ScanManifest(commit=commit)
 
         #  PASS 1: Walk & map 
-        for dirpath, dirnames, filenames in os.walk(root):
-            dirnames[:] = [
-                d for d in dirnames
-                if not any(skip in d for skip in settings.SKIP_DIRS)
-            ]
-
-            rel_dir = os.path.relpath(dirpath, root).replace("\\", "/")
-            if rel_dir == ".":
-                rel_dir = "root"
-
-            G.add_node(rel_dir, type="folder")
-            nodes_data.append(FileNode(
-                id=rel_dir,
-                label=os.path.basename(dirpath) or "root",
-                type="folder",
-                layer="system",
-            ))
-
-            for filename in filenames:
-                ext = os.path.splitext(filename)[1]
-                if ext not in settings.SUPPORTED_EXTENSIONS:
-                    continue
-
-                full_path = os.path.join(dirpath, filename)
-                rel_path = os.path.relpath(full_path, root).replace("\\", "/")
-                language = _lang(ext)
-
-                try:
-                    with open(full_path, "r", encoding="utf-8", errors="ignore") as fh:
-                        content = fh.read()
-                except Exception:
-                    content = ""
-
-                file_contents[rel_path] = content
-                size = os.path.getsize(full_path)
-
-                G.add_node(rel_path, type="file", language=language, size=size)
+        with record.stage("walk") as walk_stage:
+            if tree is not None:
+                # non-Python blobs are read again below: keep what the binary sniff already read
+                inventory = FileInventory.from_tree(tree, hold=lambda rel_path: not rel_path.endswith(".py"))
+            else:
+                inventory = file_inventories.build(root, commit)
+            for dirpath, rel_dir, files in self._walk_tree(inventory):
+                G.add_node(rel_dir, type="folder")
                 nodes_data.append(FileNode(
-                    id=rel_path,
-                    label=filename,
-                    type=self._infer_node_type(rel_path, filename),
-                    layer=self._infer_layer(rel_path),
-                    language=language,
-                    size_bytes=size,
+                    id=rel_dir,
+                    label=os.path.basename(dirpath) or "root",
+                    type="folder",
+                    layer="system",
                 ))
 
-                G.add_edge(rel_dir, rel_path)
-                edges_data.append({"source": rel_dir, "target": rel_path, "relation": "contains"})
+                for filename, ext, full_path, rel_path, entry in files:
+                    language = entry.language
 
-                if ext == ".py":
-                    mod = rel_path.replace("/", ".").replace(".py", "")
-                    module_map[mod] = rel_path
-                    module_map[filename.replace(".py", "")] = rel_path
-
-        #  PASS 2: Python AST import edges 
-        total_functions = 0
-        documented_functions = 0
-        for rel_path, content in file_contents.items():
-            if not rel_path.endswith(".py"):
-                continue
-            try:
-                tree = ast.parse(content, filename=rel_path)
-            except SyntaxError:
-                continue
+                    if ext == ".py":
+                        # read + parsed by the analysis stage
+                        digest = ""
+                        py_items.append((tree.blob(rel_path), rel_path) if tree is not None else (full_path, rel_path))
+                    else:
+                        content, digest = read_tree_source(tree, rel_path) if tree is not None else read_source(full_path)
+                        inventory.set_hash(rel_path, digest)
+                        extractor = extractor_for(rel_path)
+                        if extractor is not None:
+                            specs[rel_path] = extractor.extract(content)
+                        del content
+
+                    file_paths.append((full_path, rel_path))
+                    size = entry.size
+                    manifest.record(rel_path, size, entry.mtime_ns, digest, commit)
+
+                    G.add_node(rel_path, type="file", language=language, size=size)
+                    nodes_data.append(FileNode(
+                        id=rel_path,
+                        label=filename,
+                        type=self._infer_node_type(rel_path, filename),
+                        layer=self._infer_layer(rel_path),
+                        language=language,
+                        size_bytes=size,
+                    ))
+
+                    G.add_edge(rel_dir, rel_path)
+                    edges_data.append({"source": rel_dir, "target": rel_path, "relation": "contains"})
+
+                    if ext == ".py":
+                        mod = rel_path.replace("/", ".").replace(".py", "")
+                        module_map[mod] = rel_path
+                        module_map[filename.replace(".py", "")] = rel_path
+            walk_stage["files"] = len(file_paths)
+        record.files_total = len(file_paths)
+
+        #  PASS 2: Python AST import edges (parallel parse, serial merge)
+        with record.stage("parse", files=len(file_paths)):
+            doc_stats: Dict[str, List[int]] = {}
+            symbols = SymbolIndex() if settings.LIBRARIAN_SYMBOLS else None
+            module_index = PythonModuleIndex(module_map)
+            if tree is not None:
+                results = analyze_python_blobs(tree.repo_path, py_items, workers)
+            else:
+                results = analyze_python_files(py_items, workers)
+            for result in results:
+                record.add_cpu("parse", result.get("worker_cpu_s", 0.0))
+                rel_path = result["rel_path"]
+                manifest.files[rel_path]["sha1"] = result["sha1"]
+                inventory.set_hash(rel_path, result["sha1"])
+                if not result["parsed"]:
+                    continue
+                if symbols is not None:
+                    symbols.set_file(rel_path, result["symbols"])
+
+                specs[rel_path] = result["imports"]
+                doc_stats[rel_path] = [result["total_functions"], result["documented_functions"]]
+                for target in self._resolve_python_targets(rel_path, result["imports"], module_index):
+                    G.add_edge(rel_path, target)
+                    edges_data.append({"source": rel_path, "target": target, "relation": "imports"})
+
+            #  PASS 3: Other languages (JS/TS, Go, Java, Ruby, C/C++) via the extractor registry
+            indexes = IndexSet(tree if tree is not None else root, (p for _, p in file_paths))
+            for _, rel_path in file_paths:
+                if rel_path.endswith(".py") or rel_path not in specs:
+                    continue
+                for target in self._resolve_spec_targets(rel_path, specs[rel_path], indexes):
+                    G.add_edge(rel_path, target)
+                    edges_data.append({"source": rel_path, "target": target, "relation": "imports"})
 
-            imports = self._extract_imports(tree)
-            for imp in imports:
-                resolved = self._resolve_import(imp, module_map)
-                if resolved and resolved != rel_path and G.has_node(resolved):
-                    if not G.has_edge(rel_path, resolved):
-                        G.add_edge(rel_path, resolved)
-                        edges_data.append({"source": rel_path, "target": resolved, "relation": "imports"})
-
-            for node in ast.walk(tree):
-                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                    total_functions += 1
-                    if ast.get_docstring(node):
-                        documented_functions += 1
-
-        #  PASS 3: JS/TS heuristic edges 
-        js_files = {
-            p: c for p, c in file_contents.items()
-            if p.endswith((".js", ".ts", ".tsx", ".jsx"))
-        }
-        if js_files:
-            self._add_js_edges(js_files, G, edges_data, file_contents)
+            #  PASS 4: Symbol layer (defs collected by the same parse, resolved here)
+            if symbols is not None:
+                symbols.resolve(module_index)
 
-        doc_ratio = (documented_functions / total_functions) if total_functions > 0 else 0.0
+        deps = DependencyIndex(specs=specs, doc_stats=doc_stats)
+        for e in edges_data:
+            if e["relation"] == "imports":
+                deps.imports.setdefault(e["source"], []).append(e["target"])
+                deps.importers.setdefault(e["target"], []).append(e["source"])
+        doc_ratio = deps.documented_ratio()
 
         graph_response = GraphResponse(
             project_name=name,
@@ -541,7 +828,47 @@ class LibrarianService:
             from_cache=False,
         )
 
-        return graph_response, G, file_contents, nodes_data, edges_data
+        return graph_response, G, file_paths, nodes_data, edges_data, manifest, deps, symbols
+
+    @staticmethod
+    def _walk_tree(inventory: FileInventory):
+        """
+        Yield (dirpath, rel_dir, files) for every indexed directory, where files
+        is a list of (filename, ext, full_path, rel_path, entry). Full scans and
+        incremental rescans both read the shared FileInventory, so they see
+        exactly the same file set as the analyzer and the Guardian.
+        """
+        for dirpath, rel_dir, entries in inventory.walk():
+            files = [
+                (os.path.basename(e.rel_path), e.ext, e.full_path, e.rel_path, e)
+                for e in entries
+                if not os.path.basename(e.rel_path).startswith(_ARTIFACT_PREFIX)
+            ]
+            yield dirpath, rel_dir or "root", files
+
+    def _stat_tree(self, root: str, manifest: ScanManifest, commit: Optional[str]):
+        """
+        Node ids in walk order (same order a full scan emits), plus
+        {rel_path: (full_path, size, mtime_ns)} for the live tree and the
+        refreshed inventory. Files the manifest has at the same (size, mtime)
+        skip the binary sniff and inherit its hash, so the walk stays stat-only.
+        """
+        def trusted(rel_path: str, st: os.stat_result) -> bool:
+            entry = manifest.files.get(rel_path)
+            return bool(entry) and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+
+        inventory = file_inventories.build(root, commit, trusted)
+        order: List[str] = []
+        tree: TreeStat = {}
+        for _, rel_dir, files in self._walk_tree(inventory):
+            order.append(rel_dir)
+            for _, _, full_path, rel_path, entry in files:
+                tree[rel_path] = (full_path, entry.size, entry.mtime_ns)
+                order.append(rel_path)
+                known = manifest.files.get(rel_path)
+                if known and known["size"] == entry.size and known["mtime_ns"] == entry.mtime_ns:
+                    inventory.set_hash(rel_path, known["sha1"])
+        return order, tree, inventory
 
     # 
     # BACKGROUND WORK  embedding + docs + cache persistence
@@ -551,65 +878,158 @@ class LibrarianService:
         self,
         root: str,
         name: str,
-        cache_file: str,
+        branch: str,
+        slot: GraphSlot,
         graph_response: GraphResponse,
         G: nx.DiGraph,
-        file_contents: Dict[str, str],
+        file_paths: List[tuple],
         nodes_data: List[FileNode],
         edges_data: List[Dict[str, str]],
-    ):
-        """Launches a daemon thread for all slow I/O work."""
-        def _worker():
+        manifest: ScanManifest,
+        deps: DependencyIndex,
+        symbols: Optional[SymbolIndex],
+        record: ScanRecord,
+        force: bool = False,
+    ) -> ScanJob:
+        """
+        Queues the slow I/O work on the scan scheduler as two jobs: indexing
+        (embed + cache/manifest persistence) ahead of doc generation.
+        Each part reports its stage timings and outcome to `record`.
+        Neither holds a repo lock for the whole job: the embed reader takes the
+        read lock per file, docs read their context under it, and the generated
+        files are written under the write lock. Embedding and LLM calls run
+        unlocked so pulls and history reads never queue behind them.
+        Returns the indexing job.
+        """
+        def _warn(e: Exception):
+            print(f"[Librarian:Background] Error: {e}")
+            alert_system.add_alert(
+                title=" ï¸ Background Task Warning",
+                message=f"Non-critical background processing failed: {e}",
+                severity="warning",
+            )
+
+        def _index(job: ScanJob):
+            record.state = "running"
+            outcome, error = "failed", None
             try:
-                self._embed_chunks(name, file_contents, graph_response)
-                self._write_arch_map(root, G)
-                self._generate_docs(name, root, nodes_data, edges_data)
-                self._save_cache(cache_file, graph_response)
+                with record.stage("embed", files=len(file_paths)):
+                    self._embed_chunks(name, file_paths, graph_response, job, record, root=root)
+                job.raise_if_cancelled()
+                with record.stage("cache_save"):
+                    slot.ensure()
+                    if symbols is not None:
+                        symbols.save(slot.path("symbols.json"))
+                    self._save_cache(slot.graph_path, graph_response)
+                    manifest.save(slot.path("manifest.json"))
+                    deps.save(slot.path("deps.json"))
+                    graph_store.set_current(slot)
+                    graph_store.prune(name)
                 alert_system.add_alert(
-                    title="§  Embedding Complete",
+                    title="§  Embedding Complete",
                     message=f"Vector store updated with {graph_response.total_chunks_embedded} chunks. RAG is ready.",
                     severity="info",
                 )
+                outcome = "done"
+            except ScanCancelled:
+                outcome = "cancelled"
+                raise
             except Exception as e:
-                print(f"[Librarian:Background] Error: {e}")
-                alert_system.add_alert(
-                    title=" ï¸ Background Task Warning",
-                    message=f"Non-critical background processing failed: {e}",
-                    severity="warning",
-                )
+                error = str(e)
+                _warn(e)
+                raise
+            finally:
+                record.part_done("index", outcome, error)
+
+        def _docs(job: ScanJob):
+            outcome, error = "failed", None
+            try:
+                with record.stage("arch_map"), repo_locks.write(root):
+                    self._write_arch_map(root, G)
+                job.raise_if_cancelled()
+                with record.stage("doc_gen"):
+                    self._generate_docs(name, root, nodes_data, edges_data)
+                outcome = "done"
+            except ScanCancelled:
+                outcome = "cancelled"
+                raise
+            except Exception as e:
+                error = str(e)
+                _warn(e)
+                raise
+            finally:
+                record.part_done("docs", outcome, error)
+
+        index_job = scan_scheduler.submit(
+            name, branch, "index", _index, PRIORITY_INDEX, force=force,
+            discard=lambda reason: record.part_done("index", reason),
+        )
+        docs_job = scan_scheduler.submit(
+            name, branch, "docs", _docs, PRIORITY_DOCS,
+            discard=lambda reason: record.part_done("docs", reason),
+        )
+        record.jobs.update(index=index_job.id, docs=docs_job.id)
+        print(f"[Librarian] graph returned  background work queued (scan: {record.id}, job: {index_job.id})")
+        return index_job
 
-        t = threading.Thread(target=_worker, daemon=True, name=f"librarian-bg-{name}")
-        t.start()
-        print(f"[Librarian] graph returned  background work started (thread: {t.name})")
-
-    def _embed_chunks(self, name: str, file_contents: Dict[str, str], graph_response: GraphResponse):
-        """Upsert file chunks into ChromaDB vector store."""
-        chunks_to_embed: List[Dict[str, Any]] = []
-
-        for rel_path, content in file_contents.items():
-            ext = os.path.splitext(rel_path)[1]
-            language = _lang(ext)
-            for idx, chunk in enumerate(_chunk_text(content)):
-                chunks_to_embed.append({
-                    "id": vs.make_chunk_id(rel_path, idx),
-                    "document": chunk,
-                    "metadata": {
-                        "file_path": rel_path,
-                        "language": language,
-                        "chunk_index": idx,
-                        "project": name,
-                    },
-                })
-
-        if not chunks_to_embed:
+    def _embed_chunks(
+        self,
+        name: str,
+        file_paths: List[tuple],
+        graph_response: GraphResponse,
+        job: Optional[ScanJob] = None,
+        record: Optional[ScanRecord] = None,
+        root: Optional[str] = None,
+    ):
+        """
+        Stream file chunks into ChromaDB in bounded batches (see pipeline.py).
+        With `root`, each file read takes that repo's read lock, held only for
+        the read itself.
+        """
+        if not file_paths:
             return
 
+        def _read(full_path: str):
+            with repo_locks.read(root):
+                return read_source(full_path)
+
         try:
-            if vs.collection_exists(name):
-                vs.delete_collection(name)
-            embedded = vs.upsert_chunks(name, chunks_to_embed)
-            graph_response.total_chunks_embedded = embedded
-            print(f"[Librarian:bg] embedded {embedded} chunks into ChromaDB")
+            # diff against what the collection holds: unchanged chunks keep their embeddings
+            sync = vs.ChunkSync(name, verbose=False)
+
+            def _sink(batch: List[Dict[str, Any]]) -> int:
+                if job is not None:
+                    job.raise_if_cancelled()     # stops the reader/chunker threads too
+                sync.add(batch)                  # new chunks embed/insert on the ingestor's threads
+                return len(batch)
+
+            try:
+                stats = stream_embed(
+                    name,
+                    file_paths,
+                    chunker=_chunk_text,
+                    sink=_sink,
+                    make_ids=vs.make_chunk_ids,
+                    language_of=lambda rel_path: language_for(os.path.splitext(rel_path)[1]),
+                    on_progress=(lambda st: record.progress("embed", st.files_done)) if record else None,
+                    read=_read if root else read_source,
+                )
+            except BaseException:
+                sync.abort()
+                raise
+            ingest = sync.close()
+            stats.embedded = ingest.chunks
+            if record:
+                record.add_cpu("embed", stats.helper_cpu_seconds)
+                record.stages["embed"]["chunks_per_sec"] = ingest.chunks_per_sec
+                record.stages["embed"]["chunks_reused"] = ingest.unchanged + ingest.relabeled
+            graph_response.total_chunks_embedded = stats.chunks - ingest.failed
+            graph_response.peak_inflight_bytes = stats.peak_inflight_bytes
+            print(
+                f"[Librarian:bg] {stats.chunks} chunks from {stats.files} files: {ingest.chunks} embedded, "
+                f"{ingest.unchanged + ingest.relabeled} reused, {ingest.deleted} deleted, {ingest.failed} failed "
+                f"({ingest.seconds}s, {ingest.chunks_per_sec} chunks/s, peak in-flight {stats.peak_inflight_bytes / 1024:.0f} KiB)"
+            )
         except Exception as e:
             print(f"[Librarian:bg] ChromaDB upsert failed: {e}")
 
@@ -617,74 +1037,63 @@ class LibrarianService:
     # CLONE / PULL  already fast (git protocol)
     # 
 
-    def _clone_or_pull(self, url: str, branch: str) -> str:
-        repo_name = url.rstrip("/").split("/")[-1].replace(".git", "")
-        target = os.path.join(settings.REPO_STORAGE_PATH, repo_name)
+    def _clone_or_pull(self, url: str, branch: str, strategy: Optional[str] = None,
+                       sparse_paths: Optional[List[str]] = None) -> str:
+        strategy = resolve_strategy(strategy)
+        target = clone_dir(url)
 
-        if os.path.isdir(target):
-            try:
-                repo = Repo(target)
-                repo.remotes.origin.fetch()
-                repo.git.checkout(branch)
-                repo.remotes.origin.pull(branch)
-                print(f"[Librarian:Clone] Updated {repo_name}@{branch}")
-            except Exception as e:
-                print(f"[Librarian:Clone] Pull failed, using existing clone: {e}")
-        else:
-            print(f"[Librarian:Clone] Cloning {repo_name}@{branch}...")
-            # shallow clone: only latest commit  much faster for large repos
-            Repo.clone_from(url, target, branch=branch, depth=1)
+        with repo_locks.write(target):
+            if os.path.isdir(target):
+                try:
+                    clone_or_update(url, target, branch, strategy, sparse_paths)
+                    print(f"[Librarian:Clone] Updated {clone_name(url)}@{branch}")
+                except Exception as e:
+                    print(f"[Librarian:Clone] Pull failed, using existing clone: {e}")
+            else:
+                try:
+                    clone_or_update(url, target, branch, strategy, sparse_paths)
+                except Exception:
+                    # a clone that never got its checkout would pass for a valid one next time
+                    import shutil
+                    shutil.rmtree(target, ignore_errors=True)
+                    raise
 
         return target
 
+    @staticmethod
+    def _checked_out_branch(project_root: str) -> Optional[str]:
+        try:
+            return Repo(project_root).active_branch.name
+        except Exception:
+            return None     # detached HEAD or not a git repo
+
     # 
     # HELPERS
     # 
 
     @staticmethod
-    def _extract_imports(tree: ast.AST) -> List[str]:
-        targets = []
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    targets.append(alias.name)
-            elif isinstance(node, ast.ImportFrom) and node.module:
-                targets.append(node.module)
-                for alias in node.names:
-                    targets.append(f"{node.module}.{alias.name}")
-        return targets
+    def _resolve_import(target: str, module_index: PythonModuleIndex) -> Optional[str]:
+        return module_index.resolve(target)
 
     @staticmethod
-    def _resolve_import(target: str, module_map: Dict[str, str]) -> Optional[str]:
-        if target in module_map:
-            return module_map[target]
-        init_key = f"{target}.__init__"
-        if init_key in module_map:
-            return module_map[init_key]
-        candidates = [
-            path for mod, path in module_map.items()
-            if mod.endswith(f".{target}") or target.endswith(f".{mod}")
-        ]
-        return sorted(candidates, key=len)[0] if candidates else None
+    def _resolve_python_targets(src: str, specs: List[str], module_index: PythonModuleIndex) -> List[str]:
+        """In-repo files `src` imports, in spec order, deduplicated."""
+        targets: List[str] = []
+        for imp in specs:
+            resolved = LibrarianService._resolve_import(imp, module_index)
+            if resolved and resolved != src and resolved not in targets:
+                targets.append(resolved)
+        return targets
 
     @staticmethod
-    def _add_js_edges(
-        js_files: Dict[str, str],
-        G: nx.DiGraph,
-        edges_data: List[Dict[str, str]],
-        all_contents: Dict[str, str],
-    ):
-        import_re = re.compile(r"""from\s+['"]([^'"]+)['"]""")
-        file_names = {os.path.splitext(os.path.basename(p))[0]: p for p in G.nodes}
-        for src_path, content in js_files.items():
-            for match in import_re.finditer(content):
-                raw = match.group(1)
-                stem = os.path.splitext(os.path.basename(raw))[0]
-                if stem in file_names:
-                    target = file_names[stem]
-                    if target != src_path and not G.has_edge(src_path, target):
-                        G.add_edge(src_path, target)
-                        edges_data.append({"source": src_path, "target": target, "relation": "imports"})
+    def _resolve_spec_targets(src: str, specs: List[str], indexes: IndexSet) -> List[str]:
+        """In-repo files `src` imports, in spec order, deduplicated."""
+        targets: List[str] = []
+        for raw in specs:
+            target = indexes.resolve(src, raw)
+            if target and target != src and target not in targets:
+                targets.append(target)
+        return targets
 
     @staticmethod
     def _infer_layer(rel_path: str) -> str:
@@ -717,16 +1126,24 @@ class LibrarianService:
     @staticmethod
     def _save_cache(cache_file: str, resp: GraphResponse):
         try:
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(resp.model_dump(), f, default=str)
+            graph_registry.store(cache_file, resp.model_dump())
             print(f"[Librarian:bg] cache written †’ {cache_file}")
         except Exception as e:
             print(f"[Librarian:bg] cache write failed: {e}")
 
+    @staticmethod
+    def _save_slot(slot: GraphSlot, graph_data: Dict[str, Any], manifest: ScanManifest,
+                   deps: DependencyIndex, symbols: Optional[SymbolIndex]):
+        slot.ensure()
+        if symbols is not None:
+            symbols.save(slot.path("symbols.json"))     # before the graph: readers key on the graph stamp
+        graph_registry.store(slot.graph_path, graph_data)
+        manifest.save(slot.path("manifest.json"))
+        deps.save(slot.path("deps.json"))
+
     @staticmethod
     def _load_from_cache(cache_file: str) -> GraphResponse:
-        with open(cache_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = dict(graph_registry.get(cache_file))
         data["nodes"] = [FileNode(**n) for n in data.get("nodes", [])]
         data["from_cache"] = True
         resp = GraphResponse(**data)
@@ -739,7 +1156,7 @@ class LibrarianService:
 
     @staticmethod
     def _write_arch_map(root_path: str, G: nx.DiGraph):
-        map_path = os.path.join(root_path, "_kachow_architecture_map.md")
+        map_path = _artifact_path(root_path, "architecture_map.md")
         try:
             with open(map_path, "w", encoding="utf-8") as f:
                 f.write("# KA-CHOW System Architecture & Dependency Map\n\n")
@@ -756,15 +1173,16 @@ class LibrarianService:
         """Generates AI-powered README.md and PRD.md (runs in background)."""
         core_files = ["README.md", "package.json", "requirements.txt", "go.mod", "main.py", "app.py", "index.ts"]
         found_context = []
-        for file in core_files:
-            p = os.path.join(project_root, file)
-            if os.path.exists(p):
-                try:
-                    with open(p, "r", encoding="utf-8", errors="ignore") as f:
-                        content = f.read(2000)
-                        found_context.append(f"--- {file} ---\n{content}\n")
-                except Exception:
-                    pass
+        with repo_locks.read(project_root):
+            for file in core_files:
+                p = os.path.join(project_root, file)
+                if os.path.exists(p):
+                    try:
+                        with open(p, "r", encoding="utf-8", errors="ignore") as f:
+                            content = f.read(2000)
+                            found_context.append(f"--- {file} ---\n{content}\n")
+                    except Exception:
+                        pass
 
         project_context = "\n".join(found_context) if found_context else "No core config files found."
         system_prompt = "You are a Technical Writer. Generate professional project documentation from file snippets."
@@ -793,10 +1211,12 @@ Output ONLY markdown."""
             )
             prd = prd_res.choices[0].message.content
 
-            with open(os.path.join(project_root, "README.md"), "w", encoding="utf-8") as f:
-                f.write(readme)
-            with open(os.path.join(project_root, "PRD.md"), "w", encoding="utf-8") as f:
-                f.write(prd)
+            # the LLM calls ran unlocked; the worktree writes exclude pulls and scans
+            with repo_locks.write(project_root):
+                with open(os.path.join(project_root, "README.md"), "w", encoding="utf-8") as f:
+                    f.write(readme)
+                with open(os.path.join(project_root, "PRD.md"), "w", encoding="utf-8") as f:
+                    f.write(prd)
             print(f"[Librarian:bg] generated README and PRD for {project_name}")
         except Exception as e:
             print(f"[Librarian:bg] doc gen failed: {e}")
@@ -808,7 +1228,7 @@ Output ONLY markdown."""
         print(f"\n[Librarian:Docs] Generating comprehensive docs for: {project_name}")
         
         # Resolve repo path
-        if repo_url and repo_url.startswith("http"):
+        if repo_url and is_remote(repo_url):
             repo_path = os.path.join(settings.REPO_STORAGE_PATH, project_name)
         else:
             repo_path = repo_url or os.path.join(settings.REPO_STORAGE_PATH, project_name)
@@ -820,24 +1240,25 @@ Output ONLY markdown."""
         # 1. Gather Context
         setup_files = ["package.json", "requirements.txt", "go.mod", "docker-compose.yml", "Dockerfile"]
         context_parts = []
-        for sf in setup_files:
-            p = os.path.join(repo_path, sf)
-            if os.path.exists(p):
-                try:
-                    with open(p, "r", encoding="utf-8", errors="ignore") as f:
-                        context_parts.append(f"### {sf}\n{f.read(3000)}")
-                except: pass
+        with repo_locks.read(repo_path):
+            for sf in setup_files:
+                p = os.path.join(repo_path, sf)
+                if os.path.exists(p):
+                    try:
+                        with open(p, "r", encoding="utf-8", errors="ignore") as f:
+                            context_parts.append(f"### {sf}\n{f.read(256 * 1024)}")
+                    except: pass
+        context_parts = token_counter.fit(context_parts, settings.PROMPT_TOKEN_BUDGET)
 
         # 2. Get Architecture Context (Knowledge Graph)
         arch_summary = "No architecture map available."
-        cache_file = os.path.join(repo_path, "_kachow_graph.json")
-        if os.path.exists(cache_file):
+        cache_file = graph_store.graph_path(project_name)
+        if cache_file and graph_cache.has_graph(cache_file):
             try:
-                with open(cache_file, "r", encoding="utf-8") as f:
-                    graph = json.load(f)
-                    total_files = len([n for n in graph.get("nodes", []) if n.get("type") == "file"])
-                    total_edges = len(graph.get("edges", []))
-                    arch_summary = f"The project contains {total_files} files with {total_edges} identified architectural dependencies."
+                summary = graph_registry.summary(cache_file)
+                total_files = summary["file_count"]
+                total_edges = summary["edge_count"]
+                arch_summary = f"The project contains {total_files} files with {total_edges} identified architectural dependencies."
             except: pass
 
         # 3. LLM Generation
@@ -879,7 +1300,7 @@ Output ONLY markdown."""
             
             # Save to disk as well
             guide_path = os.path.join(repo_path, "PROJECT_GUIDE.md")
-            with open(guide_path, "w", encoding="utf-8") as f:
+            with repo_locks.write(repo_path), open(guide_path, "w", encoding="utf-8") as f:
                 f.write(markdown)
             
             print(f"[Librarian:Docs] Generated PROJECT_GUIDE.md for {project_name}")
@@ -897,9 +1318,9 @@ Output ONLY markdown."""
         print(f"\n[Librarian:Sonar] Triggering scan for {repo_url}")
         
         # 1. Resolve project root
-        if repo_url.startswith("http"):
-            repo_name = repo_url.rstrip("/").split("/")[-1].replace(".git", "")
-            project_root = os.path.join(settings.REPO_STORAGE_PATH, repo_name)
+        if is_remote(repo_url):
+            repo_name = clone_name(repo_url)
+            project_root = clone_dir(repo_url)
         else:
             project_root = repo_url
             repo_name = os.path.basename(project_root.rstrip("/\\"))
@@ -909,18 +1330,18 @@ Output ONLY markdown."""
 
         from app.core.sonar_client import sonar
         
-        # 2. Run the scanner (Docker)
-        success = sonar.run_scanner(project_root, repo_name)
+        # 2. Run the scanner (Docker) over a worktree no pull can change mid-scan
+        with repo_locks.read(project_root):
+            success = sonar.run_scanner(project_root, repo_name)
         if not success:
             raise Exception("SonarScanner failed to complete.")
 
         # 3. Load current graph
-        cache_file = os.path.join(project_root, "_kachow_graph.json")
-        if not os.path.exists(cache_file):
+        cache_file = graph_store.graph_path(repo_name)
+        if not cache_file or not graph_cache.has_graph(cache_file):
             raise FileNotFoundError("Graph cache not found. Please scan the repository normally first.")
             
-        with open(cache_file, "r", encoding="utf-8") as f:
-            graph_data = json.load(f)
+        graph_data = graph_cache.load_graph(cache_file)
 
         # 4. Fetch metrics for every file and update nodes
         nodes = graph_data.get("nodes", [])
@@ -952,8 +1373,7 @@ Output ONLY markdown."""
         graph_data["metadata"]["metrics"] = project_metrics
         
         # 6. Save updated graph
-        with open(cache_file, "w", encoding="utf-8") as f:
-            json.dump(graph_data, f, default=str)
+        graph_registry.store(cache_file, graph_data)
 
         alert_system.add_alert(
             title="🛡️ Sonar Scan Complete",
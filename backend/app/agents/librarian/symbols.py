@@ -0,0 +1,193 @@
+"""
+Symbol Index — class / function definitions and the references between them.
+
+Built from the same single AST visit as the import graph (defs, bindings
+and refs come from app.core.code_facts) and stored next to the graph cache
+as `symbols.json` in the scan's graph_store slot:
+
+  - files   : per Python file, its defs ([qualname, kind, start, end]), the
+              refs each scope makes ([scope, dotted name]) and import bindings
+  - symbols : "rel_path::qualname" ids, "<module>" for module-level code
+  - edges   : [caller, callee] pairs of symbol indexes (calls and attribute
+              loads that resolve inside the repo)
+
+Refs are filtered at collection time to names that can leave the scope:
+imported names, module-level definitions and self/cls attributes.
+Resolution is repo-wide but pure dictionary work, so incremental updates
+swap in the changed files' facts and re-resolve without touching disk.
+"""
+import json
+import os
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.code_facts import MODULE
+from .resolvers import PythonModuleIndex
+
+SYMBOLS_VERSION = 1
+
+
+# ── Index ─────────────────────────────────────────────────────────────────────
+
+def symbol_id(rel_path: str, qualname: str) -> str:
+    return f"{rel_path}::{qualname}"
+
+
+def split_symbol(sym: str) -> Tuple[str, str]:
+    rel_path, _, qualname = sym.partition("::")
+    return rel_path, qualname
+
+
+class SymbolIndex:
+    """Per-file symbol facts plus the resolved caller -> callee edges."""
+
+    def __init__(self, files: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.files: Dict[str, Dict[str, Any]] = files or {}
+        self.edges: List[Tuple[str, str]] = []
+        self._callers: Optional[Dict[str, List[str]]] = None
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SymbolIndex"]:
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if data.get("version") != SYMBOLS_VERSION:
+            return None
+        index = cls(data.get("files", {}))
+        symbols = data.get("symbols", [])
+        index.edges = [(symbols[a], symbols[b]) for a, b in data.get("edges", [])]
+        return index
+
+    def save(self, path: str):
+        ids: Dict[str, int] = {}
+        for edge in self.edges:
+            for sym in edge:
+                ids.setdefault(sym, len(ids))
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": SYMBOLS_VERSION,
+                "files": self.files,
+                "symbols": list(ids),
+                "edges": [[ids[a], ids[b]] for a, b in self.edges],
+            }, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    # ── Mutation ──────────────────────────────────────────────────────────────
+
+    def set_file(self, rel_path: str, facts: Optional[Dict[str, Any]]):
+        if facts:
+            self.files[rel_path] = facts
+        else:
+            self.files.pop(rel_path, None)
+
+    def remove_file(self, rel_path: str):
+        self.files.pop(rel_path, None)
+
+    def resolve(self, module_index: PythonModuleIndex):
+        """Recompute every edge from the stored refs (dictionary lookups only)."""
+        defs = {p: {d[0]: d[1] for d in facts["defs"]} for p, facts in self.files.items()}
+        edges: Set[Tuple[str, str]] = set()
+        for rel_path, facts in self.files.items():
+            local = defs[rel_path]
+            bindings = facts.get("bindings", {})
+            for scope, dotted in facts["refs"]:
+                target = self._resolve_ref(rel_path, scope, dotted, local, bindings, defs, module_index)
+                src = symbol_id(rel_path, scope)
+                if target is not None and target != src:
+                    edges.add((src, target))
+        self.edges = sorted(edges)
+        self._callers = None
+
+    @staticmethod
+    def _longest_def(parts: List[str], file_defs: Dict[str, str]) -> str:
+        for i in range(len(parts), 0, -1):
+            qualname = ".".join(parts[:i])
+            if qualname in file_defs:
+                return qualname
+        return MODULE
+
+    def _resolve_ref(self, rel_path, scope, dotted, local, bindings, defs, module_index) -> Optional[str]:
+        parts = dotted.split(".")
+        head = parts[0]
+        if head in ("self", "cls"):
+            scope_parts = scope.split(".")
+            for i in range(len(scope_parts), 0, -1):
+                owner = ".".join(scope_parts[:i])
+                if local.get(owner) == "class":
+                    member = f"{owner}.{parts[1]}"
+                    return symbol_id(rel_path, member) if member in local else None
+            return None
+        if head in local and head not in bindings:
+            return symbol_id(rel_path, self._longest_def(parts, local))
+        if head not in bindings:
+            return None
+        full = bindings[head].split(".") + parts[1:]
+        module_map = module_index.module_map
+        # longest module prefix that is a file in the repo; the rest names a symbol in it
+        for i in range(len(full), 0, -1):
+            module = ".".join(full[:i])
+            target_file = module_map.get(module) or module_map.get(f"{module}.__init__")
+            if target_file is not None:
+                return symbol_id(target_file, self._longest_def(full[i:], defs.get(target_file, {})))
+        # same fuzzy suffix match the file-level import edges use, never on the full name
+        for i in range(len(full) - 1, 0, -1):
+            target_file = module_index.resolve(".".join(full[:i]))
+            if target_file is not None:
+                return symbol_id(target_file, self._longest_def(full[i:], defs.get(target_file, {})))
+        return None
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    def callers(self) -> Dict[str, List[str]]:
+        if self._callers is None:
+            callers: Dict[str, List[str]] = {}
+            for src, dst in self.edges:
+                callers.setdefault(dst, []).append(src)
+            self._callers = callers
+        return self._callers
+
+    def symbols_in(self, rel_path: str, line_range: Optional[Tuple[int, int]] = None) -> List[str]:
+        """Symbols defined in rel_path, optionally only those overlapping [start, end]."""
+        facts = self.files.get(rel_path)
+        if facts is None:
+            return []
+        out = []
+        for qualname, _, start, end in facts["defs"]:
+            if line_range is None or (start <= line_range[1] and end >= line_range[0]):
+                out.append(symbol_id(rel_path, qualname))
+        if line_range is None:
+            out.append(symbol_id(rel_path, MODULE))
+        return out
+
+    def span(self, sym: str) -> Optional[Tuple[int, int]]:
+        rel_path, qualname = split_symbol(sym)
+        for q, _, start, end in self.files.get(rel_path, {}).get("defs", []):
+            if q == qualname:
+                return start, end
+        return None
+
+    def impacted(self, seeds: Iterable[str], max_depth: Optional[int] = None) -> Dict[str, int]:
+        """Transitive callers of `seeds` -> BFS distance (seeds are 0)."""
+        callers = self.callers()
+        dist: Dict[str, int] = {}
+        queue = deque()
+        for seed in seeds:
+            if seed not in dist:
+                dist[seed] = 0
+                queue.append(seed)
+        while queue:
+            current = queue.popleft()
+            if max_depth is not None and dist[current] >= max_depth:
+                continue
+            for caller in callers.get(current, []):
+                if caller not in dist:
+                    dist[caller] = dist[current] + 1
+                    queue.append(caller)
+        return dist
@@ -3,7 +3,10 @@ import re
 from typing import List, Optional, Dict, Any
 from app.core.config import settings
 from app.core.sonar_client import sonar
+from app.core.repo_locks import repo_locks
+from app.agents.librarian.clone import is_remote
 from app.core.llm import client as _groq
+from app.core.tokens import token_counter
 from .models import (
     MentorChatRequest, MentorChatResponse,
     OnboardingStep, StarterQuest, TimelineEvent
@@ -121,7 +124,7 @@ class MentorService:
 
         if request.repo_url:
             # Resolve repo path
-            if request.repo_url.startswith("http"):
+            if is_remote(request.repo_url):
                 project_name = request.repo_url.rstrip("/").split("/")[-1].replace(".git", "")
                 repo_path = os.path.join(settings.REPO_STORAGE_PATH, project_name)
             else:
@@ -153,6 +156,11 @@ class MentorService:
                             prd_content = f.read()
                     except: pass
 
+        # Share the prompt budget between the three documents
+        arch_map, readme_content, prd_content = token_counter.fit(
+            [arch_map, readme_content, prd_content], settings.PROMPT_TOKEN_BUDGET
+        )
+
         # Context 4: Sonar Metrics
         sonar_stats = sonar.get_project_metrics(project_key=project_name)
 
@@ -207,7 +215,7 @@ Use this data to give actionable, specific, and precise answers. Base your logic
         """Fetch the easiest open issue from the local analysis cache and gamify it."""
         project_key = "KA-CHOW"
         if repo_url:
-            if repo_url.startswith("http"):
+            if is_remote(repo_url):
                 project_key = repo_url.rstrip("/").split("/")[-1].replace(".git", "")
             else:
                 project_key = os.path.basename(repo_url.rstrip("/\\"))
@@ -278,7 +286,7 @@ Use this data to give actionable, specific, and precise answers. Base your logic
 
         repo_path = None
         if repo_url:
-            if repo_url.startswith("http"):
+            if is_remote(repo_url):
                 repo_name = repo_url.rstrip("/").split("/")[-1].replace(".git", "")
                 repo_path = os.path.join(settings.REPO_STORAGE_PATH, repo_name)
             else:
@@ -288,8 +296,9 @@ Use this data to give actionable, specific, and precise answers. Base your logic
             repo_path = settings.BASE_DIR
 
         try:
-            repo = Repo(repo_path, search_parent_dirs=True)
-            commits = list(repo.iter_commits(max_count=15))
+            with repo_locks.read(repo_path):
+                repo = Repo(repo_path, search_parent_directories=True)
+                commits = list(repo.iter_commits(max_count=15))
             events: List[TimelineEvent] = []
             for c in commits:
                 msg = c.message.strip().split("\n")[0]
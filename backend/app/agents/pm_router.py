@@ -1,13 +1,14 @@
-import os
 import json
-import glob
 from typing import List, Optional
 from pydantic import BaseModel
 from fastapi import APIRouter, HTTPException
 
 from app.core.task_store import TaskStore
 from app.core.config import settings
+from app.core.graph_registry import graph_registry
+from app.core.graph_store import graph_store
 from app.core.llm import client as groq_client
+from app.core.tokens import token_counter
 
 router = APIRouter()
 store = TaskStore()
@@ -17,18 +18,20 @@ class TaskCreateRequest(BaseModel):
     description: str
 
 def _get_project_nodes(project_name: str) -> List[str]:
-    """Finds the _kachow_graph.json for the project and returns all file node IDs."""
+    """Finds the current graph for the project and returns all file node IDs."""
     # Since project_name might just be the visual name, we search all repos
-    pattern = os.path.join(settings.REPO_STORAGE_PATH, "**", "_kachow_graph.json")
-    for filepath in glob.glob(pattern, recursive=True):
+    for repo_name in graph_store.projects():
+        filepath = graph_store.graph_path(repo_name)
+        if not filepath:
+            continue
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                graph = json.load(f)
-                # Match by explicit repo_name (folder) or project_name
-                folder_name = os.path.basename(os.path.dirname(filepath))
-                if graph.get("project_name") == project_name or folder_name == project_name:
-                    nodes = graph.get("nodes", [])
-                    return [n["id"] for n in nodes if n.get("type") == "file"]
+            # Match by explicit repo_name or project_name — summary first, nodes only on a match
+            summary = graph_registry.summary(filepath)
+            if summary.get("project_name") == project_name or repo_name == project_name:
+                return graph_registry.derive(
+                    filepath, "file_ids",
+                    lambda graph: [n["id"] for n in graph.get("nodes", []) if n.get("type") == "file"],
+                )
         except Exception:
             continue
     return []
@@ -55,7 +58,7 @@ async def create_task(req: TaskCreateRequest):
 
     # Prompt the LLM to select nodes
     # We truncate the list of nodes if it's too huge to fit in context, but typically a file list is fine
-    nodes_str = "\n".join(valid_nodes[:1000]) # limit to 1000 files for safety
+    nodes_str = "\n".join(token_counter.pack(valid_nodes, settings.PROMPT_TOKEN_BUDGET))
     
     prompt = f"""
 You are an expert technical project manager and software architect.
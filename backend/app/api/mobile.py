@@ -4,8 +4,6 @@ All data is sourced from live backend systems.
 No existing web-dashboard routes or agent logic is modified here.
 """
 import os
-import json
-import glob
 import uuid
 from datetime import datetime
 from typing import List, Dict, Any, Optional
@@ -15,6 +13,9 @@ from pydantic import BaseModel
 
 from app.core.alerts import alert_system
 from app.core.config import settings
+from app.core import graph_cache
+from app.core.graph_registry import graph_registry
+from app.core.graph_store import graph_store
 
 router = APIRouter()
 
@@ -38,46 +39,40 @@ def _load_graph(repo_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
     Returns None if no repos have been scanned yet.
     """
     if repo_name:
-        specific = os.path.join(settings.REPO_STORAGE_PATH, repo_name, "_kachow_graph.json")
-        if os.path.exists(specific):
+        specific = graph_store.graph_path(repo_name)
+        if specific and graph_cache.has_graph(specific):
             try:
-                with open(specific, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                return graph_registry.get(specific)
             except Exception:
                 pass
     # Fall back to most recently modified graph
-    pattern = os.path.join(settings.REPO_STORAGE_PATH, "**", "_kachow_graph.json")
-    files = glob.glob(pattern, recursive=True)
+    files = [p for p in (graph_store.graph_path(name) for name in graph_store.projects()) if p]
     if not files:
         return None
     latest = max(files, key=os.path.getmtime)
     try:
-        with open(latest, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return graph_registry.get(latest)
     except Exception:
         return None
 
 
 def _list_all_projects() -> List[Dict[str, Any]]:
     """
-    Scan storage/repos/ and return metadata for every repo that has a processed graph.
+    Return metadata for every repo that has a processed graph (its current branch/commit).
     """
     projects = []
-    storage_root = settings.REPO_STORAGE_PATH
-    if not os.path.isdir(storage_root):
-        return projects
-    for entry in sorted(os.listdir(storage_root)):
-        repo_dir = os.path.join(storage_root, entry)
-        graph_file = os.path.join(repo_dir, "_kachow_graph.json")
-        if not os.path.isfile(graph_file):
+    for entry in graph_store.projects():
+        slot = graph_store.current(entry)
+        if slot is None:
             continue
+        repo_dir = os.path.join(settings.REPO_STORAGE_PATH, entry)
         try:
-            with open(graph_file, "r", encoding="utf-8") as f:
-                graph = json.load(f)
+            graph = graph_registry.summary(slot.graph_path)
             projects.append({
                 "name": graph.get("project_name", entry),
                 "repo_name": entry,          # folder name in storage/repos/
-                "branch": graph.get("branch", "main"),
+                "branch": graph.get("branch", slot.branch),
+                "commit": slot.commit,
                 "total_files": graph.get("total_files", 0),
                 "documented_ratio": graph.get("documented_ratio", 0.0),
                 "processed_at": graph.get("processed_at", ""),
@@ -358,7 +353,8 @@ async def store_import_repo(body: ImportRepoRequest):
         # Create minimal graph JSON to satisfy _list_all_projects
         repo_dir = os.path.join(settings.REPO_STORAGE_PATH, repo_name)
         os.makedirs(repo_dir, exist_ok=True)
-        graph_file = os.path.join(repo_dir, "_kachow_graph.json")
+        slot = graph_store.slot(repo_name, body.branch, None).ensure()
+        graph_file = slot.graph_path
         
         now = datetime.now().isoformat()
         graph_data = {
@@ -374,8 +370,8 @@ async def store_import_repo(body: ImportRepoRequest):
             "edges": []
         }
         
-        with open(graph_file, "w", encoding="utf-8") as f:
-            json.dump(graph_data, f, indent=2)
+        graph_registry.store(graph_file, graph_data, indent=2)
+        graph_store.set_current(slot)
 
         alert_system.add_alert(
             title=f"Mobile Repo Linked: {repo_name}",
@@ -440,7 +436,7 @@ async def store_repo_status(repo_name: str):
 
 
 @router.get("/store/repos/{repo_name}/dashboard")
-async def store_repo_dashboard(repo_name: str):
+def store_repo_dashboard(repo_name: str):
     """
     Full per-repo dashboard: health metrics + commit history + PRs.
     Calls the Librarian service directly so the data is always live.
@@ -0,0 +1,262 @@
+"""
+Code Facts — one AST traversal per Python file version, shared by every reader.
+
+The Librarian parse, GuardianService.structural_audit and the CI gate
+(.github/workflows/guardian_check.py) all need the same structural facts.
+`CodeFactsVisitor` produces them in a single visit:
+
+  - imports   : dotted import targets (`import a.b`, `from a import b` -> a, a.b)
+  - defs      : [qualname, kind, start, end, documented, complexity] for every
+                class / function / method, nested ones included
+  - counts    : functions, documented functions, classes
+  - complexity: cyclomatic complexity per def (branches attributed to the
+                innermost function, the rest to the module)
+  - symbols   : import bindings and the outbound refs of each scope, filtered
+                to names that can leave it (see librarian/symbols.py)
+
+`analyze_source` memoizes results by content hash, so the same file version
+is parsed once per process no matter how many consumers ask.
+
+Stdlib only: the CI script loads this file directly, without the backend's
+dependencies installed.
+"""
+import ast
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set
+
+MODULE = "<module>"
+# Bump when the facts produced for the same source change (invalidates persisted results)
+FACTS_VERSION = 1
+
+# Memoized file versions per process
+CACHE_SIZE = int(os.getenv("CODE_FACTS_CACHE_SIZE", 4096))
+
+
+def _dotted(node: ast.AST) -> Optional[str]:
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+# ── Visitor ───────────────────────────────────────────────────────────────────
+
+class CodeFactsVisitor(ast.NodeVisitor):
+    """Imports, defs, docstring coverage, complexity and symbol refs in one visit."""
+
+    def __init__(self):
+        self.imports: List[str] = []
+        self.defs: List[List[Any]] = []
+        self.bindings: Dict[str, str] = {}
+        self.module_complexity = 1
+        self._refs: Dict[str, Set[str]] = {}
+        self._scope: List[str] = []
+        self._kinds: List[str] = []
+        self._functions: List[List[Any]] = []   # open function defs (innermost last)
+
+    # Imports
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            self.imports.append(alias.name)
+            if alias.asname:
+                self.bindings[alias.asname] = alias.name
+            else:
+                head = alias.name.split(".")[0]
+                self.bindings[head] = head
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.module:
+            self.imports.append(node.module)
+            for alias in node.names:
+                self.imports.append(f"{node.module}.{alias.name}")
+                if alias.name != "*":
+                    self.bindings[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+
+    # Definitions
+    def _visit_def(self, node, kind: str):
+        qualname = ".".join(self._scope + [node.name])
+        end = getattr(node, "end_lineno", None) or node.lineno
+        record = [qualname, kind, node.lineno, end, ast.get_docstring(node) is not None, 1]
+        self.defs.append(record)
+        # decorators, bases and defaults are evaluated in the enclosing scope
+        for expr in node.decorator_list:
+            self.visit(expr)
+        if isinstance(node, ast.ClassDef):
+            for expr in node.bases + [k.value for k in node.keywords]:
+                self.visit(expr)
+        else:
+            for expr in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+                self.visit(expr)
+        self._scope.append(node.name)
+        self._kinds.append(kind)
+        if kind != "class":
+            self._functions.append(record)
+        for stmt in node.body:
+            self.visit(stmt)
+        if kind != "class":
+            self._functions.pop()
+        self._scope.pop()
+        self._kinds.pop()
+
+    def visit_FunctionDef(self, node):
+        self._visit_def(node, "method" if self._kinds and self._kinds[-1] == "class" else "function")
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self._visit_def(node, "class")
+
+    # Complexity (decision points)
+    def _branch(self, node: ast.AST, weight: int = 1):
+        if self._functions:
+            self._functions[-1][5] += weight
+        else:
+            self.module_complexity += weight
+        self.generic_visit(node)
+
+    def visit_If(self, node):
+        self._branch(node)
+
+    visit_For = visit_AsyncFor = visit_While = visit_IfExp = visit_ExceptHandler = visit_If
+    visit_match_case = visit_If
+
+    def visit_BoolOp(self, node: ast.BoolOp):
+        self._branch(node, len(node.values) - 1)
+
+    def visit_comprehension(self, node: ast.comprehension):
+        self._branch(node, 1 + len(node.ifs))
+
+    # References
+    def _ref(self, dotted: str):
+        scope = ".".join(self._scope) or MODULE
+        self._refs.setdefault(scope, set()).add(dotted)
+
+    def visit_Attribute(self, node: ast.Attribute):
+        dotted = _dotted(node)
+        if dotted is not None and isinstance(node.ctx, ast.Load):
+            self._ref(dotted)
+        else:
+            self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name):
+        if isinstance(node.ctx, ast.Load):
+            self._ref(node.id)
+
+    def refs(self) -> List[List[str]]:
+        top_level = {d[0] for d in self.defs if "." not in d[0]}
+        keep = set(self.bindings) | top_level | {"self", "cls"}
+        return [
+            [scope, dotted]
+            for scope, names in self._refs.items()
+            for dotted in sorted(names)
+            if dotted.split(".", 1)[0] in keep and (not dotted.startswith(("self", "cls")) or "." in dotted)
+        ]
+
+
+# ── Facts ─────────────────────────────────────────────────────────────────────
+
+class CodeFacts:
+    """Read-only result for one file version (shared via the memo; do not mutate)."""
+
+    __slots__ = ("digest", "parsed", "error", "imports", "defs", "bindings", "refs", "module_complexity")
+
+    def __init__(self, digest: str):
+        self.digest = digest
+        self.parsed = False
+        self.error: Optional[Dict[str, Any]] = None     # {"msg", "lineno"}: no filename, the memo is shared
+        self.imports: List[str] = []
+        self.defs: List[List[Any]] = []
+        self.bindings: Dict[str, str] = {}
+        self.refs: List[List[str]] = []
+        self.module_complexity = 0
+
+    def error_message(self, filename: str) -> str:
+        """The parse error worded like str(SyntaxError), for the caller's own filename."""
+        if self.error is None:
+            return ""
+        if self.error["lineno"]:
+            return f"{self.error['msg']} ({filename}, line {self.error['lineno']})"
+        return self.error["msg"]
+
+    def functions(self) -> List[List[Any]]:
+        return [d for d in self.defs if d[1] != "class"]
+
+    def classes(self) -> List[List[Any]]:
+        return [d for d in self.defs if d[1] == "class"]
+
+    @property
+    def total_functions(self) -> int:
+        return len(self.functions())
+
+    @property
+    def documented_functions(self) -> int:
+        return sum(1 for d in self.functions() if d[4])
+
+    @property
+    def max_complexity(self) -> int:
+        return max([d[5] for d in self.functions()] + [self.module_complexity])
+
+    def symbols(self) -> Dict[str, Any]:
+        """Symbol-layer facts in the SymbolIndex file format."""
+        return {"defs": [d[:4] for d in self.defs], "refs": self.refs, "bindings": self.bindings}
+
+
+def facts_from_tree(tree: ast.AST, digest: str = "") -> CodeFacts:
+    visitor = CodeFactsVisitor()
+    visitor.visit(tree)
+    facts = CodeFacts(digest)
+    facts.parsed = True
+    facts.imports = visitor.imports
+    facts.defs = visitor.defs
+    facts.bindings = visitor.bindings
+    facts.refs = visitor.refs()
+    facts.module_complexity = visitor.module_complexity
+    return facts
+
+
+# ── Memo ──────────────────────────────────────────────────────────────────────
+
+_memo: "OrderedDict[str, CodeFacts]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def content_digest(source: str) -> str:
+    return hashlib.sha1(source.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def analyze_source(source: str, filename: str = "<unknown>") -> CodeFacts:
+    """Facts for `source`, parsed at most once per content hash (memo is per process)."""
+    digest = content_digest(source)
+    with _memo_lock:
+        facts = _memo.get(digest)
+        if facts is not None:
+            _memo.move_to_end(digest)
+            return facts
+
+    facts = CodeFacts(digest)
+    try:
+        tree = ast.parse(source, filename=filename)
+    except SyntaxError as e:
+        facts.error = {"msg": e.msg, "lineno": e.lineno or 0}
+    except ValueError as e:     # e.g. null bytes
+        facts.error = {"msg": str(e), "lineno": 0}
+    else:
+        facts = facts_from_tree(tree, digest)
+
+    with _memo_lock:
+        _memo[digest] = facts
+        while len(_memo) > CACHE_SIZE:
+            _memo.popitem(last=False)
+    return facts
+
+
+def clear_cache():
+    with _memo_lock:
+        _memo.clear()
@@ -10,6 +10,9 @@ class Settings:
     # AI
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
     LLM_MODEL: str = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+    # Context window and completion cap of LLM_MODEL (llama-3.3-70b-versatile on Groq: 128k / 32k)
+    LLM_CONTEXT_TOKENS: int = int(os.getenv("LLM_CONTEXT_TOKENS", 131072))
+    LLM_MAX_COMPLETION_TOKENS: int = int(os.getenv("LLM_MAX_COMPLETION_TOKENS", 32768))
 
     # Jira Integration
     JIRA_URL: str = os.getenv("JIRA_URL", "")
@@ -29,18 +32,60 @@ class Settings:
     BASE_DIR: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     REPO_STORAGE_PATH: str = os.path.join(BASE_DIR, "storage", "repos")
     VECTOR_DB_PATH: str = os.path.join(BASE_DIR, "storage", "chromadb")
+    GRAPH_STORE_PATH: str = os.path.join(BASE_DIR, "storage", "graphs")
+    SCAN_METRICS_PATH: str = os.path.join(BASE_DIR, "storage", "scan_metrics.jsonl")
+    ANALYSIS_CACHE_PATH: str = os.path.join(BASE_DIR, "storage", "analysis_cache.sqlite3")
 
     # Librarian Pipeline Tuning
     CHUNK_TOKEN_LIMIT: int = 400
+    # Token counting — HF tokenizer.json (exact, offline), else a cached tiktoken encoding, else a regex estimate
+    TOKENIZER_PATH: str = os.getenv("TOKENIZER_PATH", "")
+    TOKENIZER_ENCODING: str = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", 16384))
+    # Prompt packing — tokens of repo context (files, graphs, docs) one prompt may carry
+    PROMPT_TOKEN_BUDGET: int = int(os.getenv("PROMPT_TOKEN_BUDGET", 6000))
+    # Content-defined chunking — expected lines between hash boundaries, lines repeated from the previous chunk
+    CHUNK_AVG_LINES: int = int(os.getenv("CHUNK_AVG_LINES", 24))
+    CHUNK_OVERLAP_LINES: int = int(os.getenv("CHUNK_OVERLAP_LINES", 0))
     SUPPORTED_EXTENSIONS: set = {
         ".py", ".js", ".ts", ".tsx", ".jsx", ".java", ".go",
         ".rb", ".cpp", ".c", ".html", ".css", ".json",
-        ".md", ".yaml", ".yml", ".toml", ".txt"
+        ".md", ".yaml", ".yml", ".toml", ".txt",
+        ".h", ".hpp", ".cc", ".hh", ".mod"
     }
     SKIP_DIRS: set = {
         ".git", "node_modules", "venv", ".venv", "env", "__pycache__",
-        "dist", "build", ".idea", ".vscode", "target", "out", "coverage"
+        "dist", "build", ".idea", ".vscode", "target", "out", "coverage", ".next"
     }
+    # Tree walk filter — generated files, size cap, binary sniff (see core/path_filter.py)
+    SKIP_FILE_PATTERNS: set = {
+        "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Pipfile.lock",
+        "*.min.js", "*.min.css", "*.map", "*.bundle.js",
+    }
+    MAX_INDEX_FILE_BYTES: int = int(os.getenv("MAX_INDEX_FILE_BYTES", 1024 * 1024))
+    BINARY_SNIFF_BYTES: int = int(os.getenv("BINARY_SNIFF_BYTES", 1024))
+    # File inventory — how long one walk is reused by the analyzer / Guardian
+    FILE_INVENTORY_TTL_S: int = int(os.getenv("FILE_INVENTORY_TTL_S", 300))
+    # Parse stage — process pool size for AST analysis (1 = serial, in-process)
+    LIBRARIAN_PARSE_WORKERS: int = int(os.getenv("LIBRARIAN_PARSE_WORKERS", os.cpu_count() or 1))
+    LIBRARIAN_PARALLEL_MIN_FILES: int = int(os.getenv("LIBRARIAN_PARALLEL_MIN_FILES", 64))
+    # Parse results cached by content hash across scans, LRU-capped (0 disables)
+    ANALYSIS_CACHE_MAX_MB: int = int(os.getenv("ANALYSIS_CACHE_MAX_MB", 256))
+    # Symbol layer (defs, spans, call refs) for Python, built in the parse stage
+    LIBRARIAN_SYMBOLS: bool = os.getenv("LIBRARIAN_SYMBOLS", "1") != "0"
+    # Embed stage — chunks per vector-store batch and max items queued between stages
+    LIBRARIAN_EMBED_BATCH: int = int(os.getenv("LIBRARIAN_EMBED_BATCH", 256))
+    LIBRARIAN_PIPELINE_DEPTH: int = int(os.getenv("LIBRARIAN_PIPELINE_DEPTH", 8))
+    # Vector store ingestion — chunks per embed / insert call (batch N+1 embeds while N inserts)
+    VECTOR_UPSERT_BATCH: int = int(os.getenv("VECTOR_UPSERT_BATCH", 128))
+    # Background scan jobs (embed, docs) — fixed worker pool size
+    LIBRARIAN_SCAN_WORKERS: int = int(os.getenv("LIBRARIAN_SCAN_WORKERS", 2))
+    # Graph registry — memory budget for parsed graphs shared across agents
+    GRAPH_REGISTRY_BUDGET_MB: int = int(os.getenv("GRAPH_REGISTRY_BUDGET_MB", 256))
+    # Graph store — scanned (branch, commit) slots kept per project
+    GRAPH_STORE_MAX_SLOTS: int = int(os.getenv("GRAPH_STORE_MAX_SLOTS", 8))
+    # Remote clones — "shallow" (depth 1), "blobless" (full history, blobs fetched on demand) or "full"
+    LIBRARIAN_CLONE_STRATEGY: str = os.getenv("LIBRARIAN_CLONE_STRATEGY", "shallow")
 
 settings = Settings()
 
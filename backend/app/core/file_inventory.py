@@ -0,0 +1,270 @@
+"""
+File Inventory — one filtered walk per (project, commit), shared by every reader.
+
+The Librarian graph build, LocalCodeAnalyzer and the Guardian used to walk the
+same tree separately, each with its own skip set. Now one PathFilter walk
+builds a FileInventory (path, size, mtime, language, content hash), and the
+registry below hands it to whoever asks next for the same project and commit.
+
+Freshness:
+  - keyed by (project root, HEAD commit), so a pull or checkout misses
+  - entries older than FILE_INVENTORY_TTL_S are rebuilt (uncommitted edits)
+  - writers refresh explicitly: a Librarian scan rebuilds, Guardian saves
+    call `touch()` for the one file they wrote
+Hashes are filled in by whoever already read the file (the Librarian parse)
+and computed lazily otherwise.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from git import Repo
+
+from app.core.config import settings
+from app.core.git_objects import GitTree
+from app.core.path_filter import PathFilter
+
+EXT_LANG: Dict[str, str] = {
+    ".py": "python", ".js": "javascript", ".ts": "typescript",
+    ".tsx": "typescript", ".jsx": "javascript", ".java": "java",
+    ".go": "go", ".rb": "ruby", ".cpp": "cpp", ".c": "c",
+    ".cc": "cpp", ".hpp": "cpp", ".hh": "cpp", ".h": "c",
+    ".html": "html", ".css": "css", ".json": "json",
+    ".md": "markdown", ".yaml": "yaml", ".yml": "yaml", ".toml": "toml",
+}
+
+
+def language_for(ext: str) -> str:
+    return EXT_LANG.get(ext.lower(), "text")
+
+
+def head_commit(project_root: str) -> Optional[str]:
+    """HEAD sha of the repo containing project_root, or None for plain folders."""
+    try:
+        return Repo(project_root, search_parent_directories=True).head.commit.hexsha
+    except Exception:
+        return None
+
+
+def file_digest(full_path: str) -> str:
+    """sha1 of the raw file bytes (same digest analysis.read_source returns)."""
+    h = hashlib.sha1()
+    try:
+        with open(full_path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+    except OSError:
+        return ""
+    return h.hexdigest()
+
+
+# ── Inventory ─────────────────────────────────────────────────────────────────
+
+class InventoryEntry:
+    __slots__ = ("rel_path", "full_path", "ext", "size", "mtime_ns", "language", "sha1")
+
+    def __init__(self, rel_path: str, full_path: str, size: int, mtime_ns: int, sha1: Optional[str] = None):
+        self.rel_path = rel_path
+        self.full_path = full_path
+        self.ext = os.path.splitext(rel_path)[1]
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.language = language_for(self.ext)
+        self.sha1 = sha1
+
+
+class FileInventory:
+    """Every indexable file under `root`, grouped by directory in walk order."""
+
+    def __init__(self, root: str, commit: Optional[str]):
+        self.root = root
+        self.commit = commit
+        self.built_at = time.time()
+        self.files: Dict[str, InventoryEntry] = {}
+        self.dirs: List[Tuple[str, str, List[str]]] = []    # (dirpath, rel_dir, rel_paths)
+        self.filter_stats: Dict[str, int] = {}
+
+    @classmethod
+    def build(
+        cls,
+        root: str,
+        commit: Optional[str] = None,
+        trusted: Optional[Callable[[str, os.stat_result], bool]] = None,
+    ) -> "FileInventory":
+        """One PathFilter walk over SUPPORTED_EXTENSIONS (see PathFilter.walk for `trusted`)."""
+        inventory = cls(root, commit)
+        path_filter = PathFilter(root, extensions=settings.SUPPORTED_EXTENSIONS)
+        for dirpath, rel_dir, walked in path_filter.walk(trusted):
+            rel_paths = []
+            for _, full_path, rel_path, st in walked:
+                inventory.files[rel_path] = InventoryEntry(rel_path, full_path, st.st_size, st.st_mtime_ns)
+                rel_paths.append(rel_path)
+            inventory.dirs.append((dirpath, rel_dir, rel_paths))
+        inventory.filter_stats = path_filter.stats
+        return inventory
+
+    @classmethod
+    def from_tree(
+        cls,
+        tree: GitTree,
+        trusted: Optional[Callable[[str, str], bool]] = None,
+        hold: Optional[Callable[[str], bool]] = None,
+    ) -> "FileInventory":
+        """
+        The same filtered view of one commit, listed from the object database.
+        full_path is where the file would sit in a checkout; mtime_ns is 0.
+        See PathFilter.walk_tree for `trusted` and `hold`.
+        """
+        inventory = cls(tree.repo_path, tree.commit)
+        path_filter = PathFilter(tree.repo_path, extensions=settings.SUPPORTED_EXTENSIONS)
+        for rel_dir, walked in path_filter.walk_tree(tree, trusted, hold):
+            rel_paths = []
+            for _, rel_path, _, size in walked:
+                inventory.files[rel_path] = InventoryEntry(rel_path, os.path.join(tree.repo_path, rel_path), size, 0)
+                rel_paths.append(rel_path)
+            inventory.dirs.append((os.path.join(tree.repo_path, rel_dir) if rel_dir else tree.repo_path, rel_dir, rel_paths))
+        inventory.filter_stats = path_filter.stats
+        return inventory
+
+    def walk(self) -> Iterator[Tuple[str, str, List[InventoryEntry]]]:
+        """(dirpath, rel_dir, entries) top-down, like PathFilter.walk; rel_dir "" is the root."""
+        for dirpath, rel_dir, rel_paths in self.dirs:
+            yield dirpath, rel_dir, [self.files[p] for p in rel_paths if p in self.files]
+
+    def paths(self, extensions: Optional[Iterable[str]] = None) -> List[str]:
+        """Full paths, optionally limited to some extensions."""
+        exts = set(extensions) if extensions is not None else None
+        return [e.full_path for e in self.files.values() if exts is None or e.ext in exts]
+
+    def get(self, rel_path: str) -> Optional[InventoryEntry]:
+        return self.files.get(rel_path.replace("\\", "/"))
+
+    def sha1(self, rel_path: str) -> str:
+        entry = self.files[rel_path]
+        if entry.sha1 is None:
+            entry.sha1 = file_digest(entry.full_path)
+        return entry.sha1
+
+    def set_hash(self, rel_path: str, sha1: str):
+        entry = self.files.get(rel_path)
+        if entry is not None and sha1:
+            entry.sha1 = sha1
+
+    def relative(self, path: str) -> Optional[str]:
+        """rel_path for an absolute or root-relative path inside this inventory, else None."""
+        path = path.replace("\\", "/")
+        if path in self.files:
+            return path
+        root = os.path.normcase(os.path.abspath(self.root))
+        full = os.path.normcase(os.path.abspath(path))
+        if full.startswith(root + os.sep):
+            rel = os.path.relpath(os.path.abspath(path), os.path.abspath(self.root)).replace("\\", "/")
+            return rel if rel in self.files else None
+        return None
+
+    def touch(self, rel_path: str):
+        """
+        Re-stat one file after a write: adds it if the same PathFilter rules
+        as build() admit it, drops it if it vanished or no longer qualifies
+        (ignored, unsupported, oversized, binary).
+        """
+        full_path = os.path.join(self.root, rel_path)
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            self.files.pop(rel_path, None)
+            return
+        if not PathFilter(self.root, extensions=settings.SUPPORTED_EXTENSIONS).admits(rel_path):
+            self.files.pop(rel_path, None)
+            return
+        existed = rel_path in self.files
+        self.files[rel_path] = InventoryEntry(rel_path, full_path, st.st_size, st.st_mtime_ns)
+        if not existed:
+            rel_dir = rel_path.rsplit("/", 1)[0] if "/" in rel_path else ""
+            for _, d, rel_paths in self.dirs:
+                if d == rel_dir:
+                    rel_paths.append(rel_path)
+                    break
+            else:
+                self.dirs.append((os.path.dirname(full_path), rel_dir, [rel_path]))
+
+
+# ── Registry ──────────────────────────────────────────────────────────────────
+
+class InventoryRegistry:
+    """Recently built inventories keyed by (project root, commit)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 16):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], FileInventory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _root_key(root: str) -> str:
+        return os.path.normcase(os.path.abspath(root))
+
+    def build(
+        self,
+        root: str,
+        commit: Optional[str] = None,
+        trusted: Optional[Callable[[str, os.stat_result], bool]] = None,
+    ) -> FileInventory:
+        """Always walk, then publish the result for later readers."""
+        inventory = FileInventory.build(root, commit, trusted)
+        key = (self._root_key(root), commit)
+        with self._lock:
+            for stale in [k for k in self._entries if k[0] == key[0]]:
+                del self._entries[stale]
+            self._entries[key] = inventory
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        print(f"[Inventory] {root}@{(commit or 'worktree')[:8]}: {len(inventory.files)} files {inventory.filter_stats}")
+        return inventory
+
+    def get(self, root: str, commit: Optional[str] = None) -> FileInventory:
+        """Cached inventory for root at `commit` (default: current HEAD), built on miss."""
+        if commit is None:
+            commit = head_commit(root)
+        key = (self._root_key(root), commit)
+        with self._lock:
+            inventory = self._entries.get(key)
+            if inventory is not None and time.time() - inventory.built_at <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                return inventory
+        return self.build(root, commit)
+
+    def peek(self, root: str) -> Optional[FileInventory]:
+        """Newest inventory for root regardless of commit/age (no walk)."""
+        root_key = self._root_key(root)
+        with self._lock:
+            for (r, _), inventory in reversed(self._entries.items()):
+                if r == root_key:
+                    return inventory
+        return None
+
+    def touch(self, full_path: str):
+        """A file was written: refresh its entry in any inventory that covers it."""
+        with self._lock:
+            inventories = list(self._entries.values())
+        for inventory in inventories:
+            root = os.path.abspath(inventory.root)
+            full = os.path.abspath(full_path)
+            if os.path.normcase(full).startswith(os.path.normcase(root) + os.sep):
+                inventory.touch(os.path.relpath(full, root).replace("\\", "/"))
+
+    def invalidate(self, root: Optional[str] = None):
+        with self._lock:
+            if root is None:
+                self._entries.clear()
+                return
+            root_key = self._root_key(root)
+            for key in [k for k in self._entries if k[0] == root_key]:
+                del self._entries[key]
+
+
+# Singleton — shared by the Librarian, LocalCodeAnalyzer and Guardian
+file_inventories = InventoryRegistry(settings.FILE_INVENTORY_TTL_S)
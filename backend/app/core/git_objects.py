@@ -0,0 +1,293 @@
+"""
+Git Objects — read trees and blobs straight from a repository's object database.
+
+Scanning a branch or an old commit used to mean `checkout` in the shared
+worktree. Instead, a GitTree lists a commit with one `git ls-tree -r -l` and
+reads file contents through a persistent `git cat-file --batch` process:
+no worktree I/O, no mutation, so any number of refs can be scanned at once.
+
+  - GitObjectReader   one long-lived cat-file process per (repo, process),
+                      thread-safe; `read_many` pipelines requests
+  - GitTree           (commit, rel_path -> blob) view with read_bytes/read_text,
+                      accepted anywhere the Librarian reads config files
+
+Partial (blobless) clones: listing a commit never downloads anything, and
+`GitTree.hydrate` fetches the blobs a scan keeps in one batched request
+instead of git's one-round-trip-per-object lazy fetch.
+  - git_readers       registry handing out the shared reader for a repo
+"""
+import os
+import subprocess
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+_BLOB_MODES = ("100644", "100755")      # regular files; skips symlinks (120000) and submodules
+
+
+class GitObjectError(RuntimeError):
+    pass
+
+
+class GitObjectReader:
+    """A `git cat-file --batch` process for one repository."""
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._promisor: Optional[str] = None
+        # blobs a binary sniff found to be text; content-addressed, so true for good
+        self.text_blobs: Set[str] = set()
+
+    def _git(self, *args: str, stdin: Optional[bytes] = None) -> bytes:
+        result = subprocess.run(
+            ["git", "-C", self.repo_path, *args],
+            input=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False,
+        )
+        if result.returncode != 0:
+            raise GitObjectError(result.stderr.decode("utf-8", "replace").strip() or f"git {args[0]} failed")
+        return result.stdout
+
+    def _batch(self) -> subprocess.Popen:
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                ["git", "-C", self.repo_path, "cat-file", "--batch"],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            )
+        return self._proc
+
+    # ── Refs and trees ────────────────────────────────────────────────────────
+
+    def rev_parse(self, ref: str) -> Optional[str]:
+        """Commit sha for a branch, tag, remote ref or sha; None if unknown."""
+        try:
+            return self._git("rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}").decode().strip() or None
+        except GitObjectError:
+            return None
+
+    def ls_tree(self, commit: str) -> List[Tuple[str, str, int]]:
+        """
+        (rel_path, blob sha, size) for every regular file in the commit, paths
+        relative to repo_path. Partial clones report size -1: asking would
+        lazily fetch each blob (see GitTree.hydrate).
+        """
+        sized = self.promisor_remote() is None
+        args = ["ls-tree", "-r", "-z"] + (["-l"] if sized else []) + [commit]
+        entries = []
+        for record in self._git(*args).split(b"\0"):
+            if not record:
+                continue
+            meta, _, path = record.partition(b"\t")
+            fields = meta.split()
+            mode, kind, sha = fields[:3]
+            if kind != b"blob" or mode.decode() not in _BLOB_MODES:
+                continue
+            entries.append((path.decode("utf-8", "surrogateescape"), sha.decode(), int(fields[3]) if sized else -1))
+        return entries
+
+    # ── Partial clones ────────────────────────────────────────────────────────
+
+    def promisor_remote(self) -> Optional[str]:
+        """Remote that lazily serves missing objects, None for complete clones."""
+        if self._promisor is None:
+            self._promisor = ""
+            try:
+                out = self._git("config", "--bool", "--get-regexp", r"^remote\..*\.promisor$").decode()
+            except GitObjectError:
+                out = ""        # no promisor remotes configured
+            for line in out.splitlines():
+                key, _, value = line.partition(" ")
+                if value == "true":
+                    self._promisor = key[len("remote."):-len(".promisor")]
+                    break
+        return self._promisor or None
+
+    def missing(self, commit: str) -> Set[str]:
+        """
+        Objects of the commit's own tree that are not in the local object
+        database. Walks the tree only, never history; `--missing=print`
+        reports absent blobs without lazily fetching them.
+        """
+        if self.promisor_remote() is None:
+            return set()
+        out = self._git("rev-list", "--objects", "--no-object-names", "--missing=print", f"{commit}^{{tree}}")
+        return {line[1:].decode() for line in out.splitlines() if line.startswith(b"?")}
+
+    def prefetch(self, shas: Iterable[str]):
+        """Fetch these objects from the promisor remote in one request."""
+        remote = self.promisor_remote()
+        shas = sorted(set(shas))
+        if remote is None or not shas:
+            return
+        self._git(
+            "-c", "fetch.negotiationAlgorithm=noop", "fetch", remote, "--no-tags",
+            "--no-write-fetch-head", "--recurse-submodules=no", "--filter=blob:none", "--stdin",
+            stdin="\n".join(shas).encode() + b"\n",
+        )
+        print(f"[GitObjects] fetched {len(shas)} blobs from {remote}")
+
+    def sizes(self, shas: Iterable[str]) -> Dict[str, int]:
+        shas = list(shas)
+        if not shas:
+            return {}
+        out = self._git("cat-file", "--batch-check", stdin="\n".join(shas).encode() + b"\n")
+        sizes = {}
+        for line in out.splitlines():
+            parts = line.split()
+            if len(parts) == 3:
+                sizes[parts[0].decode()] = int(parts[2])
+        return sizes
+
+    # ── Blobs ─────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _read_one(out) -> Tuple[str, Optional[bytes]]:
+        header = out.readline()
+        if not header:
+            raise GitObjectError("cat-file exited")
+        parts = header.split()
+        if len(parts) < 3 or parts[1] == b"missing":
+            return parts[0].decode(), None
+        data = out.read(int(parts[2]))
+        out.read(1)     # trailing LF
+        return parts[0].decode(), data
+
+    def read(self, sha: str) -> Optional[bytes]:
+        with self._lock:
+            proc = self._batch()
+            try:
+                proc.stdin.write(sha.encode() + b"\n")
+                proc.stdin.flush()
+                return self._read_one(proc.stdout)[1]
+            except (OSError, GitObjectError):
+                self._kill()
+                raise
+
+    def read_many(self, shas: Iterable[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """Pipelined reads: a feeder thread writes requests while results stream back."""
+        shas = list(shas)
+        with self._lock:
+            proc = self._batch()
+
+            def _feed():
+                try:
+                    for sha in shas:
+                        proc.stdin.write(sha.encode() + b"\n")
+                    proc.stdin.flush()
+                except OSError:
+                    pass
+            feeder = threading.Thread(target=_feed, daemon=True)
+            feeder.start()
+            done = 0
+            try:
+                for _ in shas:
+                    yield self._read_one(proc.stdout)
+                    done += 1
+            finally:
+                if done < len(shas):
+                    self._kill()       # abandoned mid-stream: the pipe holds unread replies
+                feeder.join()
+
+    def _kill(self):
+        if self._proc is not None:
+            try:
+                self._proc.kill()
+                self._proc.wait(timeout=5)
+            except Exception:
+                pass
+            self._proc = None
+
+    def close(self):
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                try:
+                    self._proc.stdin.close()
+                    self._proc.wait(timeout=5)
+                except Exception:
+                    self._kill()
+            self._proc = None
+
+
+class GitTree:
+    """One commit's files, read from the object database."""
+
+    def __init__(self, reader: GitObjectReader, commit: str, entries: Iterable[Tuple[str, str, int]]):
+        self.reader = reader
+        self.repo_path = reader.repo_path
+        self.commit = commit
+        self.blobs: Dict[str, Tuple[str, int]] = {path: (sha, size) for path, sha, size in entries}
+        self._held: Dict[str, bytes] = {}      # blob sha -> bytes already read, for the next read_bytes
+
+    @classmethod
+    def from_ref(cls, reader: GitObjectReader, ref: str) -> "GitTree":
+        commit = reader.rev_parse(ref)
+        if commit is None:
+            raise GitObjectError(f"Unknown ref: {ref}")
+        return cls(reader, commit, reader.ls_tree(commit))
+
+    def restrict(self, included) -> "GitTree":
+        """Keep only the paths `included(rel_path)` accepts (e.g. a sparse-checkout cone)."""
+        self.blobs = {p: entry for p, entry in self.blobs.items() if included(p)}
+        return self
+
+    def hydrate(self, rel_paths: Iterable[str]):
+        """Partial clones: batch-fetch the missing blobs of rel_paths and fill in their sizes."""
+        pending = [p for p in rel_paths if self.blobs[p][1] < 0]
+        if not pending:
+            return
+        wanted = {self.blobs[p][0] for p in pending}
+        self.reader.prefetch(self.reader.missing(self.commit) & wanted)
+        sizes = self.reader.sizes(wanted)
+        for p in pending:
+            sha = self.blobs[p][0]
+            self.blobs[p] = (sha, sizes.get(sha, 0))
+
+    def blob(self, rel_path: str) -> Optional[str]:
+        entry = self.blobs.get(rel_path)
+        return entry[0] if entry else None
+
+    def hold(self, sha: str, data: bytes):
+        """Keep bytes read for another purpose (the binary sniff) so the next read of that blob is free."""
+        self._held[sha] = data
+
+    def read_bytes(self, rel_path: str) -> Optional[bytes]:
+        sha = self.blob(rel_path)
+        if not sha:
+            return None
+        data = self._held.pop(sha, None)
+        return data if data is not None else self.reader.read(sha)
+
+    def read_text(self, rel_path: str) -> Optional[str]:
+        data = self.read_bytes(rel_path)
+        return data.decode("utf-8", errors="ignore") if data is not None else None
+
+
+class GitReaderRegistry:
+    """Shared reader per repository (per process: pool workers build their own)."""
+
+    def __init__(self):
+        self._readers: Dict[Tuple[int, str], GitObjectReader] = {}
+        self._lock = threading.Lock()
+
+    def get(self, repo_path: str) -> GitObjectReader:
+        key = (os.getpid(), os.path.normcase(os.path.abspath(repo_path)))
+        with self._lock:
+            reader = self._readers.get(key)
+            if reader is None:
+                reader = self._readers[key] = GitObjectReader(repo_path)
+            return reader
+
+    def invalidate(self, repo_path: Optional[str] = None):
+        with self._lock:
+            if repo_path is None:
+                readers, self._readers = list(self._readers.values()), {}
+            else:
+                root = os.path.normcase(os.path.abspath(repo_path))
+                keys = [k for k in self._readers if k[1] == root]
+                readers = [self._readers.pop(k) for k in keys]
+        for reader in readers:
+            reader.close()
+
+
+# Singleton — one cat-file process per scanned repository
+git_readers = GitReaderRegistry()
@@ -0,0 +1,297 @@
+"""
+Graph Cache — compact binary knowledge-graph cache with lazy, mmap-backed reads.
+All agents read and write the Librarian graph through this module.
+
+`graph.json` stays as a human-readable export; every write also emits
+a sibling `graph.bin`, and readers prefer it. Layout (little-endian):
+
+    header   magic "KGRC", version, counts, section offsets
+    summary  JSON of every top-level field except nodes/edges
+    strings  u32 offset table + UTF-8 blob (every id/label/path interned once)
+    nodes    fixed-size records of string indices (+ size_bytes, extras)
+    index    node record numbers sorted by id, for binary-search lookup
+    edges    (source, target, relation, extras) string indices
+
+Summary fields, counts and single-node lookups touch only the pages they need;
+nothing is decoded until asked for.
+"""
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterator, List, Optional
+
+# ── Format ────────────────────────────────────────────────────────────────────
+MAGIC = b"KGRC"
+VERSION = 1
+NONE = 0xFFFFFFFF
+
+# magic, version, reserved, n_strings, n_nodes, n_edges, n_files,
+# summary_off, summary_len, str_table_off, str_blob_off, nodes_off, index_off, edges_off
+_HEADER = struct.Struct("<4sHHIIIIQQQQQQQ")
+# id, label, type, layer, language, size_bytes (-1 = None), owner, extras (JSON)
+_NODE = struct.Struct("<IIIIIqII")
+# source, target, relation, extras (JSON)
+_EDGE = struct.Struct("<IIII")
+_U32 = struct.Struct("<I")
+
+_NODE_FIELDS = ("id", "label", "type", "layer", "language")
+_EDGE_FIELDS = ("source", "target", "relation")
+
+
+def bin_path_for(json_path: str) -> str:
+    """`.../graph.json` → `.../graph.bin`."""
+    return os.path.splitext(json_path)[0] + ".bin"
+
+
+# ── Writer ────────────────────────────────────────────────────────────────────
+
+class _StringTable:
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return NONE
+        value = str(value)
+        idx = self.index.get(value)
+        if idx is None:
+            idx = self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return idx
+
+
+def encode_graph(data: Dict[str, Any]) -> bytes:
+    """Serialise a GraphResponse-shaped dict into the binary cache format."""
+    strings = _StringTable()
+    nodes = data.get("nodes") or []
+    edges = data.get("edges") or []
+    summary = {k: v for k, v in data.items() if k not in ("nodes", "edges")}
+
+    node_blob = bytearray()
+    for node in nodes:
+        extras = {k: v for k, v in node.items() if k not in _NODE_FIELDS and k not in ("size_bytes", "owner")}
+        size = node.get("size_bytes")
+        node_blob += _NODE.pack(
+            *(strings.add(node.get(f)) for f in _NODE_FIELDS),
+            -1 if size is None else int(size),
+            strings.add(node.get("owner")),
+            strings.add(json.dumps(extras, separators=(",", ":"), default=str)) if extras else NONE,
+        )
+
+    order = sorted(range(len(nodes)), key=lambda i: str(nodes[i].get("id")))
+    index_blob = b"".join(_U32.pack(i) for i in order)
+
+    edge_blob = bytearray()
+    for edge in edges:
+        extras = {k: v for k, v in edge.items() if k not in _EDGE_FIELDS}
+        edge_blob += _EDGE.pack(
+            *(strings.add(edge.get(f)) for f in _EDGE_FIELDS),
+            strings.add(json.dumps(extras, separators=(",", ":"), default=str)) if extras else NONE,
+        )
+
+    summary_blob = json.dumps(summary, separators=(",", ":"), default=str).encode("utf-8")
+    encoded = [s.encode("utf-8") for s in strings.strings]
+    table = bytearray()
+    pos = 0
+    for s in encoded:
+        table += _U32.pack(pos)
+        pos += len(s)
+    table += _U32.pack(pos)
+    str_blob = b"".join(encoded)
+
+    summary_off = _HEADER.size
+    str_table_off = summary_off + len(summary_blob)
+    str_blob_off = str_table_off + len(table)
+    nodes_off = str_blob_off + len(str_blob)
+    index_off = nodes_off + len(node_blob)
+    edges_off = index_off + len(index_blob)
+    header = _HEADER.pack(
+        MAGIC, VERSION, 0,
+        len(encoded), len(nodes), len(edges),
+        sum(1 for n in nodes if n.get("type") == "file"),
+        summary_off, len(summary_blob), str_table_off, str_blob_off, nodes_off, index_off, edges_off,
+    )
+    return b"".join([header, summary_blob, bytes(table), str_blob, bytes(node_blob), index_blob, bytes(edge_blob)])
+
+
+def _atomic_write(path: str, payload: bytes):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+    os.replace(tmp, path)
+
+
+def write_graph(json_path: str, data: Dict[str, Any], indent: Optional[int] = None):
+    """Write the JSON export and its binary sibling (binary last, so it is never older)."""
+    _atomic_write(json_path, json.dumps(data, indent=indent, default=str).encode("utf-8"))
+    _atomic_write(bin_path_for(json_path), encode_graph(data))
+
+
+# ── Reader ────────────────────────────────────────────────────────────────────
+
+class GraphCache:
+    """Read-only, memory-mapped view over a binary graph cache file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+            (magic, version, _, self.string_count, self.node_count, self.edge_count, self.file_count,
+             summary_off, summary_len, self._str_table_off, self._str_blob_off,
+             self._nodes_off, self._index_off, self._edges_off) = _HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Unsupported graph cache format: {path}")
+        except Exception:
+            self.close()
+            raise
+        self._summary_span = (summary_off, summary_len)
+        self._summary: Optional[Dict[str, Any]] = None
+        self._strings: Dict[int, str] = {}
+
+    def close(self):
+        mm = getattr(self, "_mm", None)
+        if mm is not None:
+            mm.close()
+            self._mm = None
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+    def __enter__(self) -> "GraphCache":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── Lazy accessors ────────────────────────────────────────────────────────
+
+    @property
+    def summary(self) -> Dict[str, Any]:
+        """Top-level fields (project_name, branch, total_files, …) without nodes/edges."""
+        if self._summary is None:
+            off, length = self._summary_span
+            self._summary = json.loads(self._mm[off:off + length].decode("utf-8"))
+        return self._summary
+
+    def string(self, idx: int) -> Optional[str]:
+        if idx == NONE:
+            return None
+        value = self._strings.get(idx)
+        if value is None:
+            start, end = struct.unpack_from("<II", self._mm, self._str_table_off + idx * 4)
+            base = self._str_blob_off
+            value = self._strings[idx] = self._mm[base + start:base + end].decode("utf-8")
+        return value
+
+    def _node_at(self, i: int) -> Dict[str, Any]:
+        rec = _NODE.unpack_from(self._mm, self._nodes_off + i * _NODE.size)
+        node: Dict[str, Any] = {f: self.string(rec[k]) for k, f in enumerate(_NODE_FIELDS)}
+        node["size_bytes"] = None if rec[5] < 0 else rec[5]
+        node["owner"] = self.string(rec[6])
+        if rec[7] != NONE:
+            node.update(json.loads(self.string(rec[7])))
+        return node
+
+    def _node_id_at(self, i: int) -> str:
+        return self.string(_U32.unpack_from(self._mm, self._nodes_off + i * _NODE.size)[0])
+
+    def node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """Binary search over the id index; decodes only the probed ids."""
+        lo, hi = 0, self.node_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            i = _U32.unpack_from(self._mm, self._index_off + mid * 4)[0]
+            current = self._node_id_at(i)
+            if current == node_id:
+                return self._node_at(i)
+            if current < node_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def nodes(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.node_count):
+            yield self._node_at(i)
+
+    def file_ids(self) -> List[str]:
+        type_file = "file"
+        out = []
+        for i in range(self.node_count):
+            rec = _NODE.unpack_from(self._mm, self._nodes_off + i * _NODE.size)
+            if self.string(rec[2]) == type_file:
+                out.append(self.string(rec[0]))
+        return out
+
+    def edges(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.edge_count):
+            rec = _EDGE.unpack_from(self._mm, self._edges_off + i * _EDGE.size)
+            edge: Dict[str, Any] = {f: self.string(rec[k]) for k, f in enumerate(_EDGE_FIELDS)}
+            if rec[3] != NONE:
+                edge.update(json.loads(self.string(rec[3])))
+            yield edge
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The full graph, equal to what the JSON export holds."""
+        data = dict(self.summary)
+        data["nodes"] = list(self.nodes())
+        data["edges"] = list(self.edges())
+        return data
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+def has_graph(json_path: str) -> bool:
+    return os.path.isfile(bin_path_for(json_path)) or os.path.isfile(json_path)
+
+
+def open_graph(json_path: str) -> Optional[GraphCache]:
+    """
+    Lazy view over the binary cache, or None when there is no up-to-date one
+    (legacy JSON-only projects, or a JSON export written after the binary).
+    """
+    bin_path = bin_path_for(json_path)
+    try:
+        if os.path.isfile(json_path) and os.path.getmtime(bin_path) < os.path.getmtime(json_path):
+            return None
+        return GraphCache(bin_path)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def load_graph(json_path: str) -> Optional[Dict[str, Any]]:
+    """Full graph dict — binary cache when available, JSON export otherwise."""
+    cache = open_graph(json_path)
+    if cache is not None:
+        with cache:
+            return cache.to_dict()
+    if not os.path.isfile(json_path):
+        return None
+    with open(json_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_summary(json_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Top-level fields plus node_count, edge_count and file_count (nodes typed
+    "file"), without decoding the graph.
+    """
+    cache = open_graph(json_path)
+    if cache is not None:
+        with cache:
+            summary = dict(cache.summary)
+            summary.update(node_count=cache.node_count, edge_count=cache.edge_count, file_count=cache.file_count)
+            return summary
+    data = load_graph(json_path)
+    if data is None:
+        return None
+    nodes, edges = data.pop("nodes", []) or [], data.pop("edges", []) or []
+    data.update(
+        node_count=len(nodes),
+        edge_count=len(edges),
+        file_count=sum(1 for n in nodes if n.get("type") == "file"),
+    )
+    return data
@@ -0,0 +1,176 @@
+"""
+Graph Registry — process-wide cache of parsed knowledge graphs.
+Agents and API adapters read graphs through here instead of reopening
+`graph.*` on every request.
+
+Design goals:
+  - One parsed copy per project, shared by every caller (treat it as read-only)
+  - Entries are validated against the cache files' (mtime, size) on each access,
+    so a scan from another process is picked up without explicit invalidation
+  - Writers go through `store()`, which writes through and refreshes the entry
+  - LRU eviction under GRAPH_REGISTRY_BUDGET_MB (estimated in-memory size)
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core import graph_cache
+from app.core.config import settings
+
+# Parsed dicts cost ~4x the JSON export on CPython (measured with tracemalloc)
+_PARSED_PER_JSON_BYTE = 4
+_PARSED_PER_BIN_BYTE = 16
+
+Stamp = Tuple[Tuple[int, int], Tuple[int, int]]
+
+
+def _stat(path: str) -> Tuple[int, int]:
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return 0, -1
+
+
+class _Entry:
+    __slots__ = ("stamp", "graph", "summary", "derived", "nbytes")
+
+    def __init__(self, stamp: Stamp, nbytes: int):
+        self.stamp = stamp
+        self.graph: Optional[Dict[str, Any]] = None
+        self.summary: Optional[Dict[str, Any]] = None
+        self.derived: Dict[str, Any] = {}
+        self.nbytes = nbytes
+
+
+class GraphRegistry:
+    """LRU of parsed graphs keyed by the graph.json path of a graph_store slot."""
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._used = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _key(json_path: str) -> str:
+        return os.path.normcase(os.path.abspath(json_path))
+
+    @staticmethod
+    def _stamp(json_path: str) -> Stamp:
+        return _stat(json_path), _stat(graph_cache.bin_path_for(json_path))
+
+    @staticmethod
+    def _estimate(stamp: Stamp) -> int:
+        (_, json_size), (_, bin_size) = stamp
+        if json_size >= 0:
+            return json_size * _PARSED_PER_JSON_BYTE
+        return max(bin_size, 0) * _PARSED_PER_BIN_BYTE
+
+    def _entry(self, json_path: str) -> Optional[_Entry]:
+        """Valid entry for json_path (created empty when stale/missing); None if no graph."""
+        key = self._key(json_path)
+        stamp = self._stamp(json_path)
+        if stamp[0][1] < 0 and stamp[1][1] < 0:
+            self._drop(key)
+            return None
+        entry = self._entries.get(key)
+        if entry is not None and entry.stamp == stamp:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        self._drop(key)
+        entry = _Entry(stamp, self._estimate(stamp))
+        self._entries[key] = entry
+        self._used += entry.nbytes
+        self._evict(keep=key)
+        return entry
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._used -= entry.nbytes
+
+    def _evict(self, keep: str):
+        while self._used > self.budget_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            if key == keep:
+                self._entries.move_to_end(key)
+                continue
+            self._drop(key)
+            print(f"[GraphRegistry] evicted {key} (budget {self.budget_bytes // (1024 * 1024)} MB)")
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def get(self, json_path: str) -> Optional[Dict[str, Any]]:
+        """Full parsed graph (shared — do not mutate), or None if never scanned."""
+        with self._lock:
+            entry = self._entry(json_path)
+            if entry is None:
+                return None
+            if entry.graph is None:
+                entry.graph = graph_cache.load_graph(json_path)
+            return entry.graph
+
+    def summary(self, json_path: str) -> Optional[Dict[str, Any]]:
+        """graph_cache.load_summary shape; never forces a full decode."""
+        with self._lock:
+            entry = self._entry(json_path)
+            if entry is None:
+                return None
+            if entry.summary is None:
+                entry.summary = graph_cache.load_summary(json_path)
+            return entry.summary
+
+    def derive(self, json_path: str, name: str, build: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Memoise `build(graph)` (e.g. a reverse adjacency map) alongside the entry."""
+        with self._lock:
+            graph = self.get(json_path)
+            if graph is None:
+                return None
+            entry = self._entries[self._key(json_path)]
+            if name not in entry.derived:
+                entry.derived[name] = build(graph)
+            return entry.derived[name]
+
+    def store(self, json_path: str, data: Dict[str, Any], indent: Optional[int] = None):
+        """Write-through: persist both cache files and keep `data` as the live entry."""
+        with self._lock:
+            graph_cache.write_graph(json_path, data, indent=indent)
+            key = self._key(json_path)
+            self._drop(key)
+            stamp = self._stamp(json_path)
+            entry = _Entry(stamp, self._estimate(stamp))
+            entry.graph = data
+            self._entries[key] = entry
+            self._used += entry.nbytes
+            self._evict(keep=key)
+
+    def invalidate(self, json_path: Optional[str] = None):
+        """Forget one project (or everything) — e.g. after deleting a repo."""
+        with self._lock:
+            if json_path is None:
+                self._entries.clear()
+                self._used = 0
+            else:
+                self._drop(self._key(json_path))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "estimated_bytes": self._used,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Singleton — import this everywhere
+graph_registry = GraphRegistry(settings.GRAPH_REGISTRY_BUDGET_MB * 1024 * 1024)
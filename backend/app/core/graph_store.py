@@ -0,0 +1,191 @@
+"""
+Graph Store — scan caches keyed by (project, branch, commit), outside the worktree.
+
+Every Librarian scan writes its artifacts into one slot:
+
+    storage/graphs/<project>/<branch>/<commit>/
+        graph.json (+ graph.bin)   manifest.json   deps.json   symbols.json
+    storage/graphs/<project>/current.json   {"branch", "commit"} last scanned / served
+
+A slot is only a hit for the exact HEAD sha it was built from, so switching
+back to an already-scanned branch is a lookup, and one branch's graph is never
+served for another. Readers that just want "the project's graph" (Architect,
+Diagram, Mobile, PM) go through `current()`. Old slots are pruned per project,
+newest GRAPH_STORE_MAX_SLOTS kept (the current one always survives).
+
+Ref scans (Librarian.scan_ref) are graph-only, so they live under their own
+`ref:<ref>` branch key: a branch scan never hits them, `current()` never
+falls back to them, and they are pruned separately from branch slots.
+"""
+import json
+import os
+import shutil
+import threading
+from typing import List, Optional
+from urllib.parse import quote, unquote
+
+from app.core import graph_cache
+from app.core.config import settings
+from app.core.graph_registry import graph_registry
+
+# Commit key for folders that are not git repositories
+WORKTREE = "worktree"
+_CURRENT = "current.json"
+# Branch-key prefix of graph-only ref-scan slots (":" cannot appear in a git ref name)
+REF_PREFIX = "ref:"
+
+
+class GraphSlot:
+    """Artifact directory for one (project, branch, commit)."""
+
+    __slots__ = ("project", "branch", "commit", "dir")
+
+    def __init__(self, project: str, branch: str, commit: Optional[str], directory: str):
+        self.project = project
+        self.branch = branch
+        self.commit = commit or WORKTREE
+        self.dir = directory
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    @property
+    def graph_path(self) -> str:
+        return self.path("graph.json")
+
+    @property
+    def is_ref(self) -> bool:
+        return self.branch.startswith(REF_PREFIX)
+
+    def exists(self) -> bool:
+        return graph_cache.has_graph(self.graph_path)
+
+    def ensure(self) -> "GraphSlot":
+        os.makedirs(self.dir, exist_ok=True)
+        return self
+
+    def mtime(self) -> float:
+        try:
+            return os.path.getmtime(self.graph_path)
+        except OSError:
+            return 0.0
+
+
+class GraphStore:
+    def __init__(self, root: str, max_slots: int):
+        self.root = root
+        self.max_slots = max_slots
+        self._lock = threading.Lock()
+
+    def _project_dir(self, project: str) -> str:
+        return os.path.join(self.root, quote(project, safe=""))
+
+    # ── Slots ─────────────────────────────────────────────────────────────────
+
+    def slot(self, project: str, branch: str, commit: Optional[str]) -> GraphSlot:
+        directory = os.path.join(self._project_dir(project), quote(branch, safe=""), commit or WORKTREE)
+        return GraphSlot(project, branch, commit, directory)
+
+    def ref_slot(self, project: str, ref: str, commit: str) -> GraphSlot:
+        """Graph-only slot of a ref scan, apart from the branch slots."""
+        return self.slot(project, REF_PREFIX + ref, commit)
+
+    def lookup(self, project: str, branch: str, commit: Optional[str]) -> Optional[GraphSlot]:
+        """The slot built from exactly this commit, if it has a graph."""
+        slot = self.slot(project, branch, commit)
+        return slot if slot.exists() else None
+
+    def slots(self, project: str) -> List[GraphSlot]:
+        """Every slot with a graph, newest first."""
+        base = self._project_dir(project)
+        found = []
+        try:
+            branches = os.listdir(base)
+        except OSError:
+            return found
+        for branch_dir in branches:
+            branch_path = os.path.join(base, branch_dir)
+            if not os.path.isdir(branch_path):
+                continue
+            for commit in os.listdir(branch_path):
+                slot = GraphSlot(project, unquote(branch_dir), commit, os.path.join(branch_path, commit))
+                if slot.exists():
+                    found.append(slot)
+        found.sort(key=GraphSlot.mtime, reverse=True)
+        return found
+
+    def latest(self, project: str, branch: Optional[str] = None) -> Optional[GraphSlot]:
+        """Newest branch slot (of `branch`, if given); ref-scan slots never qualify."""
+        for slot in self.slots(project):
+            if not slot.is_ref and (branch is None or slot.branch == branch):
+                return slot
+        return None
+
+    # ── Current pointer ───────────────────────────────────────────────────────
+
+    def current(self, project: str) -> Optional[GraphSlot]:
+        """The slot last scanned or served for project (newest slot if unset)."""
+        try:
+            with open(os.path.join(self._project_dir(project), _CURRENT), "r", encoding="utf-8") as f:
+                pointer = json.load(f)
+            slot = self.slot(project, pointer["branch"], pointer["commit"])
+            if slot.exists():
+                return slot
+        except (OSError, ValueError, KeyError):
+            pass
+        return self.latest(project)
+
+    def graph_path(self, project: str) -> Optional[str]:
+        slot = self.current(project)
+        return slot.graph_path if slot else None
+
+    def set_current(self, slot: GraphSlot):
+        path = os.path.join(self._project_dir(slot.project), _CURRENT)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"branch": slot.branch, "commit": slot.commit}, f)
+            os.replace(tmp, path)
+
+    # ── Housekeeping ──────────────────────────────────────────────────────────
+
+    def projects(self) -> List[str]:
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return []
+        return sorted(unquote(n) for n in names if os.path.isdir(os.path.join(self.root, n)))
+
+    def prune(self, project: str):
+        """
+        Drop the oldest slots beyond max_slots, never the current one. Branch
+        and ref-scan slots are counted apart, so scanning history cannot
+        evict a branch slot.
+        """
+        slots = self.slots(project)
+        branch_slots = [s for s in slots if not s.is_ref]
+        ref_slots = [s for s in slots if s.is_ref]
+        if len(branch_slots) <= self.max_slots and len(ref_slots) <= self.max_slots:
+            return
+        current = self.current(project)
+        keep = {s.dir for s in branch_slots[:self.max_slots] + ref_slots[:self.max_slots]}
+        keep |= {current.dir} if current else set()
+        for slot in slots:
+            if slot.dir not in keep:
+                graph_registry.invalidate(slot.graph_path)
+                shutil.rmtree(slot.dir, ignore_errors=True)
+                print(f"[GraphStore] pruned {project}@{slot.branch}/{slot.commit[:8]}")
+
+    def delete(self, project: str) -> bool:
+        base = self._project_dir(project)
+        if not os.path.isdir(base):
+            return False
+        for slot in self.slots(project):
+            graph_registry.invalidate(slot.graph_path)
+        shutil.rmtree(base, ignore_errors=True)
+        return True
+
+
+# Singleton — shared by the Librarian (writer) and every graph reader
+graph_store = GraphStore(settings.GRAPH_STORE_PATH, settings.GRAPH_STORE_MAX_SLOTS)
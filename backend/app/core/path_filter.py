@@ -0,0 +1,382 @@
+"""
+Path Filter — one compiled matcher deciding which project files get indexed.
+Shared by the Librarian tree walk and the local code analyzer.
+
+Rules, cheapest first, so excluded paths cost no I/O:
+  1. SKIP_DIRS            exact directory-name match (pruned before descending)
+  2. ignore files         nested .gitignore / .kachowignore (+ .git/info/exclude),
+                          each compiled to regexes once per walk, git precedence
+                          (deeper file wins, last matching line wins, `!` re-includes)
+  3. SKIP_FILE_PATTERNS   lockfiles, minified bundles, source maps
+  4. extensions           optional allow-list
+  5. size cap             MAX_INDEX_FILE_BYTES, from the stat the walk already does
+  6. binary sniff         NUL byte in the first BINARY_SNIFF_BYTES (one small read;
+                          for commits, one batched blob read, see walk_tree)
+
+`walk` applies them to a worktree; `walk_tree` to one commit's listing
+(app.core.git_objects.GitTree), reading ignore files from the commit itself.
+"""
+import fnmatch
+import os
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.git_objects import GitTree
+
+IGNORE_FILES = (".gitignore", ".kachowignore")
+# walk_tree: most sniffed bytes kept for the caller's own read of the same blobs
+HOLD_BUDGET_BYTES = 32 << 20
+
+# (filename, full_path, rel_path, stat_result)
+WalkedFile = Tuple[str, str, str, os.stat_result]
+# (filename, rel_path, blob sha, size)
+TreeFile = Tuple[str, str, str, int]
+
+
+# ── gitignore → regex ─────────────────────────────────────────────────────────
+
+def _translate(glob: str) -> str:
+    """Translate one gitignore glob (already stripped of anchors) to a regex body."""
+    out = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if c == "*":
+            if glob[i:i + 3] == "**/":
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if glob[i:i + 2] == "**":
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = glob.find("]", i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1:j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class IgnoreRules:
+    """Compiled lines of one ignore file; paths are relative to its directory."""
+
+    def __init__(self, lines: Iterable[str]):
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []   # (regex, negate, dir_only)
+        for raw in lines:
+            line = raw.rstrip("\n").rstrip("\r")
+            if not line or line.startswith("#"):
+                continue
+            if not line.endswith("\\ "):
+                line = line.rstrip(" ")
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            elif line.startswith("\\"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            line = line.lstrip("/")
+            body = _translate(line)
+            # unanchored patterns match a basename at any depth
+            prefix = "" if anchored else "(?:.*/)?"
+            # a matched directory also covers everything inside it
+            self.rules.append((re.compile(f"^{prefix}{body}(?:/.*)?$"), negate, dir_only))
+        self._any_negation = any(neg for _, neg, _ in self.rules)
+        if self.rules and not self._any_negation and not any(d for _, _, d in self.rules):
+            self._combined: Optional[re.Pattern] = re.compile("|".join(f"(?:{r.pattern})" for r, _, _ in self.rules))
+        else:
+            self._combined = None
+
+    @classmethod
+    def from_file(cls, path: str) -> Optional["IgnoreRules"]:
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                rules = cls(f)
+        except OSError:
+            return None
+        return rules if rules.rules else None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """True = ignored, False = re-included, None = no rule matched."""
+        if self._combined is not None:
+            return True if self._combined.match(rel_path) else None
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                # `dir/` still covers files below a matching directory
+                parent = rel_path.rsplit("/", 1)[0] if "/" in rel_path else None
+                if parent is None or not regex.match(parent):
+                    continue
+            elif not regex.match(rel_path):
+                continue
+            return not negate
+        return None
+
+
+# ── Matcher ───────────────────────────────────────────────────────────────────
+
+class PathFilter:
+    """Walks a project root yielding only the files worth indexing."""
+
+    def __init__(
+        self,
+        root: str,
+        extensions: Optional[Iterable[str]] = None,
+        skip_dirs: Optional[Iterable[str]] = None,
+        skip_file_patterns: Optional[Iterable[str]] = None,
+        max_file_bytes: Optional[int] = None,
+        sniff_bytes: Optional[int] = None,
+        ignore_files: Iterable[str] = IGNORE_FILES,
+    ):
+        self.root = root
+        self.extensions = set(extensions) if extensions is not None else None
+        self.skip_dirs = set(settings.SKIP_DIRS if skip_dirs is None else skip_dirs)
+        patterns = settings.SKIP_FILE_PATTERNS if skip_file_patterns is None else skip_file_patterns
+        self._skip_files = re.compile("|".join(fnmatch.translate(p) for p in patterns)) if patterns else None
+        self.max_file_bytes = settings.MAX_INDEX_FILE_BYTES if max_file_bytes is None else max_file_bytes
+        self.sniff_bytes = settings.BINARY_SNIFF_BYTES if sniff_bytes is None else sniff_bytes
+        self.ignore_files = tuple(ignore_files)
+        self.stats: Dict[str, int] = {"dirs_pruned": 0, "ignored": 0, "oversized": 0, "binary": 0}
+
+    # ── Ignore-rule stack ─────────────────────────────────────────────────────
+
+    def _rules_for(self, dirpath: str, rel_dir: str, filenames: List[str],
+                   inherited: List[Tuple[str, IgnoreRules]]) -> List[Tuple[str, IgnoreRules]]:
+        stack = inherited
+        present = [f for f in self.ignore_files if f in filenames]
+        if rel_dir == "" and os.path.isfile(os.path.join(dirpath, ".git", "info", "exclude")):
+            present.insert(0, os.path.join(".git", "info", "exclude"))
+        for name in present:
+            rules = IgnoreRules.from_file(os.path.join(dirpath, name))
+            if rules is not None:
+                stack = stack + [(rel_dir, rules)]
+        return stack
+
+    @staticmethod
+    def _ignored(stack: List[Tuple[str, IgnoreRules]], rel_path: str, is_dir: bool) -> bool:
+        for base, rules in reversed(stack):
+            local = rel_path[len(base) + 1:] if base else rel_path
+            verdict = rules.match(local, is_dir)
+            if verdict is not None:
+                return verdict
+        return False
+
+    def is_binary(self, full_path: str) -> bool:
+        if self.sniff_bytes <= 0:
+            return False
+        try:
+            with open(full_path, "rb") as fh:
+                return b"\0" in fh.read(self.sniff_bytes)
+        except OSError:
+            return True
+
+    # ── Walk ──────────────────────────────────────────────────────────────────
+
+    def admits(self, rel_path: str) -> bool:
+        """
+        Whether walk() would yield rel_path: the same rules, checked along its
+        own path only (ignore files of each ancestor directory, no full walk).
+        """
+        parts = rel_path.split("/")
+        filename = parts[-1]
+        if self.extensions is not None and os.path.splitext(filename)[1] not in self.extensions:
+            return False
+        if self._skip_files is not None and self._skip_files.match(filename):
+            return False
+        stack: List[Tuple[str, IgnoreRules]] = []
+        rel_dir = ""
+        for d in parts[:-1] + [None]:
+            dirpath = os.path.join(self.root, rel_dir) if rel_dir else self.root
+            present = [f for f in self.ignore_files if os.path.isfile(os.path.join(dirpath, f))]
+            stack = self._rules_for(dirpath, rel_dir, present, stack)
+            if d is None:
+                break
+            rel_dir = f"{rel_dir}/{d}" if rel_dir else d
+            if d in self.skip_dirs or (stack and self._ignored(stack, rel_dir, True)):
+                return False
+        if stack and self._ignored(stack, rel_path, False):
+            return False
+        full_path = os.path.join(self.root, rel_path)
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            return False
+        if self.max_file_bytes and st.st_size > self.max_file_bytes:
+            return False
+        return not self.is_binary(full_path)
+
+    def walk(
+        self,
+        trusted: Optional[Callable[[str, os.stat_result], bool]] = None,
+    ) -> Iterator[Tuple[str, str, List[WalkedFile]]]:
+        """
+        Yield (dirpath, rel_dir, files) top-down; rel_dir is "" for the root.
+        `trusted(rel_path, st)` may vouch for files already known to be text
+        (e.g. unchanged since the last scan) so they skip the binary sniff.
+        """
+        stacks: Dict[str, List[Tuple[str, IgnoreRules]]] = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            rel_dir = os.path.relpath(dirpath, self.root).replace("\\", "/")
+            if rel_dir == ".":
+                rel_dir = ""
+            parent = rel_dir.rsplit("/", 1)[0] if "/" in rel_dir else ""
+            stack = self._rules_for(dirpath, rel_dir, filenames, stacks.pop(rel_dir, stacks.get(parent, [])))
+
+            kept_dirs = []
+            for d in dirnames:
+                rel = f"{rel_dir}/{d}" if rel_dir else d
+                if d in self.skip_dirs or (stack and self._ignored(stack, rel, True)):
+                    self.stats["dirs_pruned"] += 1
+                    continue
+                kept_dirs.append(d)
+                stacks[rel] = stack
+            dirnames[:] = kept_dirs
+
+            files: List[WalkedFile] = []
+            for filename in filenames:
+                if self.extensions is not None and os.path.splitext(filename)[1] not in self.extensions:
+                    continue
+                rel_path = f"{rel_dir}/{filename}" if rel_dir else filename
+                if (self._skip_files is not None and self._skip_files.match(filename)) or \
+                        (stack and self._ignored(stack, rel_path, False)):
+                    self.stats["ignored"] += 1
+                    continue
+                full_path = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(full_path)
+                except OSError:
+                    continue
+                if self.max_file_bytes and st.st_size > self.max_file_bytes:
+                    self.stats["oversized"] += 1
+                    continue
+                if not (trusted and trusted(rel_path, st)) and self.is_binary(full_path):
+                    self.stats["binary"] += 1
+                    continue
+                files.append((filename, full_path, rel_path, st))
+            yield dirpath, rel_dir, files
+
+    def walk_tree(
+        self,
+        tree: GitTree,
+        trusted: Optional[Callable[[str, str], bool]] = None,
+        hold: Optional[Callable[[str], bool]] = None,
+    ) -> Iterator[Tuple[str, List[TreeFile]]]:
+        """
+        Same rules over a commit: yield (rel_dir, files) top-down, sorted.
+        Sizes come from the tree listing (after GitTree.hydrate for partial
+        clones). The binary sniff reads every blob not already known to be
+        text (reader.text_blobs) or vouched for by `trusted(rel_path, blob_sha)`,
+        all in one pipelined read_many. Sniffed blobs the caller will read
+        anyway (`hold(rel_path)`) stay on the tree for its next read_bytes,
+        up to HOLD_BUDGET_BYTES.
+        """
+        dirs: Dict[str, Tuple[set, List[str]]] = {"": (set(), [])}
+        for rel_path in tree.blobs:
+            rel_dir, _, filename = rel_path.rpartition("/")
+            dirs.setdefault(rel_dir, (set(), []))[1].append(filename)
+            while rel_dir:
+                parent, _, name = rel_dir.rpartition("/")
+                subdirs = dirs.setdefault(parent, (set(), []))[0]
+                if name in subdirs:
+                    break
+                subdirs.add(name)
+                rel_dir = parent
+
+        root_stack: List[Tuple[str, IgnoreRules]] = []
+        exclude = IgnoreRules.from_file(os.path.join(tree.repo_path, ".git", "info", "exclude"))
+        if exclude is not None:
+            root_stack.append(("", exclude))
+        stacks = {"": root_stack}
+        pending = [""]
+        kept: List[Tuple[str, List[Tuple[str, str]]]] = []
+        while pending:
+            rel_dir = pending.pop()
+            subdirs, filenames = dirs[rel_dir]
+            stack = stacks.pop(rel_dir)
+            for name in self.ignore_files:
+                if name in filenames:
+                    rules = IgnoreRules((tree.read_text(f"{rel_dir}/{name}" if rel_dir else name) or "").splitlines())
+                    if rules.rules:
+                        stack = stack + [(rel_dir, rules)]
+
+            kept_dirs = []
+            for d in sorted(subdirs):
+                rel = f"{rel_dir}/{d}" if rel_dir else d
+                if d in self.skip_dirs or (stack and self._ignored(stack, rel, True)):
+                    self.stats["dirs_pruned"] += 1
+                    continue
+                kept_dirs.append(rel)
+                stacks[rel] = stack
+            pending.extend(reversed(kept_dirs))
+
+            candidates = []
+            for filename in sorted(filenames):
+                if self.extensions is not None and os.path.splitext(filename)[1] not in self.extensions:
+                    continue
+                rel_path = f"{rel_dir}/{filename}" if rel_dir else filename
+                if (self._skip_files is not None and self._skip_files.match(filename)) or \
+                        (stack and self._ignored(stack, rel_path, False)):
+                    self.stats["ignored"] += 1
+                    continue
+                candidates.append((filename, rel_path))
+            kept.append((rel_dir, candidates))
+
+        # partial clones: one batched fetch for everything that survived the name rules
+        tree.hydrate(rel_path for _, candidates in kept for _, rel_path in candidates)
+        sized: List[Tuple[str, List[TreeFile]]] = []
+        for rel_dir, candidates in kept:
+            files: List[TreeFile] = []
+            for filename, rel_path in candidates:
+                sha, size = tree.blobs[rel_path]
+                if self.max_file_bytes and size > self.max_file_bytes:
+                    self.stats["oversized"] += 1
+                    continue
+                files.append((filename, rel_path, sha, size))
+            sized.append((rel_dir, files))
+
+        binary = self._sniff_tree(tree, [f for _, files in sized for f in files], trusted, hold)
+        for rel_dir, files in sized:
+            yield rel_dir, [f for f in files if f[2] not in binary]
+
+    def _sniff_tree(self, tree: GitTree, files: List[TreeFile], trusted: Optional[Callable[[str, str], bool]],
+                    hold: Optional[Callable[[str], bool]]) -> Set[str]:
+        """Blob shas that fail the binary sniff, read in one batch."""
+        if self.sniff_bytes <= 0:
+            return set()
+        known = tree.reader.text_blobs
+        wanted = {sha for _, rel_path, sha, _ in files if sha not in known and not (trusted and trusted(rel_path, sha))}
+        keep = {sha for _, rel_path, sha, _ in files if sha in wanted and hold and hold(rel_path)}
+        binary: Set[str] = set()
+        held = 0
+        for sha, data in tree.reader.read_many(sorted(wanted)):
+            if data is None or b"\0" in data[:self.sniff_bytes]:
+                binary.add(sha)
+                continue
+            known.add(sha)
+            if sha in keep and held + len(data) <= HOLD_BUDGET_BYTES:
+                tree.hold(sha, data)
+                held += len(data)
+        self.stats["binary"] += sum(1 for f in files if f[2] in binary)
+        return binary
+
+    def files(self) -> List[str]:
+        """Full paths of every kept file."""
+        return [full for _, _, files in self.walk() for _, full, _, _ in files]
@@ -0,0 +1,123 @@
+"""
+Repo Locks — one reader/writer lock per git repository on disk.
+
+Clone, pull, fetch and checkout rewrite a repo's refs, index and worktree;
+running two of them at once (or scanning while one runs) fails on
+`index.lock` or sees a half-checked-out tree. Every git-touching path takes
+the repository's lock first:
+
+  - read   walk / parse the worktree, `git log`, commit listings
+           (any number at once)
+  - write  clone, pull, fetch, checkout, delete (exclusive)
+
+Writers are preferred so a steady stream of history reads cannot starve a
+pull. Reads are reentrant per thread, and a thread holding the write side may
+also read. Upgrading a read to a write would deadlock and raises instead.
+Locks are keyed by the repository's top-level directory, so a subfolder of a
+local repo shares its lock. Clones under REPO_STORAGE_PATH are always keyed by
+their target directory, which stays the same key while `git clone` is still
+creating it. Object-database reads (git_objects) need no lock.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from app.core.config import settings
+
+
+class RWLock:
+    """Writer-preferring reader/writer lock."""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers: Dict[int, int] = {}      # thread id -> read depth
+        self._writer = None                     # thread id
+        self._write_depth = 0
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers[me] -= 1
+                if not self._readers[me]:
+                    del self._readers[me]
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                if me in self._readers:
+                    raise RuntimeError("cannot upgrade a repository read lock to a write lock")
+                self._writers_waiting += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._writers_waiting -= 1
+                self._writer = me
+            self._write_depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._write_depth -= 1
+                if not self._write_depth:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+class RepoLockRegistry:
+    """RWLock per repository top-level directory."""
+
+    def __init__(self):
+        self._locks: Dict[str, RWLock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path: str) -> str:
+        path = os.path.abspath(path)
+        storage = os.path.abspath(settings.REPO_STORAGE_PATH)
+        rel = os.path.relpath(path, storage)
+        if rel != os.curdir and not rel.startswith(os.pardir + os.sep) and rel != os.pardir:
+            # a clone (or a path inside one): its target dir, with or without .git yet
+            return os.path.normcase(os.path.join(storage, rel.split(os.sep)[0]))
+        if not os.path.isdir(path):
+            return os.path.normcase(path)       # about to be cloned: keyed by its own path
+        probe = path
+        while True:
+            if os.path.exists(os.path.join(probe, ".git")):
+                return os.path.normcase(probe)
+            parent = os.path.dirname(probe)
+            if parent == probe:
+                return os.path.normcase(path)   # plain folder
+            probe = parent
+
+    def for_repo(self, path: str) -> RWLock:
+        key = self._key(path)
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = RWLock()
+            return lock
+
+    def read(self, path: str):
+        return self.for_repo(path).read()
+
+    def write(self, path: str):
+        return self.for_repo(path).write()
+
+
+# Singleton — shared by the Librarian, Mentor and Mobile git paths
+repo_locks = RepoLockRegistry()
@@ -21,6 +21,7 @@ import subprocess
 import sys
 from typing import Dict, Any
 from app.core.config import settings
+from app.core.file_inventory import file_inventories
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -39,26 +40,13 @@ def _run(cmd: list, cwd: str = None) -> str:
         return ""
 
 
-def _js_ts_files(project_path: str) -> list:
-    skip = {"venv", ".venv", "__pycache__", "node_modules", ".git", "dist", "build", ".next"}
-    found = []
-    for dirpath, dirnames, filenames in os.walk(project_path):
-        dirnames[:] = [d for d in dirnames if d not in skip]
-        for f in filenames:
-            if f.endswith((".js", ".ts", ".jsx", ".tsx")):
-                found.append(os.path.join(dirpath, f))
-    return found
+_JS_TS_EXTS = (".js", ".ts", ".jsx", ".tsx")
 
 
-def _python_files(project_path: str) -> list:
-    skip = {"venv", ".venv", "__pycache__", "node_modules", ".git", "dist", "build"}
-    found = []
-    for dirpath, dirnames, filenames in os.walk(project_path):
-        dirnames[:] = [d for d in dirnames if d not in skip]
-        for f in filenames:
-            if f.endswith(".py"):
-                found.append(os.path.join(dirpath, f))
-    return found
+def _source_files(project_path: str) -> tuple:
+    """(python_files, js_ts_files) from the shared FileInventory — usually the Librarian's walk."""
+    inventory = file_inventories.get(project_path)
+    return inventory.paths({".py"}), inventory.paths(_JS_TS_EXTS)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -84,8 +72,7 @@ class LocalCodeAnalyzer:
         """
         print(f"\n[Analyzer] Running LOCAL code analysis for '{project_key}'...")
 
-        py_files = _python_files(project_path)
-        js_ts_files = _js_ts_files(project_path)
+        py_files, js_ts_files = _source_files(project_path)
         
         all_files = py_files + js_ts_files
         
@@ -0,0 +1,248 @@
+"""
+Tokens — one token counter for chunk budgets and prompt packing.
+
+Backends, first that loads wins (resolved lazily on first use):
+  - hf        a HuggingFace `tokenizer.json` at TOKENIZER_PATH (exact BPE
+              counts, fully offline; `tokenizers` ships with chromadb)
+  - tiktoken  TOKENIZER_ENCODING (default cl100k_base) if tiktoken is
+              installed and the encoding is in its local cache
+  - estimate  a cl100k-style pre-tokenizer regex, one token per piece
+              (long words count extra); approximate, no dependencies
+
+Counts are memoised in a thread-safe LRU keyed by the string itself
+(TOKEN_CACHE_SIZE entries, strings up to _CACHE_MAX_CHARS), which pays off
+for the many repeated short strings chunking sees: blank lines, `}`,
+`return None`. `count_many` serves hits from the cache and encodes all the
+misses in one backend batch call.
+
+Prompt helpers: `truncate` (prefix within a budget), `split` (consecutive
+pieces within a budget), `pack` (longest prefix of a list of items) and `fit`
+(share one budget across several sections).
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+from app.core.config import settings
+
+_CACHE_MAX_CHARS = 4096
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+
+class _HFBackend:
+    def __init__(self, path: str):
+        from tokenizers import Tokenizer
+        self._tok = Tokenizer.from_file(path)
+        self.name = f"hf:{os.path.basename(path)}"
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        return [len(e.ids) for e in self._tok.encode_batch(texts, add_special_tokens=False)]
+
+    def cut(self, text: str, max_tokens: int) -> int:
+        offsets = self._tok.encode(text, add_special_tokens=False).offsets
+        return len(text) if len(offsets) <= max_tokens else offsets[max_tokens][0]
+
+    def cuts(self, text: str, max_tokens: int) -> List[int]:
+        offsets = self._tok.encode(text, add_special_tokens=False).offsets
+        return [offsets[k][0] for k in range(max_tokens, len(offsets), max_tokens)]
+
+
+class _TiktokenBackend:
+    def __init__(self, encoding: str):
+        import tiktoken
+        self._enc = tiktoken.get_encoding(encoding)
+        self.name = f"tiktoken:{encoding}"
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        return [len(ids) for ids in self._enc.encode_ordinary_batch(texts)]
+
+    def cut(self, text: str, max_tokens: int) -> int:
+        ids = self._enc.encode_ordinary(text)
+        if len(ids) <= max_tokens:
+            return len(text)
+        return self._enc.decode_with_offsets(ids[:max_tokens + 1])[1][max_tokens]
+
+    def cuts(self, text: str, max_tokens: int) -> List[int]:
+        offsets = self._enc.decode_with_offsets(self._enc.encode_ordinary(text))[1]
+        return [offsets[k] for k in range(max_tokens, len(offsets), max_tokens)]
+
+
+# cl100k's pre-tokenizer with \p{L} spelled [^\W\d_]: contractions, a letter run
+# with one leading non-letter, 1-3 digits, punctuation runs, newlines, spaces
+_PIECES = re.compile(
+    r"'(?i:[sdmt]|ll|ve|re)"
+    r"|(?:[^\r\n\w]|_)?[^\W\d_]+"
+    r"|\d{1,3}"
+    r"| ?(?:[^\s\w]|_)+[\r\n]*"
+    r"|\s*[\r\n]+"
+    r"|\s+(?!\S)"
+    r"|\s+"
+)
+
+
+class _EstimateBackend:
+    name = "estimate"
+
+    @staticmethod
+    def _cost(piece: str) -> int:
+        return 1 + (len(piece) - 1) // 8      # rare long words split into several tokens
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        return [sum(self._cost(m.group()) for m in _PIECES.finditer(text)) for text in texts]
+
+    def cut(self, text: str, max_tokens: int) -> int:
+        used = 0
+        for m in _PIECES.finditer(text):
+            used += self._cost(m.group())
+            if used > max_tokens:
+                return m.start()
+        return len(text)
+
+    def cuts(self, text: str, max_tokens: int) -> List[int]:
+        out, used = [], 0
+        for m in _PIECES.finditer(text):
+            cost = self._cost(m.group())
+            if used + cost > max_tokens and used:
+                out.append(m.start())
+                used = 0
+            used += cost
+        return out
+
+
+def _load_backend():
+    if settings.TOKENIZER_PATH:
+        try:
+            return _HFBackend(settings.TOKENIZER_PATH)
+        except Exception as e:
+            print(f"[Tokens] tokenizer {settings.TOKENIZER_PATH} unavailable ({e}), falling back")
+    try:
+        return _TiktokenBackend(settings.TOKENIZER_ENCODING)
+    except Exception:
+        pass    # not installed, or the encoding is not cached and we are offline
+    return _EstimateBackend()
+
+
+# ── Counter ───────────────────────────────────────────────────────────────────
+
+class TokenCounter:
+    """Cached token counts over the first backend that loads."""
+
+    def __init__(self, backend=None, cache_size: Optional[int] = None):
+        self._backend = backend
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._cache_size = settings.TOKEN_CACHE_SIZE if cache_size is None else cache_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = _load_backend()
+                    print(f"[Tokens] counting with {self._backend.name}")
+        return self._backend
+
+    @property
+    def name(self) -> str:
+        return self.backend.name
+
+    def count(self, text: str) -> int:
+        return self.count_many([text])[0]
+
+    def count_many(self, texts: Sequence[str]) -> List[int]:
+        """Token count per text; cache misses go to the backend as one batch."""
+        out: List[Optional[int]] = [None] * len(texts)
+        missing: "OrderedDict[str, List[int]]" = OrderedDict()
+        with self._lock:
+            for i, text in enumerate(texts):
+                n = self._cache.get(text) if len(text) <= _CACHE_MAX_CHARS else None
+                if n is None:
+                    missing.setdefault(text, []).append(i)
+                else:
+                    self._cache.move_to_end(text)
+                    out[i] = n
+            self.hits += len(texts) - sum(len(v) for v in missing.values())
+            self.misses += len(missing)
+        if missing:
+            counts = self.backend.count_batch(list(missing))
+            with self._lock:
+                for (text, slots), n in zip(missing.items(), counts):
+                    for i in slots:
+                        out[i] = n
+                    if self._cache_size and len(text) <= _CACHE_MAX_CHARS:
+                        self._cache[text] = n
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return out
+
+    # ── Prompt budgets ────────────────────────────────────────────────────────
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of text within max_tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+        return text[:self.backend.cut(text, max_tokens)]
+
+    def split(self, text: str, max_tokens: int) -> List[str]:
+        """
+        Consecutive pieces of text that join back to it, each about max_tokens
+        (one encode of the whole text; pieces are cut at token offsets).
+        """
+        if self.count(text) <= max_tokens:
+            return [text]
+        bounds = [0] + [c for c in self.backend.cuts(text, max(1, max_tokens)) if 0 < c < len(text)] + [len(text)]
+        return [text[a:b] for a, b in zip(bounds, bounds[1:]) if b > a]
+
+    def pack(self, items: Sequence[str], budget: int, sep: str = "\n") -> List[str]:
+        """Longest prefix of items whose sep-joined text fits budget."""
+        sep_cost = self.count(sep) if sep else 0
+        packed, used = [], 0
+        for item, n in zip(items, self.count_many(items)):
+            cost = n + (sep_cost if packed else 0)
+            if used + cost > budget:
+                break
+            packed.append(item)
+            used += cost
+        return packed
+
+    def fit(self, texts: Sequence[str], budget: int) -> List[str]:
+        """
+        Share one budget across sections: ones under their fair share keep
+        everything and the rest is split evenly among the larger ones, each
+        truncated to its allowance.
+        """
+        counts = self.count_many(texts)
+        allowance = [0] * len(texts)
+        remaining, pending = budget, sorted(range(len(texts)), key=counts.__getitem__)
+        while pending:
+            share = remaining // len(pending)
+            i = pending[0]
+            if counts[i] <= share:
+                allowance[i] = counts[i]
+                remaining -= counts[i]
+                pending.pop(0)
+            else:
+                for i in pending:
+                    allowance[i] = share
+                break
+        return [text if n <= allowance[i] else self.truncate(text, allowance[i])
+                for i, (text, n) in enumerate(zip(texts, counts))]
+
+
+# Singleton — shared by the Librarian chunker and every prompt builder
+token_counter = TokenCounter()
+
+
+def count_tokens(text: str) -> int:
+    return token_counter.count(text)
+
+
+def count_tokens_many(texts: Sequence[str]) -> List[int]:
+    return token_counter.count_many(texts)
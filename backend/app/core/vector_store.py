@@ -6,11 +6,19 @@ Design goals:
   - Single persistent client (not ephemeral in-memory)
   - Works in both local dev and Docker (path from config)
   - Embedding via Groq's nomic-embed-text (falls back to chromadb's default)
+  - Batched, pipelined ingestion (BatchIngestor): batch N+1 is embedded
+    while batch N is inserted, and a failing batch only loses its bad chunks
+  - Content-addressed chunk IDs + ChunkSync: a rescan embeds only chunks
+    whose text is new and deletes the ones that disappeared
 """
 import hashlib
-from typing import List, Dict, Any, Optional
+import queue
+import threading
+import time
+from typing import List, Dict, Any, Optional, Callable
 import chromadb
 from chromadb.config import Settings as ChromaSettings
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
 from app.core.config import settings
 
 # ── Persistent ChromaDB client (singleton) ────────────────────────────────────
@@ -26,6 +34,16 @@ def _get_client() -> chromadb.PersistentClient:
     return _client
 
 
+_embedding_fn = None
+
+def _get_embedding_fn():
+    """The collections' embedding function, also called directly by BatchIngestor."""
+    global _embedding_fn
+    if _embedding_fn is None:
+        _embedding_fn = DefaultEmbeddingFunction()
+    return _embedding_fn
+
+
 # ── Public API ────────────────────────────────────────────────────────────────
 
 def get_or_create_collection(name: str) -> chromadb.Collection:
@@ -37,10 +55,11 @@ def get_or_create_collection(name: str) -> chromadb.Collection:
     return _get_client().get_or_create_collection(
         name=safe_name,
         metadata={"hnsw:space": "cosine"},   # cosine similarity = better for code
+        embedding_function=_get_embedding_fn(),
     )
 
 
-def upsert_chunks(collection_name: str, chunks: List[Dict[str, Any]]) -> int:
+def upsert_chunks(collection_name: str, chunks: List[Dict[str, Any]], batch_size: Optional[int] = None) -> int:
     """
     Upsert a list of text chunks into a collection.
 
@@ -49,16 +68,322 @@ def upsert_chunks(collection_name: str, chunks: List[Dict[str, Any]]) -> int:
       - "document" : raw text content
       - "metadata" : dict of extra fields (file_path, language, chunk_index, …)
 
-    Returns the number of chunks upserted.
+    Goes through a BatchIngestor, so large lists are embedded and inserted in
+    batches. Returns the number of chunks upserted.
+    """
+    with BatchIngestor(collection_name, batch_size=batch_size, verbose=False) as ingestor:
+        ingestor.add(chunks)
+    return ingestor.stats.chunks
+
+
+# ── Batched ingestion ─────────────────────────────────────────────────────────
+
+_DONE = object()
+
+
+class IngestStats:
+    """What one BatchIngestor / ChunkSync run did; `chunks_per_sec` is end-to-end throughput."""
+
+    def __init__(self):
+        self.chunks = 0                   # embedded and stored
+        self.failed = 0                   # dropped after per-chunk isolation
+        self.unchanged = 0                # ChunkSync: already stored, skipped
+        self.relabeled = 0                # ChunkSync: same text, metadata-only update
+        self.deleted = 0                  # ChunkSync: stale chunks removed
+        self.batches = 0
+        self.embed_seconds = 0.0
+        self.insert_seconds = 0.0
+        self.seconds = 0.0
+        self.errors: List[str] = []       # first few failure messages
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return round(self.chunks / self.seconds, 1) if self.seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**self.__dict__, "chunks_per_sec": self.chunks_per_sec}
+
+
+class BatchIngestor:
+    """
+    Pipelined upsert into one collection:
+
+        add() ──(embed queue)──▶ embed thread ──(insert queue)──▶ insert thread
+
+    Chunks are regrouped into batches of `batch_size` (VECTOR_UPSERT_BATCH,
+    capped at chromadb's max batch). Embedding runs outside collection.upsert,
+    so batch N+1 is embedded while batch N is written. Each queue holds at
+    most `depth` batches: add() blocks when ingestion falls behind.
+
+    A batch whose embed or insert raises is split in halves and retried down
+    to single chunks; only the chunks that still fail are dropped (counted in
+    stats.failed). Use as a context manager, or call close() / abort().
     """
+
+    def __init__(self, collection_name: str, batch_size: Optional[int] = None, depth: int = 2,
+                 verbose: bool = True):
+        self.name = collection_name
+        self.collection = get_or_create_collection(collection_name)
+        self.batch_size = max(1, min(batch_size or settings.VECTOR_UPSERT_BATCH, _max_batch_size()))
+        self.verbose = verbose
+        self.stats = IngestStats()
+        self._pending: List[Dict[str, Any]] = []
+        self._embed_q: queue.Queue = queue.Queue(maxsize=depth)
+        self._insert_q: queue.Queue = queue.Queue(maxsize=depth)
+        self._abort = threading.Event()
+        self._failures = threading.Lock()     # stats.failed / stats.errors: both stage threads record
+        self._closed = False
+        self._t0 = time.perf_counter()
+        self._threads = [
+            threading.Thread(target=self._embed_loop, daemon=True, name=f"vs-embed-{self.name}"),
+            threading.Thread(target=self._insert_loop, daemon=True, name=f"vs-insert-{self.name}"),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def __enter__(self) -> "BatchIngestor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    # ── Producer side ─────────────────────────────────────────────────────────
+
+    def add(self, chunks: List[Dict[str, Any]]):
+        """Queue chunks; full batches go to the embedder (blocks on back-pressure)."""
+        self._pending.extend(chunks)
+        while len(self._pending) >= self.batch_size:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            self._put(self._embed_q, batch)
+
+    def close(self) -> IngestStats:
+        """Flush the last partial batch, wait for both stages and report throughput."""
+        if self._closed:
+            return self.stats
+        self._closed = True
+        if self._pending:
+            self._put(self._embed_q, self._pending)
+            self._pending = []
+        self._put(self._embed_q, _DONE)
+        self._join()
+        if self.verbose:
+            st = self.stats
+            print(
+                f"[VectorStore] ingested {st.chunks} chunks into {self.name} in {st.batches} batches "
+                f"({st.seconds}s, {st.chunks_per_sec} chunks/s, embed {st.embed_seconds}s, "
+                f"insert {st.insert_seconds}s, {st.failed} failed)"
+            )
+        return self.stats
+
+    def abort(self):
+        """Stop both stages; batches already inserted stay in the collection."""
+        self._closed = True
+        self._abort.set()
+        self._pending = []
+        self._join()
+
+    def _join(self):
+        for t in self._threads:
+            t.join()
+        self.stats.embed_seconds = round(self.stats.embed_seconds, 3)
+        self.stats.insert_seconds = round(self.stats.insert_seconds, 3)
+        self.stats.seconds = round(time.perf_counter() - self._t0, 3)
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._abort.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._abort.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    # ── Stages ────────────────────────────────────────────────────────────────
+
+    def _embed_loop(self):
+        try:
+            while True:
+                batch = self._get(self._embed_q)
+                if batch is _DONE:
+                    break
+                t0 = time.perf_counter()
+                embedded = self._isolated(batch, self._embed, "embed")
+                self.stats.embed_seconds += time.perf_counter() - t0
+                if embedded and not self._put(self._insert_q, embedded):
+                    break
+        finally:
+            self._put(self._insert_q, _DONE)
+
+    def _insert_loop(self):
+        while True:
+            batch = self._get(self._insert_q)
+            if batch is _DONE:
+                break
+            t0 = time.perf_counter()
+            stored = self._isolated(batch, self._insert, "insert")
+            self.stats.insert_seconds += time.perf_counter() - t0
+            self.stats.chunks += len(stored)
+            self.stats.batches += 1
+
+    def _embed(self, batch: List[Dict[str, Any]]) -> List[tuple]:
+        vectors = _get_embedding_fn()([c["document"] for c in batch])
+        return list(zip(batch, vectors))
+
+    def _insert(self, batch: List[tuple]) -> List[tuple]:
+        self.collection.upsert(
+            ids=[c["id"] for c, _ in batch],
+            documents=[c["document"] for c, _ in batch],
+            metadatas=[c.get("metadata", {}) for c, _ in batch],
+            embeddings=[v for _, v in batch],
+        )
+        return batch
+
+    def _isolated(self, items: list, fn: Callable[[list], list], stage: str) -> list:
+        """
+        fn(items), bisecting on failure so one bad chunk cannot sink its batch.
+        The failed calls per batch are capped at enough to isolate a couple of
+        bad chunks; past that the failure is systemic (model, disk) and the
+        rest of the batch is dropped instead of retried chunk by chunk.
+        """
+        return self._bisect(items, fn, stage, [2 * len(items).bit_length() + 2])
+
+    def _bisect(self, items: list, fn: Callable[[list], list], stage: str, budget: List[int]) -> list:
+        try:
+            return fn(items)
+        except Exception as e:
+            if self._abort.is_set():
+                return []
+            budget[0] -= 1
+            if len(items) == 1 or budget[0] <= 0:
+                with self._failures:
+                    self.stats.failed += len(items)
+                    if len(self.stats.errors) < 5:
+                        self.stats.errors.append(f"{stage}: {e}")
+                print(f"[VectorStore] {stage} failed for {len(items)} chunk(s) in {self.name}: {e}")
+                return []
+            mid = len(items) // 2
+            return self._bisect(items[:mid], fn, stage, budget) + self._bisect(items[mid:], fn, stage, budget)
+
+
+
+# ── Incremental sync ──────────────────────────────────────────────────────────
+
+def existing_chunks(collection_name: str, where: Optional[Dict] = None, page: int = 5000) -> Dict[str, Dict[str, Any]]:
+    """id -> metadata for every chunk in the collection (optionally filtered), read in pages."""
     collection = get_or_create_collection(collection_name)
-    ids       = [c["id"] for c in chunks]
-    documents = [c["document"] for c in chunks]
-    metadatas = [c.get("metadata", {}) for c in chunks]
+    out: Dict[str, Dict[str, Any]] = {}
+    offset = 0
+    while True:
+        kwargs: Dict[str, Any] = {"include": ["metadatas"], "limit": page, "offset": offset}
+        if where:
+            kwargs["where"] = where
+        result = collection.get(**kwargs)
+        ids = result.get("ids") or []
+        for chunk_id, meta in zip(ids, result.get("metadatas") or [{}] * len(ids)):
+            out[chunk_id] = meta or {}
+        if len(ids) < page:
+            return out
+        offset += page
+
+
+class ChunkSync:
+    """
+    Bring a collection (or the `where` slice of it) in line with a new chunk set.
+
+    Chunk IDs are content-addressed (make_chunk_id), so an ID already in the
+    collection already holds that text and its embedding:
+      - new ID            embedded through a BatchIngestor
+      - known ID          skipped, or metadata-only update if e.g. chunk_index moved
+      - ID not re-added   deleted by close()
+    A rescan of unchanged code therefore embeds nothing. abort() keeps stale
+    chunks: after a partial run the new set is incomplete.
+    """
 
-    collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
-    return len(chunks)
+    def __init__(self, collection_name: str, where: Optional[Dict] = None, batch_size: Optional[int] = None,
+                 verbose: bool = True):
+        self.name = collection_name
+        self.existing = existing_chunks(collection_name, where)
+        self.ingestor = BatchIngestor(collection_name, batch_size=batch_size, verbose=False)
+        self.stats = self.ingestor.stats
+        self.verbose = verbose
+        self._seen: set = set()
+        self._relabel: List[Dict[str, Any]] = []
 
+    def __enter__(self) -> "ChunkSync":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def add(self, chunks: List[Dict[str, Any]]):
+        fresh = []
+        for chunk in chunks:
+            chunk_id = chunk["id"]
+            if chunk_id in self._seen:
+                continue
+            self._seen.add(chunk_id)
+            stored = self.existing.get(chunk_id)
+            if stored is None:
+                fresh.append(chunk)
+            elif stored != chunk.get("metadata", {}):
+                self._relabel.append(chunk)
+            else:
+                self.stats.unchanged += 1
+        if len(self._relabel) >= self.ingestor.batch_size:
+            self._flush_relabel()
+        if fresh:
+            self.ingestor.add(fresh)
+
+    def close(self) -> IngestStats:
+        self.ingestor.close()
+        self._flush_relabel()
+        stale = [chunk_id for chunk_id in self.existing if chunk_id not in self._seen]
+        collection = self.ingestor.collection
+        for i in range(0, len(stale), self.ingestor.batch_size):
+            collection.delete(ids=stale[i:i + self.ingestor.batch_size])
+        self.stats.deleted = len(stale)
+        if self.verbose:
+            st = self.stats
+            print(
+                f"[VectorStore] synced {self.name}: {st.chunks} embedded, {st.unchanged} unchanged, "
+                f"{st.relabeled} relabeled, {st.deleted} deleted, {st.failed} failed "
+                f"({st.seconds}s, {st.chunks_per_sec} chunks/s)"
+            )
+        return self.stats
+
+    def abort(self):
+        self.ingestor.abort()
+
+    def _flush_relabel(self):
+        if not self._relabel:
+            return
+        self.ingestor.collection.update(
+            ids=[c["id"] for c in self._relabel],
+            metadatas=[c.get("metadata", {}) for c in self._relabel],
+        )
+        self.stats.relabeled += len(self._relabel)
+        self._relabel = []
+
+
+def sync_chunks(collection_name: str, chunks: List[Dict[str, Any]], where: Optional[Dict] = None) -> IngestStats:
+    """One-shot ChunkSync, e.g. of a single file's chunks (where={"file_path": ...})."""
+    with ChunkSync(collection_name, where=where, verbose=False) as sync:
+        sync.add(chunks)
+    return sync.stats
 
 def query_collection(
     collection_name: str,
@@ -124,6 +449,12 @@ def delete_chunks_by_file(collection_name: str, file_path: str):
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
+def _max_batch_size() -> int:
+    try:
+        return _get_client().get_max_batch_size()
+    except Exception:
+        return 5461     # sqlite variable limit chromadb falls back to
+
 def _slugify(name: str) -> str:
     """Make name safe for chromadb: lowercase alphanumeric + underscores."""
     import re
@@ -136,7 +467,21 @@ def _slugify(name: str) -> str:
     return name[:63]
 
 
-def make_chunk_id(file_path: str, chunk_index: int) -> str:
-    """Deterministic, stable ID for a chunk — safe to re-upsert."""
-    raw = f"{file_path}::{chunk_index}"
+def make_chunk_id(file_path: str, document: str, occurrence: int = 0) -> str:
+    """
+    Content-addressed ID: the same text in the same file keeps its ID wherever
+    it moves, so it is never re-embedded. `occurrence` tells repeats apart.
+    """
+    raw = f"{file_path}\0{occurrence}\0{document}"
     return hashlib.md5(raw.encode()).hexdigest()
+
+
+def make_chunk_ids(file_path: str, documents: List[str]) -> List[str]:
+    """make_chunk_id for one file's chunks in order, numbering repeated texts."""
+    seen: Dict[str, int] = {}
+    ids = []
+    for document in documents:
+        occurrence = seen.get(document, 0)
+        seen[document] = occurrence + 1
+        ids.append(make_chunk_id(file_path, document, occurrence))
+    return ids
@@ -0,0 +1,125 @@
+"""
+Benchmark — chunk reuse across a real commit history (budget vs content-defined vs syntax-aware).
+
+Walks the last N first-parent commits of a git repository. For every text
+file a commit modified, both versions are chunked with each chunker and
+named with vs.make_chunk_ids, exactly as the embed stage does. A chunk of
+the new version is "reused" when its ID already existed in the old one: its
+embedding survives the rescan. Reports the reused fraction per chunker,
+along with chunk counts, sizes and the chunks a rescan would still embed,
+so the trade-off against smaller chunks stays visible.
+
+Run from backend/:
+    python -m benchmarks.bench_chunk_reuse [--repo ..] [--commits 200] [--overlap 0]
+"""
+import argparse
+import os
+import subprocess
+import time
+from typing import Callable, Dict, List, Tuple
+
+from app.agents.librarian.chunking import content_defined_chunks, syntax_chunks
+from app.core.config import settings
+from app.core.file_inventory import language_for
+from app.core.git_objects import GitObjectReader
+from app.core.tokens import count_tokens_many
+from app.core.vector_store import make_chunk_ids
+
+
+def word_budget_chunks(text: str, max_tokens: int = settings.CHUNK_TOKEN_LIMIT) -> List[str]:
+    """The pre-CDC implementation of service._chunk_text."""
+    max_words = int(max_tokens * 0.75)
+    lines = text.splitlines(keepends=True)
+    chunks, current, word_count = [], [], 0
+    for line in lines:
+        words_in_line = len(line.split())
+        if word_count + words_in_line > max_words and current:
+            chunks.append("".join(current))
+            current, word_count = [], 0
+        current.append(line)
+        word_count += words_in_line
+    if current:
+        chunks.append("".join(current))
+    return chunks or [text]
+
+
+def modified_files(repo: str, commits: int) -> List[Tuple[str, str, str, str]]:
+    """(old_path, old_blob, new_path, new_blob) for text files changed by each commit."""
+    revs = subprocess.run(
+        ["git", "-C", repo, "rev-list", "--first-parent", "-n", str(commits), "HEAD"],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    out = []
+    for rev in revs:
+        raw = subprocess.run(
+            ["git", "-C", repo, "diff-tree", "-r", "-M", "--no-commit-id", "--raw", f"{rev}^", rev],
+            capture_output=True, text=True,
+        ).stdout
+        for line in raw.splitlines():
+            meta, _, paths = line.partition("\t")
+            fields = meta.split()
+            if len(fields) < 5 or fields[4][0] not in "MR":
+                continue
+            old_path, _, new_path = paths.partition("\t")
+            new_path = new_path or old_path
+            if os.path.splitext(new_path)[1].lower() in settings.SUPPORTED_EXTENSIONS:
+                out.append((old_path, fields[2], new_path, fields[3]))
+    return out
+
+
+def measure(name: str, chunker: Callable[[str, str], List[str]], pairs: List[Tuple[str, str, str, str]],
+            blobs: Dict[str, str]) -> Dict[str, float]:
+    reused = total = tokens = 0
+    t0 = time.perf_counter()
+    for old_path, old_sha, new_path, new_sha in pairs:
+        old_ids = set(make_chunk_ids(old_path, chunker(old_path, blobs[old_sha])))
+        new_chunks = chunker(new_path, blobs[new_sha])
+        new_ids = make_chunk_ids(new_path, new_chunks)
+        reused += sum(1 for chunk_id in new_ids if chunk_id in old_ids)
+        total += len(new_ids)
+        tokens += sum(count_tokens_many(new_chunks))
+    seconds = time.perf_counter() - t0
+    return {
+        "chunker": name,
+        "chunks": total,
+        "reused": reused,
+        "reuse_pct": round(100.0 * reused / total, 1) if total else 0.0,
+        "embedded": total - reused,
+        "avg_tokens": round(tokens / total, 1) if total else 0.0,
+        "ms": round(seconds * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repo", default="..", help="git repository to replay (default: this repo)")
+    parser.add_argument("--commits", type=int, default=200)
+    parser.add_argument("--overlap", type=int, default=0, help="overlap lines for the CDC chunker")
+    args = parser.parse_args()
+
+    pairs = modified_files(args.repo, args.commits)
+    if not pairs:
+        print("no modified text files in that history")
+        return
+    reader = GitObjectReader(args.repo)
+    shas = {sha for _, old, _, new in pairs for sha in (old, new)}
+    blobs = {sha: (data or b"").decode("utf-8", errors="ignore") for sha, data in reader.read_many(shas)}
+    reader.close()
+    print(f"{len(pairs)} modified files across the last {args.commits} commits of {os.path.abspath(args.repo)}\n")
+
+    rows = [
+        measure("word budget", lambda p, t: word_budget_chunks(t), pairs, blobs),
+        measure("content-defined", lambda p, t: content_defined_chunks(t, overlap_lines=args.overlap), pairs, blobs),
+        measure("syntax-aware", lambda p, t: [c.text for c in syntax_chunks(
+            t, language_for(os.path.splitext(p)[1]), overlap_lines=args.overlap)], pairs, blobs),
+    ]
+    print(f"{'chunker':<18}{'chunks':>8}{'reused':>8}{'reuse %':>9}{'embedded':>10}{'avg tok':>9}{'ms':>9}")
+    for row in rows:
+        print(
+            f"{row['chunker']:<18}{row['chunks']:>8}{row['reused']:>8}{row['reuse_pct']:>9}"
+            f"{row['embedded']:>10}{row['avg_tokens']:>9}{row['ms']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Micro-benchmark — Python import resolution (linear scan vs suffix index).
+
+Builds a synthetic module_map shaped like the one LibrarianService._build_graph
+produces for a 50k-module tree, checks that PythonModuleIndex agrees with the
+original linear `endswith` scan, and reports the per-lookup cost of both.
+
+Run from backend/:
+    python -m benchmarks.bench_import_resolution [--modules 50000]
+"""
+import argparse
+import random
+import time
+from typing import Dict, List, Optional
+
+from app.agents.librarian.resolvers import PythonModuleIndex
+
+
+def linear_resolve(target: str, module_map: Dict[str, str]) -> Optional[str]:
+    """The pre-index implementation of LibrarianService._resolve_import."""
+    if target in module_map:
+        return module_map[target]
+    init_key = f"{target}.__init__"
+    if init_key in module_map:
+        return module_map[init_key]
+    candidates = [
+        path for mod, path in module_map.items()
+        if mod.endswith(f".{target}") or target.endswith(f".{mod}")
+    ]
+    return sorted(candidates, key=len)[0] if candidates else None
+
+
+def synthetic_module_map(n_modules: int, seed: int = 7) -> Dict[str, str]:
+    """Same keys the walk emits: full dotted path plus bare filename per .py file."""
+    rng = random.Random(seed)
+    module_map: Dict[str, str] = {}
+    i = 0
+    while i < n_modules:
+        depth = rng.randint(1, 5)
+        parts = [f"pkg{rng.randint(0, 40)}"] + [f"sub{rng.randint(0, 25)}" for _ in range(depth - 1)]
+        name = "__init__" if rng.random() < 0.08 else f"mod{rng.randint(0, 300)}"
+        rel_path = "/".join(parts + [f"{name}.py"])
+        module_map[rel_path.replace("/", ".").replace(".py", "")] = rel_path
+        module_map[name] = rel_path
+        i += 1
+    return module_map
+
+
+def synthetic_imports(module_map: Dict[str, str], n: int, seed: int = 11) -> List[str]:
+    """A mix of in-repo, partially qualified, from-import and third-party targets."""
+    rng = random.Random(seed)
+    mods = [m for m in module_map if "." in m]
+    third_party = ["os", "os.path", "json", "typing.List", "numpy", "fastapi.APIRouter", "pydantic.BaseModel"]
+    out = []
+    for _ in range(n):
+        roll = rng.random()
+        mod = rng.choice(mods)
+        if roll < 0.35:
+            out.append(mod)
+        elif roll < 0.60:
+            out.append(mod.split(".", rng.randint(1, mod.count(".")))[-1])
+        elif roll < 0.80:
+            out.append(f"{mod}.Symbol{rng.randint(0, 9)}")
+        else:
+            out.append(rng.choice(third_party))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", type=int, default=50_000)
+    parser.add_argument("--lookups", type=int, default=100_000, help="lookups timed against the index")
+    parser.add_argument("--linear-lookups", type=int, default=300, help="lookups timed against the linear scan")
+    args = parser.parse_args()
+
+    module_map = synthetic_module_map(args.modules)
+    imports = synthetic_imports(module_map, args.lookups)
+    print(f"module_map entries: {len(module_map):,}  |  lookups: {len(imports):,}")
+
+    t0 = time.perf_counter()
+    index = PythonModuleIndex(module_map)
+    build_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    indexed = [index.resolve(t) for t in imports]
+    index_s = time.perf_counter() - t0
+
+    sample = imports[: args.linear_lookups]
+    t0 = time.perf_counter()
+    linear = [linear_resolve(t, module_map) for t in sample]
+    linear_s = time.perf_counter() - t0
+
+    mismatches = sum(1 for a, b in zip(linear, indexed) if a != b)
+    per_linear = linear_s / len(sample)
+    per_index = index_s / len(imports)
+
+    print(f"index build     : {build_s * 1000:8.1f} ms")
+    print(f"linear scan     : {per_linear * 1e6:10.1f} us/lookup  ({len(sample)} lookups)")
+    print(f"suffix index    : {per_index * 1e6:10.2f} us/lookup  ({len(imports)} lookups)")
+    print(f"speedup         : {per_linear / per_index:10.0f}x")
+    print(f"mismatches      : {mismatches} / {len(sample)}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
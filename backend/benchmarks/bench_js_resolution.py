@@ -0,0 +1,155 @@
+"""
+Micro-benchmark — JS/TS import resolution (basename stem vs JsModuleIndex).
+
+Writes a synthetic TypeScript project (default 10k files) to a temp dir: many
+features each with their own index.ts / utils.ts / types.ts, a tsconfig with
+`baseUrl` + `paths` aliases, and a mix of relative, directory, aliased,
+require() and dynamic import() specifiers. Every generated import records the
+file it really points at, so both resolvers are scored for accuracy as well
+as per-lookup cost.
+
+Run from backend/:
+    python -m benchmarks.bench_js_resolution [--files 10000]
+"""
+import argparse
+import os
+import posixpath
+import random
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.agents.librarian.resolvers import JsModuleIndex, js_import_specs
+
+_COMMON = ("index", "utils", "types", "constants", "hooks")
+
+
+def stem_resolve(spec: str, stem_index: Dict[str, str]) -> Optional[str]:
+    """The pre-index implementation: first file whose basename stem matches."""
+    return stem_index.get(os.path.splitext(os.path.basename(spec))[0])
+
+
+def synthetic_project(root: str, n_files: int, seed: int = 5) -> List[Tuple[str, str, str]]:
+    """Write the tree; returns (src, spec, expected target) for every import."""
+    rng = random.Random(seed)
+    files: List[str] = []
+    features = max(1, n_files // 10)
+    for f in range(features):
+        area = f"src/{'app' if f % 3 else 'lib'}/feature{f}"
+        names = list(_COMMON) + [f"Widget{f}_{i}" for i in range(5)]
+        for name in names:
+            ext = ".tsx" if name.startswith("Widget") else ".ts"
+            files.append(f"{area}/{name}{ext}")
+    files = files[:n_files]
+
+    imports: Dict[str, List[Tuple[str, str]]] = {p: [] for p in files}
+    for src in files:
+        for _ in range(rng.randint(2, 6)):
+            target = rng.choice(files)
+            if target == src:
+                continue
+            base = posixpath.splitext(target)[0]
+            parent, name = posixpath.split(base)
+            roll = rng.random()
+            if roll < 0.40:
+                spec = posixpath.relpath(base, posixpath.dirname(src))
+                spec = spec if spec.startswith(".") else f"./{spec}"
+            elif roll < 0.55 and name == "index":
+                spec = posixpath.relpath(parent, posixpath.dirname(src))
+                spec = spec if spec.startswith(".") else f"./{spec}"
+            elif roll < 0.80:
+                spec = "@/" + base[len("src/"):]
+            else:
+                spec = base[len("src/"):]                       # via baseUrl
+            imports[src].append((spec, target))
+
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, "tsconfig.json"), "w", encoding="utf-8") as f:
+        f.write('{\n  // generated\n  "compilerOptions": {"baseUrl": "src", "paths": {"@/*": ["*"]},},\n}\n')
+    expected = []
+    for src, pairs in imports.items():
+        lines = []
+        for i, (spec, target) in enumerate(pairs):
+            form = i % 4
+            if form == 0:
+                lines.append(f"import {{ x{i} }} from '{spec}';")
+            elif form == 1:
+                lines.append(f"const m{i} = require(\"{spec}\");")
+            elif form == 2:
+                lines.append(f"const lazy{i} = () => import('{spec}');")
+            else:
+                lines.append(f"export * from \"{spec}\";")
+            expected.append((src, spec, target))
+        lines.append("import React from 'react';")
+        full = os.path.join(root, src)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    return expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--keep", action="store_true", help="leave the generated tree on disk")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="kachow_ts_bench_")
+    try:
+        expected = synthetic_project(root, args.files)
+        rel_paths = []
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                rel_paths.append(os.path.relpath(os.path.join(dirpath, name), root).replace("\\", "/"))
+        print(f"files: {len(rel_paths):,}  |  in-repo imports: {len(expected):,}")
+
+        t0 = time.perf_counter()
+        specs = {}
+        for rel_path in rel_paths:
+            if rel_path.endswith((".ts", ".tsx")):
+                with open(os.path.join(root, rel_path), "r", encoding="utf-8") as f:
+                    specs[rel_path] = js_import_specs(f.read())
+        extract_s = time.perf_counter() - t0
+        n_specs = sum(len(v) for v in specs.values())
+        extracted = sum(1 for s, spec, _ in expected if spec in specs[s])
+
+        t0 = time.perf_counter()
+        index = JsModuleIndex.from_tree(root, rel_paths)
+        build_s = time.perf_counter() - t0
+        stem_index = {os.path.splitext(os.path.basename(p))[0]: p for p in rel_paths}
+
+        t0 = time.perf_counter()
+        for src, src_specs in specs.items():
+            for spec in src_specs:
+                index.resolve(src, spec)
+        index_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for src_specs in specs.values():
+            for spec in src_specs:
+                stem_resolve(spec, stem_index)
+        stem_s = time.perf_counter() - t0
+
+        index_ok = sum(1 for s, spec, t in expected if index.resolve(s, spec) == t)
+        stem_ok = sum(1 for s, spec, t in expected if stem_resolve(spec, stem_index) == t)
+        externals = sum(1 for src_specs in specs.values() for spec in src_specs if spec == "react")
+        leaked = sum(1 for s, src_specs in specs.items() for spec in src_specs
+                     if spec == "react" and index.resolve(s, spec) is not None)
+
+        print(f"spec extraction : {extract_s * 1000:8.1f} ms  ({n_specs:,} specs, {extracted}/{len(expected)} in-repo found)")
+        print(f"index build     : {build_s * 1000:8.1f} ms")
+        print(f"stem heuristic  : {stem_s / n_specs * 1e6:10.2f} us/lookup  accuracy {stem_ok / len(expected):6.1%}")
+        print(f"JsModuleIndex   : {index_s / n_specs * 1e6:10.2f} us/lookup  accuracy {index_ok / len(expected):6.1%}")
+        print(f"externals       : {leaked} / {externals} bare package imports wrongly resolved in-repo")
+        if index_ok != len(expected) or leaked or extracted != len(expected):
+            raise SystemExit(1)
+    finally:
+        if args.keep:
+            print(f"tree kept at {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Shared fixtures: a local bare repository served over file:// (no network).
+
+The fixture repo has two commits on main:
+
+    HEAD~1  README.md  services/api/{app,db}.py  services/web/index.js  libs/core/util.py
+    HEAD    + services/api/auth.py, + services/web/app.js
+"""
+import subprocess
+
+import pytest
+
+from app.agents.librarian.analysis_cache import analysis_cache
+from app.agents.librarian.metrics import scan_metrics
+from app.core.config import settings
+from app.core.git_objects import git_readers
+from app.core.graph_store import graph_store
+
+_FILES_V1 = {
+    "README.md": "# demo\n",
+    "services/api/app.py": "from services.api import db\n\n\ndef run():\n    return db.connect()\n",
+    "services/api/db.py": "def connect():\n    return 1\n",
+    "services/web/index.js": "import { x } from './app';\n",
+    "libs/core/util.py": "def helper():\n    return 2\n",
+}
+_FILES_V2 = {
+    "services/api/auth.py": "from services.api import app\n",
+    "services/web/app.js": "export const x = 1;\n",
+}
+
+
+def _git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", "-c", "init.defaultBranch=main", *args],
+        cwd=cwd, check=True, capture_output=True,
+    )
+
+
+def _commit(work, files, message):
+    for rel_path, text in files.items():
+        path = work / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    _git(work, "add", "-A")
+    _git(work, "commit", "-q", "-m", message)
+
+
+@pytest.fixture
+def remote(tmp_path, monkeypatch):
+    """file:// URL of a bare repo that serves partial clones; storage redirected into tmp_path."""
+    work = tmp_path / "src"
+    work.mkdir()
+    _git(work, "init", "-q")
+    _commit(work, _FILES_V1, "v1")
+    _commit(work, _FILES_V2, "v2")
+    bare = tmp_path / "demo.git"
+    _git(tmp_path, "clone", "-q", "--bare", str(work), str(bare))
+    _git(bare, "config", "uploadpack.allowFilter", "true")
+
+    monkeypatch.setattr(settings, "REPO_STORAGE_PATH", str(tmp_path / "repos"))
+    monkeypatch.setattr(settings, "LIBRARIAN_PARSE_WORKERS", 1)
+    monkeypatch.setattr(graph_store, "root", str(tmp_path / "graphs"))
+    monkeypatch.setattr(scan_metrics, "path", str(tmp_path / "scan_metrics.jsonl"))
+    monkeypatch.setattr(analysis_cache, "open", lambda: False)
+    yield f"file://{bare}"
+    git_readers.invalidate()
@@ -0,0 +1,65 @@
+"""
+Clone strategies against the local bare repository from conftest.py.
+"""
+from pathlib import Path
+
+from git import Repo
+
+from app.agents.librarian import clone
+from app.agents.librarian.service import librarian
+from app.core.git_objects import git_readers
+
+
+def _worktree_files(target):
+    return {p.relative_to(target).as_posix() for p in target.rglob("*") if p.is_file() and ".git" not in p.parts}
+
+
+def _config(target, key):
+    return Repo(target).git.config("--get", key)
+
+
+def test_blobless_sparse_clone(remote):
+    target = clone.clone_dir(remote)
+    clone.clone_or_update(remote, target, "main", "blobless", ["services/api"])
+
+    # cone mode: the api directory plus files directly in the root
+    assert _worktree_files(Path(target)) == {
+        "README.md", "services/api/app.py", "services/api/db.py", "services/api/auth.py",
+    }
+    assert clone.sparse_dirs(target) == ["services/api"]
+    assert _config(target, "remote.origin.promisor") == "true"
+    assert _config(target, "remote.origin.partialclonefilter") == "blob:none"
+    assert not clone.is_shallow(target)
+    # blobs outside the cone were never downloaded
+    reader = git_readers.get(target)
+    outside = {sha for path, sha, _ in reader.ls_tree(reader.rev_parse("HEAD")) if path.startswith(("libs/", "services/web/"))}
+    assert outside and outside <= reader.missing(reader.rev_parse("HEAD"))
+
+
+def test_scan_ref_follows_sparse_cone(remote):
+    clone.clone_or_update(remote, clone.clone_dir(remote), "main", "blobless", ["services/api"])
+
+    head = librarian.scan_ref(remote, "HEAD")
+    previous = librarian.scan_ref(remote, "HEAD~1")
+
+    def files(graph):
+        return {node.id for node in graph.nodes if node.type != "folder"}
+
+    assert files(head) == {"README.md", "services/api/app.py", "services/api/db.py", "services/api/auth.py"}
+    assert files(previous) == {"README.md", "services/api/app.py", "services/api/db.py"}
+    assert head.total_files == 4 and previous.total_files == 3
+
+
+def test_deepen_history(remote):
+    target = clone.clone_dir(remote)
+    clone.clone_or_update(remote, target, "main", "shallow")
+    repo = Repo(target)
+    assert clone.is_shallow(target)
+    assert len(list(repo.iter_commits("HEAD"))) == 1
+
+    clone.deepen_history(repo)
+
+    assert not clone.is_shallow(target)
+    assert len(list(repo.iter_commits("HEAD"))) == 2
+    assert _config(target, "remote.origin.promisor") == "true"
+    assert _config(target, "remote.origin.partialclonefilter") == "blob:none"
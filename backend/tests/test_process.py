@@ -0,0 +1,43 @@
+"""
+process_request against the local bare repository from conftest.py.
+"""
+import threading
+import time
+
+from app.agents.librarian import clone
+from app.agents.librarian.scheduler import scan_scheduler
+from app.agents.librarian.service import librarian
+from app.core.repo_locks import repo_locks
+
+
+def test_forced_process_cancels_running_job(remote, monkeypatch):
+    target = clone.clone_dir(remote)
+    clone.clone_or_update(remote, target, "main", "full")
+    monkeypatch.setattr(librarian, "_run_background", lambda *args, **kwargs: None)
+
+    started = threading.Event()
+
+    def hold(job):
+        # a background job that keeps reading the worktree until it is superseded
+        with repo_locks.read(target):
+            started.set()
+            while True:
+                job.raise_if_cancelled()
+                time.sleep(0.01)
+
+    running = scan_scheduler.submit(clone.clone_name(remote), "main", "index", hold)
+    assert started.wait(5)
+
+    result = {}
+    worker = threading.Thread(
+        target=lambda: result.update(graph=librarian.process_request(remote, force=True)), daemon=True
+    )
+    worker.start()
+    worker.join(10)
+    blocked = worker.is_alive()
+    running.cancel()        # let the job go either way so the test cannot hang
+    worker.join(10)
+    assert not blocked, "forced process blocked behind the running job"
+
+    assert running.state == "cancelled"
+    assert result["graph"].total_files == 7